@@ -0,0 +1,86 @@
+"""
+
+Page latency when nothing changed: a full GET (hydration and
+rendering) vs. a conditional GET answered with a 304.
+
+    python -m benchmarks.bench_conditional [--tasks 1000] [--requests 200]
+
+One user owns a board of --tasks tasks, each with a comment; each
+page is fetched through the test client with and without the
+If-None-Match of its previous response.
+
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from src.app import create_app
+from src.importer import import_tasks
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+
+PAGES = (
+    "/boards/bench/BENCH",
+    "/tasks/bench/BENCH",
+    "/tasks/bench/BENCH/1",
+    "/tasks/",
+)
+
+
+def timed(client, url: str, requests: int, headers: dict, status: int) -> float:
+    timings = list()
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        response.get_data()
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == status, response.status_code
+        response.close()
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("PASSWORD_SALT", "bench")
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "bench.db")
+        app = create_app("config.py")
+        app.config["WTF_CSRF_ENABLED"] = False
+
+        with app.app_context():
+            user = User.create_user("bench", b"bench")
+            board = Board.new_board("BENCH", "bench", user)
+            records = "".join(
+                json.dumps(dict(title=f"task {i}", body="body", comments=["comment"])) + "\n"
+                for i in range(args.tasks)
+            )
+            import_tasks(board, user, io.StringIO(records), "jsonl")
+
+        client = app.test_client()
+        client.post("/login", data={"username": "bench", "password": "bench"})
+
+        print(f"{'page':<24}{'200 ms':>10}{'304 ms':>10}{'speedup':>10}")
+        for url in PAGES:
+            response = client.get(url)
+            etag = response.headers["ETag"]
+            response.close()
+
+            full = timed(client, url, args.requests, {}, 200)
+            revalidated = timed(client, url, args.requests, {"If-None-Match": etag}, 304)
+            print(f"{url:<24}{full:>10.3f}{revalidated:>10.3f}{full / revalidated:>9.2f}x")
+
+        app.database.close()
+
+
+if __name__ == "__main__":
+    main()
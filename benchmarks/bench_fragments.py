@@ -0,0 +1,89 @@
+"""
+
+List page latency: every row template rendered on each request
+vs. rows served from the fragment cache.
+
+    python -m benchmarks.bench_fragments [--tasks 2000] [--page-size 500] [--requests 50]
+
+One user owns a board of --tasks tasks; the board task list and
+/tasks/ are fetched with a page of --page-size rows, first with
+the cache turned off, then warm.
+
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from src.app import create_app
+from src.importer import import_tasks
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+
+PAGES = ("/boards/", "/tasks/bench/BENCH", "/tasks/")
+
+
+def timed(client, url: str, requests: int) -> float:
+    timings = list()
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(url)
+        response.get_data()
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+        response.close()
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("PASSWORD_SALT", "bench")
+    os.environ["PAGE_SIZE"] = str(args.page_size)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "bench.db")
+        app = create_app("config.py")
+        app.config["WTF_CSRF_ENABLED"] = False
+
+        with app.app_context():
+            user = User.create_user("bench", b"bench")
+            board = Board.new_board("BENCH", "bench", user)
+            records = "".join(
+                json.dumps(dict(title=f"task {i}", body="body", tags=["bench"])) + "\n"
+                for i in range(args.tasks)
+            )
+            import_tasks(board, user, io.StringIO(records), "jsonl")
+            for i in range(args.page_size):
+                Board.new_board(f"B{i}", f"board {i}", user)
+
+        client = app.test_client()
+        client.post("/login", data={"username": "bench", "password": "bench"})
+
+        budget = app.fragments.budget
+        print(f"{'page':<22}{'uncached ms':>13}{'cached ms':>11}{'speedup':>10}")
+        for url in PAGES:
+            app.fragments.budget = 0
+            uncached = timed(client, url, args.requests)
+            app.fragments.budget = budget
+            cached = timed(client, url, args.requests)
+            print(f"{url:<22}{uncached:>13.3f}{cached:>11.3f}{uncached / cached:>9.2f}x")
+
+        stats = app.fragments.stats()
+        print(
+            f"\n{stats.entries} fragments, {stats.size} bytes; "
+            f"{stats.hits} hits, {stats.misses} misses, {stats.evictions} evictions"
+        )
+        app.database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+
+Login burst against the KDF pool: every request thread running
+scrypt itself vs. a bounded pool that turns the excess away with
+KdfBusy (a 429).
+
+    python -m benchmarks.bench_kdf [--clients 32] [--workers 2] [--queue-depth 8]
+
+Reports median and p99 latency of the attempts that were hashed,
+how many were rejected, and the pool's queue wait.
+
+"""
+import argparse
+import statistics
+import threading
+import time
+from hashlib import scrypt
+
+from flask import Flask
+
+from src.kdf import KdfBusy, KdfPool
+
+PARAMS = dict(salt=b"bench", n=16384, r=8, p=1)
+
+
+def burst(clients: int, attempt) -> tuple:
+    timings, rejected = list(), list()
+    barrier = threading.Barrier(clients)
+
+    def client():
+        barrier.wait()
+        started = time.perf_counter()
+        try:
+            attempt()
+        except KdfBusy:
+            rejected.append(1)
+        else:
+            timings.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return statistics.median(timings) * 1000, p99 * 1000, len(rejected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue-depth", type=int, default=8)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.update(KDF_WORKERS=args.workers, KDF_QUEUE_DEPTH=args.queue_depth)
+    pool = KdfPool(app)
+
+    print(f"{'variant':<10}{'p50 ms':>10}{'p99 ms':>10}{'rejected':>10}")
+    for variant, attempt in (
+            ("inline", lambda: scrypt(b"password", **PARAMS)),
+            ("pool", lambda: pool.run(scrypt, b"password", **PARAMS)),
+    ):
+        p50, p99, rejected = burst(args.clients, attempt)
+        print(f"{variant:<10}{p50:>10.1f}{p99:>10.1f}{rejected:>10}")
+
+    stats = pool.stats()
+    print(
+        f"pool: {stats.completed} hashed, "
+        f"queue wait avg {stats.queue_wait_total / stats.completed * 1000:.1f}ms "
+        f"max {stats.queue_wait_max * 1000:.1f}ms, "
+        f"hash avg {stats.hash_total / stats.completed * 1000:.1f}ms"
+    )
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
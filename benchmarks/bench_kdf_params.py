@@ -0,0 +1,60 @@
+"""
+
+Pick scrypt parameters for this host: the largest n (a power of
+two) whose median hashing time stays under a target latency.
+
+    python -m benchmarks.bench_kdf_params [--target-ms 100] [--r 1] [--p 1]
+
+Run it on the deployment host and copy the printed KDF_N, KDF_R
+and KDF_P into the environment. Users' hashes are upgraded to
+the new parameters as they sign in.
+
+"""
+import argparse
+import statistics
+import time
+
+from src.todo.auth.passwords import ScryptParams, derive, new_salt
+
+MIN_LOG2_N = 10
+MAX_LOG2_N = 22
+
+
+def median_ms(params: ScryptParams, rounds: int) -> float:
+    timings = list()
+    for _ in range(rounds):
+        started = time.perf_counter()
+        derive(b"password", params, new_salt())
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--target-ms", type=float, default=100)
+    parser.add_argument("--r", type=int, default=1)
+    parser.add_argument("--p", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    chosen = None
+    print(f"{'n':>10}{'memory MiB':>12}{'median ms':>12}")
+    for log2_n in range(MIN_LOG2_N, MAX_LOG2_N + 1):
+        params = ScryptParams(2 ** log2_n, args.r, args.p)
+        elapsed = median_ms(params, args.rounds)
+        print(f"{params.n:>10}{128 * params.n * params.r / 2 ** 20:>12.0f}{elapsed:>12.1f}")
+        if elapsed > args.target_ms:
+            break
+        chosen = params
+
+    if chosen is None:
+        print(f"no n >= {2 ** MIN_LOG2_N} hashes within {args.target_ms:.0f}ms; lower --r")
+        return
+
+    print(f"KDF_N={chosen.n}")
+    print(f"KDF_R={chosen.r}")
+    print(f"KDF_P={chosen.p}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+
+Task creation throughput: one commit per step vs. Task.new_task's
+single transaction.
+
+    python -m benchmarks.bench_new_task [--tasks 2000]
+
+Runs against a database file with the configured pragma profile,
+so each commit pays for its journal write and sync.
+The per-step variant replays the old sequence of model calls.
+
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from flask import current_app
+
+from src.app import create_app
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+from src.todo.task.models import Task, TaskEvent, TaskStatus, queries
+
+
+def new_task_per_step(user: User, board: Board, title: str) -> Task:
+    with current_app.database as db:
+        number = queries.increment_task_number_sequence.one(db, board.id)[0]
+        queries.create_new_task(db, number, board.id, user.id, None, title, "", int(time.time()))
+        db.commit()
+
+    task = Task.select_by_board_and_number(board.id, number)
+    TaskEvent.new_task_event(task.id, user.id, description="created task")
+    TaskStatus.create_task_status(task.id, "todo")
+    TaskStatus.create_task_status(task.id, "in-progress")
+    TaskStatus.create_task_status(task.id, "completed")
+    return task.set_status(user, "todo")
+
+
+def new_task_transaction(user: User, board: Board, title: str) -> Task:
+    return board.new_task(creator=user, title=title, body="")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=2000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("PASSWORD_SALT", "bench")
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "bench.db")
+        app = create_app("config.py")
+
+        print(f"{'variant':<14}{'tasks/s':>10}{'commits':>10}")
+        with app.app_context():
+            user = User.create_user("bench", b"bench")
+            for variant, create in (
+                    ("per step", new_task_per_step),
+                    ("transaction", new_task_transaction),
+            ):
+                board = Board.new_board(variant[:2].upper(), variant, user)
+                commits = list()
+                with app.database as db:
+                    db.set_trace_callback(lambda sql: sql == "COMMIT" and commits.append(sql))
+
+                started = time.perf_counter()
+                for i in range(args.tasks):
+                    create(user, board, f"task {i}")
+                elapsed = time.perf_counter() - started
+
+                with app.database as db:
+                    db.set_trace_callback(None)
+                print(f"{variant:<14}{args.tasks / elapsed:>10.0f}{len(commits) / args.tasks:>10.1f}")
+
+        app.database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+
+Authorization cost per request: one count query per user_can_*
+check (the old board_user_can_* statements) vs. Board.capabilities,
+resolved once and kept in the request's identity map.
+
+    python -m benchmarks.bench_permissions [--requests 20000]
+
+Each simulated request is a fresh app context checking a
+collaborator's access 1, 2 or 5 times, as the routes do.
+
+"""
+import argparse
+import os
+import time
+
+from flask import current_app
+
+from src.app import create_app
+from src.queries import parse_queries
+from src.todo.auth.models import Capability, User
+from src.todo.board.models import Board
+
+# the statements Board.user_can_* used to run, one per check
+OLD_QUERIES = parse_queries("\n".join(
+    f"""
+-- name: board_user_can_{capability.name.lower()}
+select count(1)
+from board_user_role bur
+where bur.board_id = :board_id
+  and bur.user_id = :user_id
+  and bur.role_id in {role_ids}
+  and bur.is_accepted = 1;
+"""
+    for capability, role_ids in (
+        (Capability.VIEW, "(0, 1, 2)"),
+        (Capability.CREATE, "(0, 1)"),
+        (Capability.EDIT, "(0, 1)"),
+        (Capability.DELETE, "(0, 1)"),
+        (Capability.INVITE, "(0)"),
+    )
+))
+CHECKS = (
+    (Capability.VIEW,),
+    (Capability.VIEW, Capability.EDIT),
+    (Capability.VIEW, Capability.CREATE, Capability.EDIT, Capability.DELETE, Capability.INVITE),
+)
+
+
+def per_check(app, board: Board, user: User, checks: tuple):
+    with app.app_context():
+        for capability in checks:
+            query = getattr(OLD_QUERIES, f"board_user_can_{capability.name.lower()}")
+            with current_app.database as db:
+                result = query.one(db, board_id=board.id, user_id=user.id)
+            bool(result and result[0])
+
+
+def resolved(app, board: Board, user: User, checks: tuple):
+    with app.app_context():
+        for capability in checks:
+            board.user_can(user, capability)
+
+
+def timed(variant, app, board: Board, user: User, checks: tuple, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        variant(app, board, user, checks)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("PASSWORD_SALT", "bench")
+    os.environ["DATABASE_PATH"] = ":memory:"
+    app = create_app("config.py")
+
+    with app.app_context():
+        creator = User.create_user("creator", b"bench")
+        collaborator = User.create_user("collaborator", b"bench")
+        board = Board.new_board("BENCH", "bench", creator)
+        board.set_user_role(creator, collaborator, "collaborator")
+        board.accept_user_role(collaborator.id)
+
+    print(f"{'checks':>8}{'per check us':>15}{'resolved us':>14}{'speedup':>10}")
+    for checks in CHECKS:
+        old = timed(per_check, app, board, collaborator, checks, args.requests)
+        new = timed(resolved, app, board, collaborator, checks, args.requests)
+        print(f"{len(checks):>8}{old:>15.1f}{new:>14.1f}{old / new:>9.2f}x")
+
+    app.database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+
+Concurrent read throughput across worker processes,
+default rollback journal vs. the tuned PRAGMA profile.
+
+    python -m benchmarks.bench_pragma_profile [--workers 4] [--seconds 5]
+
+Each profile gets a fresh database file. One process writes
+continuously while the reader processes run point lookups,
+mimicking uWSGI workers sharing one SQLite file.
+
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from flask import Flask
+
+from src.database import Database
+
+ROWS = 10_000
+
+PROFILES = {
+    "default": dict(),
+    "tuned": dict(
+        DATABASE_JOURNAL_MODE="WAL",
+        DATABASE_SYNCHRONOUS="NORMAL",
+        DATABASE_MMAP_SIZE=268435456,
+        DATABASE_CACHE_SIZE=-20000,
+        DATABASE_TEMP_STORE="MEMORY",
+        DATABASE_BUSY_TIMEOUT=5000,
+        DATABASE_FOREIGN_KEYS="ON",
+    ),
+}
+
+
+def open_database(path: str, profile: dict) -> Database:
+    app = Flask(__name__)
+    app.config.update(DATABASE_PATH=path, DATABASE_POOL_SIZE=1, **profile)
+    return Database(app)
+
+
+def setup(path: str, profile: dict):
+    database = open_database(path, profile)
+    with database as db:
+        db.execute("create table item (id integer primary key, value text)")
+        db.executemany(
+            "insert into item (value) values (?)",
+            ((f"value {i}",) for i in range(ROWS)),
+        )
+    database.close()
+
+
+def reader(path: str, profile: dict, seconds: float, results):
+    database = open_database(path, profile)
+    reads = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        with database as db:
+            db.execute(
+                "select value from item where id = ?", (reads % ROWS + 1,)
+            ).fetchone()
+        reads += 1
+    results.put(reads)
+
+
+def writer(path: str, profile: dict, seconds: float, results):
+    database = open_database(path, profile)
+    writes = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        with database as db:
+            db.execute(
+                "update item set value = ? where id = ?",
+                (f"updated {writes}", writes % ROWS + 1),
+            )
+        writes += 1
+    results.put(writes)
+
+
+def run(profile_name: str, workers: int, seconds: float) -> tuple:
+    profile = PROFILES[profile_name]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        setup(path, profile)
+
+        reads, writes = multiprocessing.Queue(), multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=reader, args=(path, profile, seconds, reads))
+            for _ in range(workers)
+        ]
+        processes.append(
+            multiprocessing.Process(target=writer, args=(path, profile, seconds, writes))
+        )
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        total_reads = sum(reads.get() for _ in range(workers))
+        total_writes = writes.get()
+
+    return total_reads / seconds, total_writes / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'profile':<10}{'reads/s':>14}{'writes/s':>14}")
+    for name in PROFILES:
+        reads, writes = run(name, args.workers, args.seconds)
+        print(f"{name:<10}{reads:>14.0f}{writes:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
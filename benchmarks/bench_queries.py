@@ -0,0 +1,79 @@
+"""
+
+Per-query overhead: anosql's generic wrapper vs. src.queries.
+
+    python -m benchmarks.bench_queries [--calls 100000]
+
+Both run the same SQL from the same queries.sql files against
+one pooled in-memory connection, so the difference is the cost
+of dispatch, cursor handling and result materialization.
+anosql is only needed for this comparison (requirements-dev.txt).
+
+"""
+import argparse
+import os
+import time
+
+import anosql
+
+from src.app import create_app
+from src.todo.auth.models import User
+from src.todo.auth.models import queries as auth_queries
+from src.todo.auth.models import sql_path as auth_sql_path
+from src.todo.board.models import Board
+from src.todo.board.models import queries as board_queries
+from src.todo.board.models import sql_path as board_sql_path
+
+
+def timed(fn, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("PASSWORD_SALT", "bench")
+    os.environ["DATABASE_PATH"] = ":memory:"
+    app = create_app("config.py")
+
+    with app.app_context():
+        user = User.create_user("bench", b"bench")
+        board = Board.new_board("BN", "bench", user)
+
+    anosql_auth = anosql.from_path(auth_sql_path, "sqlite3")
+    anosql_board = anosql.from_path(board_sql_path, "sqlite3")
+
+    with app.database as db:
+        cases = (
+            (
+                "point lookup",
+                lambda: anosql_auth.select_user_by_id(db, user_id=user.id).pop(0),
+                lambda: auth_queries.select_user_by_id.one(db, user_id=user.id),
+            ),
+            (
+                "list",
+                lambda: anosql_board.select_board_statuses(db, board.id),
+                lambda: board_queries.select_board_statuses.many(db, board.id),
+            ),
+            (
+                "iterate",
+                lambda: [r for r in anosql_board.select_board_statuses(db, board.id)],
+                lambda: [r for r in board_queries.select_board_statuses.iter(db, board.id)],
+            ),
+        )
+
+        print(f"{'query':<14}{'anosql us':>12}{'queries us':>12}{'speedup':>10}")
+        for name, old, new in cases:
+            old_us = timed(old, args.calls)
+            new_us = timed(new, args.calls)
+            print(f"{name:<14}{old_us:>12.2f}{new_us:>12.2f}{old_us / new_us:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
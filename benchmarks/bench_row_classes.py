@@ -0,0 +1,67 @@
+"""
+
+Row classes: keyword-constructed plain dataclasses vs. the
+slotted, positionally constructed ones, for building summaries.
+
+    python -m benchmarks.bench_row_classes [--rows 100000]
+
+The plain variant is rebuilt from the slotted class's fields and
+filled field by field, the way the models did it before.
+
+"""
+import argparse
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+
+from src.todo.board.models import BoardSummary
+from src.todo.task.models import TaskSummary
+
+
+def plain(cls):
+    names = [f.name for f in fields(cls)]
+    plain_cls = make_dataclass(f"Plain{cls.__name__}", [(f.name, f.type) for f in fields(cls)])
+
+    def from_tuple(row):
+        return plain_cls(**{name: row[i] for i, name in enumerate(names)})
+
+    return from_tuple
+
+
+def measure(build, rows: list) -> tuple:
+    started = time.perf_counter()
+    built = [build(row) for row in rows]
+    elapsed = time.perf_counter() - started
+    del built
+
+    tracemalloc.start()
+    kept = [build(row) for row in rows]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return elapsed * 1000, size / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    task_rows = [
+        ("BN", i, f"task {i}", "todo", "bench", None, 0, 0, i, i)
+        for i in range(args.rows)
+    ]
+    board_rows = [
+        (i, f"B{i}", f"board {i}", "open", 1, "bench", "owner", i, 0, 1)
+        for i in range(args.rows)
+    ]
+
+    print(f"{'class':<14}{'variant':<10}{'build ms':>10}{'MiB':>8}")
+    for cls, rows in ((TaskSummary, task_rows), (BoardSummary, board_rows)):
+        for variant, build in (("plain", plain(cls)), ("slotted", cls._from_tuple)):
+            elapsed, size = measure(build, rows)
+            print(f"{cls.__name__:<14}{variant:<10}{elapsed:>10.1f}{size:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+
+Comment search: external-content FTS5 index (term and NEAR
+queries) vs. a LIKE scan, plus the on-disk size of each search index.
+
+    python -m benchmarks.bench_search [--comments 100000] [--queries 50]
+
+The database file is built through create_app, so the schema,
+triggers and indexes are the ones the migrations produce.
+
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from src.app import create_app
+from src.search import SEARCH_INDEXES
+
+WORDS = (
+    "alpha bravo charlie delta echo foxtrot golf hotel india juliet "
+    "kilo lima mike november oscar papa quebec romeo sierra tango "
+    "uniform victor whiskey xray yankee zulu"
+).split()
+
+TASKS = 500
+
+
+def seed(db, comments: int):
+    db.execute(
+        "insert into user (username, password, is_admin, is_active, created) "
+        "values ('bench', x'00', 0, 1, 0)"
+    )
+    db.execute(
+        "insert into board (creator_id, symbol, name, created) "
+        "values (1, 'BN', 'bench', 0)"
+    )
+    db.executemany(
+        "insert into task (number, board_id, creator_id, title, body, created) "
+        "values (?, 1, 1, ?, '', 0)",
+        ((i, f"task {i}") for i in range(1, TASKS + 1)),
+    )
+    db.executemany(
+        "insert into task_comment (task_id, number, user_id, contents, created) "
+        "values (?, ?, 1, ?, 0)",
+        (
+            (i % TASKS + 1, i, " ".join(random.choices(WORDS, k=40)))
+            for i in range(comments)
+        ),
+    )
+    db.commit()
+
+
+def timed(db, sql: str, queries: int) -> float:
+    timings = list()
+    for _ in range(queries):
+        a, b = random.sample(WORDS, 2)
+        started = time.perf_counter()
+        db.execute(sql.format(a=a, b=b)).fetchall()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--comments", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(0)
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("PASSWORD_SALT", "bench")
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "bench.db")
+        app = create_app("config.py")
+
+        with app.database as db:
+            seed(db, args.comments)
+
+            print(f"{'index':<22}{'size (KiB)':>12}")
+            for index, _, _ in SEARCH_INDEXES:
+                size = db.execute(
+                    "select sum(pgsize) from dbstat where name like ?",
+                    (f"{index}%",)
+                ).fetchone()[0]
+                print(f"{index:<22}{size / 1024:>12.0f}")
+
+            fts = timed(
+                db,
+                "select rowid from task_comment_search "
+                "where task_comment_search match '{a} AND {b}'",
+                args.queries,
+            )
+            near = timed(
+                db,
+                "select rowid from task_comment_search "
+                "where task_comment_search match '{a} NEAR({b} charlie)'",
+                args.queries,
+            )
+            scan = timed(
+                db,
+                "select id from task_comment "
+                "where contents like '%{a}%' and contents like '%{b}%'",
+                args.queries,
+            )
+
+        app.database.close()
+
+    print(f"\n{'query':<22}{'median ms':>12}")
+    print(f"{'fts5 match':<22}{fts:>12.2f}")
+    print(f"{'fts5 near':<22}{near:>12.2f}")
+    print(f"{'like scan':<22}{scan:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+
+Session load + save latency: flask-session's filesystem backend
+(the previous SESSION_TYPE) vs. SqliteSessionInterface.
+
+    python -m benchmarks.bench_sessions [--requests 1000]
+
+Each simulated request opens the session from its cookie and
+saves it, either unchanged (most page views) or after writing a
+value (login, flash messages). Both stores live in a temporary
+directory; the SQLite store uses the configured pragma profile.
+flask-session is only needed for this comparison (requirements-dev.txt).
+
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import warnings
+from http.cookies import SimpleCookie
+
+from flask import Flask
+from flask_session import Session
+
+from src.app import create_app
+
+
+def filesystem_app(directory: str) -> Flask:
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY="bench",
+        SESSION_TYPE="filesystem",
+        SESSION_FILE_DIR=directory,
+        SESSION_USE_SIGNER=True,
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        Session(app)
+    return app
+
+
+def login(app: Flask) -> str:
+    interface = app.session_interface
+    with app.test_request_context():
+        session = interface.open_session(app, app.test_request_context().request)
+        session["username"] = "bench"
+        response = app.response_class()
+        interface.save_session(app, session, response)
+    cookie = SimpleCookie(response.headers["Set-Cookie"])
+    return f"{interface.get_cookie_name(app)}={cookie[interface.get_cookie_name(app)].value}"
+
+
+def timed(app: Flask, cookie: str, requests: int, modify: bool) -> float:
+    interface = app.session_interface
+    timings = list()
+    for i in range(requests):
+        with app.test_request_context(headers={"Cookie": cookie}) as context:
+            response = app.response_class()
+            started = time.perf_counter()
+            session = interface.open_session(app, context.request)
+            if modify:
+                session["counter"] = i
+            interface.save_session(app, session, response)
+            timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("PASSWORD_SALT", "bench")
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "bench.db")
+        sqlite_app = create_app("config.py")
+        fs_app = filesystem_app(os.path.join(directory, "sessions"))
+
+        print(f"{'backend':<12}{'unchanged us':>14}{'modified us':>14}")
+        for backend, app in (("filesystem", fs_app), ("sqlite", sqlite_app)):
+            cookie = login(app)
+            unchanged = timed(app, cookie, args.requests, modify=False)
+            modified = timed(app, cookie, args.requests, modify=True)
+            print(f"{backend:<12}{unchanged:>14.1f}{modified:>14.1f}")
+
+        sqlite_app.database.close()
+
+
+if __name__ == "__main__":
+    main()
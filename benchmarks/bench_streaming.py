@@ -0,0 +1,75 @@
+"""
+
+Admin user list: materialized render vs. streamed render,
+time to first byte and peak Python memory.
+
+    python -m benchmarks.bench_streaming [--users 50000]
+
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+from flask import render_template, stream_template
+
+from src.app import create_app
+from src.todo.auth.models import User
+
+
+def measure(render) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    chunks = render()
+    first = None
+    size = 0
+    for chunk in chunks:
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(chunk)
+    total = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first * 1000, total * 1000, peak / 1024 / 1024, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50_000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("PASSWORD_SALT", "bench")
+    os.environ["DATABASE_PATH"] = ":memory:"
+    app = create_app("config.py")
+
+    with app.app_context():
+        admin = User.create_admin("admin", b"admin")
+    with app.database as db:
+        db.executemany(
+            "insert into user (username, password, created) values (?, x'00', 0)",
+            ((f"user{i}",) for i in range(args.users)),
+        )
+
+    def materialized():
+        users = User.all_users_for_admin()
+        return [render_template(
+            "auth/settings.html", current_user=admin, all_users=users,
+        )]
+
+    def streamed():
+        return stream_template(
+            "auth/settings.html",
+            current_user=admin,
+            all_users=User.iter_users_for_admin(),
+        )
+
+    print(f"{'render':<14}{'first ms':>10}{'total ms':>10}{'peak MiB':>10}{'bytes':>12}")
+    for name, render in (("materialized", materialized), ("streamed", streamed)):
+        with app.test_request_context():
+            first, total, peak, size = measure(render)
+        print(f"{name:<14}{first:>10.1f}{total:>10.1f}{peak:>10.2f}{size:>12}")
+
+
+if __name__ == "__main__":
+    main()
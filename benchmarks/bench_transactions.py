@@ -0,0 +1,71 @@
+"""
+
+Write latency of a multi-step unit of work: a commit after
+every write vs. one Database.transaction() scope.
+
+    python -m benchmarks.bench_transactions [--units 500]
+
+Runs against a database file with the configured pragma profile,
+so each commit pays for its journal write and sync.
+
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from src.app import create_app
+
+STEPS = (1, 2, 4, 8, 16)
+
+
+def unit_per_step(database, steps: int):
+    for step in range(steps):
+        with database as db:
+            db.execute("insert into bench (value) values (?)", (step,))
+            db.commit()
+
+
+def unit_transaction(database, steps: int):
+    with database.transaction() as db:
+        for step in range(steps):
+            db.execute("insert into bench (value) values (?)", (step,))
+            db.commit()
+
+
+def timed(unit, database, steps: int, units: int) -> float:
+    timings = list()
+    for _ in range(units):
+        started = time.perf_counter()
+        unit(database, steps)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--units", type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("PASSWORD_SALT", "bench")
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "bench.db")
+        app = create_app("config.py")
+        database = app.database
+        with database as db:
+            db.execute("create table bench (id integer primary key, value integer)")
+
+        print(f"{'writes':>8}{'per step ms':>14}{'transaction ms':>16}{'speedup':>10}")
+        for steps in STEPS:
+            per_step = timed(unit_per_step, database, steps, args.units)
+            transaction = timed(unit_transaction, database, steps, args.units)
+            print(f"{steps:>8}{per_step:>14.3f}{transaction:>16.3f}{per_step / transaction:>9.2f}x")
+
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
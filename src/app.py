@@ -6,13 +6,20 @@
 from typing import Optional
 
 from flask import Flask
-from flask_session import Session
 from flask_wtf import CSRFProtect
 
 from src.todo.auth.auth import auth_bp
+from src.todo.auth.models import UserVersionCache
 from src.todo.board.board import board_bp
+from src.counters import check_counters_command
 from src.database import Database
+from src.exporter import export_command
+from src.fragments import FragmentCache
+from src.importer import tasks_cli
+from src.kdf import KdfPool
 from src.migrator import Migrator
+from src.search import search_cli
+from src.sessions import SqliteSessionInterface, sessions_cli
 from src.todo.navigation.navigation import navigation_bp
 from src.todo.task.task import task_bp
 
@@ -24,8 +31,11 @@ def create_app(config_filename: Optional[str]) -> Flask:
         app.config.from_pyfile(config_filename)
 
     CSRFProtect(app)
-    Session(app)
     Database(app)
+    SqliteSessionInterface(app)
+    KdfPool(app)
+    UserVersionCache(app)
+    FragmentCache(app)
 
     with app.database as conn:
         migrator = Migrator()
@@ -41,4 +51,10 @@ def create_app(config_filename: Optional[str]) -> Flask:
     app.register_blueprint(board_bp, url_prefix="/boards")
     app.register_blueprint(task_bp, url_prefix="/tasks")
 
+    app.cli.add_command(check_counters_command)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(tasks_cli)
+    app.cli.add_command(export_command)
+    app.cli.add_command(sessions_cli)
+
     return app
@@ -0,0 +1,111 @@
+"""
+
+Conditional GETs
+
+Pages that only change when their board does are sent with an
+ETag built from a cheap probe (see the board revision migration)
+and the viewer's identity. A request carrying a matching
+If-None-Match is answered with a bare 304 before anything is
+hydrated or rendered:
+
+    validator = board_validator(user, board)
+    if validator.is_fresh():
+        return validator.not_modified()
+    return validator.apply(Response(render_template(...)))
+
+The ETag covers what a page shows besides the board: who is
+looking and with which capabilities, and the CSRF token its
+forms embed. Tokens expire after WTF_CSRF_TIME_LIMIT, so the tag
+also changes every half of that, and a cached form is never
+older than half the limit. Pages are never revalidated while
+flashed messages are waiting to be shown.
+
+Last-Modified is sent for information only. A date says nothing
+about the viewer or their token, and has a one second resolution,
+so If-Modified-Since alone never yields a 304.
+
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from flask import Response, current_app, request, session
+from flask_wtf.csrf import generate_csrf
+from werkzeug.http import is_resource_modified
+
+from src.todo.auth.models import SessionUser
+from src.todo.board.models import Board
+
+CACHE_CONTROL = "private, no-cache"
+
+
+@dataclass(frozen=True, slots=True)
+class Validator:
+    etag: str
+    last_modified: Optional[datetime]
+
+    def is_fresh(self) -> bool:
+        """
+        Whether the client's copy of the page is still current
+        """
+        if "_flashes" in session:
+            return False
+        if not request.if_none_match:
+            return False
+        return not is_resource_modified(request.environ, etag=self.etag)
+
+    def apply(self, response: Response) -> Response:
+        response.set_etag(self.etag)
+        if self.last_modified is not None:
+            response.last_modified = self.last_modified
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        return response
+
+    def not_modified(self) -> Response:
+        return self.apply(Response(status=304))
+
+
+def _csrf_part() -> tuple:
+    # the raw token is kept in the session; signed copies of it
+    # are valid for WTF_CSRF_TIME_LIMIT seconds
+    generate_csrf()
+    token = session.get(current_app.config.get("WTF_CSRF_FIELD_NAME", "csrf_token"), "")
+    limit = current_app.config.get("WTF_CSRF_TIME_LIMIT", 3600)
+    bucket = int(time.time()) // max(1, int(limit) // 2) if limit else 0
+    return hashlib.sha256(token.encode()).hexdigest(), bucket
+
+
+def validator(user: SessionUser, *parts, last_modified: Optional[int] = None) -> Validator:
+    """
+    Validator for a page showing parts to user; last_modified
+    is a unix timestamp
+    """
+    key = repr((user.id, user.version, *_csrf_part(), *parts))
+    return Validator(
+        etag=hashlib.sha256(key.encode()).hexdigest()[:32],
+        last_modified=(
+            datetime.fromtimestamp(last_modified, timezone.utc)
+            if last_modified is not None else None
+        ),
+    )
+
+
+def board_validator(user: SessionUser, board: Board) -> Validator:
+    """
+    Validator for the pages of one board
+    """
+    revision, last_modified = board.revision()
+    return validator(
+        user, "board", board.id, revision, int(board.capabilities(user)),
+        last_modified=last_modified,
+    )
+
+
+def user_boards_validator(user: SessionUser) -> Validator:
+    """
+    Validator for pages drawn from every board the user has accepted
+    """
+    revisions, last_modified = Board.user_boards_revision(user)
+    return validator(user, "boards", revisions, last_modified=last_modified)
@@ -8,6 +8,25 @@ MIGRATIONS = (
     Migration("todo", "auth", "0001_permissions_seed.sql"),
     Migration("todo", "board", "0000_initial_tables.sql"),
     Migration("todo", "task", "0000_initial_tables.sql"),
+    Migration("todo", "board", "0001_indexes.sql"),
+    Migration("todo", "task", "0001_indexes.sql"),
+    Migration("todo", "board", "0002_counters.sql"),
+    Migration("todo", "task", "0002_counters.sql"),
+    Migration("todo", "task", "0003_backfill_counters.sql"),
+    Migration("todo", "task", "0004_search_comments_tags.sql"),
+    Migration("todo", "task", "0005_last_updated_indexes.sql"),
+    Migration("todo", "task", "0006_search_sync.sql"),
+    Migration("todo", "task", "0007_incremental_search.sql"),
+    Migration("todo", "auth", "0002_kdf_params.sql"),
+    Migration("todo", "auth", "0003_password_format.sql"),
+    Migration("todo", "auth", "0004_role_capabilities.sql"),
+    Migration("todo", "auth", "0005_sessions.sql"),
+    Migration("todo", "auth", "0006_user_version.sql"),
+    Migration("todo", "board", "0003_revision.sql"),
+    Migration("todo", "task", "0008_board_revision.sql"),
+    Migration("todo", "auth", "0007_rehash_keeps_version.sql"),
+    Migration("todo", "board", "0004_role_last_updated.sql"),
+    Migration("todo", "auth", "0008_password_bumps_version.sql"),
 )
 
 SECRET_KEY = environ["SECRET_KEY"]
@@ -16,11 +35,39 @@ SESSION_COOKIE_DOMAIN = environ.get("SESSION_COOKIE_DOMAIN")
 ALLOW_NEW_ACCOUNTS = strtobool(environ.get("ALLOW_NEW_ACCOUNTS", "1"))
 DATABASE_PATH = environ.get("DATABASE_PATH", "todo.db")
 DATABASE_MUTEX_TIMEOUT = int(environ.get("DATABASE_MUTEX_TIMEOUT", 30))
+DATABASE_POOL_SIZE = int(environ.get("DATABASE_POOL_SIZE", 4))
+DATABASE_POOL_TIMEOUT = int(environ.get("DATABASE_POOL_TIMEOUT", 30))
+DATABASE_JOURNAL_MODE = environ.get("DATABASE_JOURNAL_MODE", "WAL")
+DATABASE_SYNCHRONOUS = environ.get("DATABASE_SYNCHRONOUS", "NORMAL")
+DATABASE_MMAP_SIZE = int(environ.get("DATABASE_MMAP_SIZE", 268435456))
+DATABASE_CACHE_SIZE = int(environ.get("DATABASE_CACHE_SIZE", -20000))
+DATABASE_TEMP_STORE = environ.get("DATABASE_TEMP_STORE", "MEMORY")
+DATABASE_BUSY_TIMEOUT = int(environ.get("DATABASE_BUSY_TIMEOUT", 5000))
+DATABASE_FOREIGN_KEYS = environ.get("DATABASE_FOREIGN_KEYS", "ON")
+
+SEARCH_PAGE_SIZE = int(environ.get("SEARCH_PAGE_SIZE", 25))
+PAGE_SIZE = int(environ.get("PAGE_SIZE", 50))
+IMPORT_BATCH_SIZE = int(environ.get("IMPORT_BATCH_SIZE", 1000))
+# rows streamed pages read per connection checkout
+STREAM_BATCH_SIZE = int(environ.get("STREAM_BATCH_SIZE", 500))
+# largest request body accepted, i.e. the largest task import upload
+MAX_CONTENT_LENGTH = int(environ.get("MAX_CONTENT_LENGTH", 8 * 1024 * 1024))
+
+KDF_WORKERS = int(environ.get("KDF_WORKERS", 2))
+KDF_QUEUE_DEPTH = int(environ.get("KDF_QUEUE_DEPTH", 8))
+# the cost existing hashes were made with; raise only after measuring
+# with benchmarks/bench_kdf_params, users are rehashed as they sign in
+KDF_N = int(environ.get("KDF_N", 16384))
+KDF_R = int(environ.get("KDF_R", 1))
+KDF_P = int(environ.get("KDF_P", 1))
 
 SESSION_COOKIE_HTTPONLY = True
 REMEMBER_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SECURE = True
 REMEMBER_COOKIE_SECURE = True
 SESSION_COOKIE_NAME = "__todoapp"
-SESSION_TYPE = "filesystem"
-SESSION_USE_SIGNER = True
+SESSION_DATABASE_PATH = environ.get("SESSION_DATABASE_PATH")
+SESSION_PURGE_INTERVAL = int(environ.get("SESSION_PURGE_INTERVAL", 300))
+USER_VERSION_TTL = float(environ.get("USER_VERSION_TTL", 10))
+USER_VERSION_CACHE_SIZE = int(environ.get("USER_VERSION_CACHE_SIZE", 10000))
+FRAGMENT_CACHE_BYTES = int(environ.get("FRAGMENT_CACHE_BYTES", 16 * 1024 * 1024))
@@ -0,0 +1,92 @@
+"""
+
+Denormalized counters
+
+Summary pages read per-row counters maintained by triggers
+(see the *_counters.sql migrations) instead of running a
+correlated count(1) per row. `check_counters` recomputes each
+counter from its source table and reports rows that drifted;
+`flask check-counters --repair` rewrites them.
+
+"""
+from dataclasses import dataclass
+from sqlite3 import Connection
+from typing import List
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+# (table, counter column, expression computing the true value)
+COUNTERS = (
+    ("task", "tag_count",
+     "(select count(1) from task_tag where task_id = task.id)"),
+    ("task", "comment_count",
+     "(select count(1) from task_comment where task_id = task.id)"),
+    ("board", "task_count",
+     "(select count(1) from task where board_id = board.id)"),
+    ("board", "accepted_count",
+     "(select count(1) from board_user_role"
+     " where board_id = board.id and is_accepted = 1)"),
+    ("user", "task_count",
+     "(select count(1) from task where creator_id = user.id)"),
+    ("user", "board_count",
+     "(select count(1) from board where creator_id = user.id)"),
+)
+
+
+@dataclass
+class CounterMismatch:
+    table: str
+    column: str
+    row_id: int
+    stored: int
+    actual: int
+
+
+def check_counters(db: Connection) -> List[CounterMismatch]:
+    mismatches = list()
+    for table, column, actual in COUNTERS:
+        rows = db.execute(
+            f"select id, {column}, {actual} from {table} "
+            f"where {column} != {actual}"
+        ).fetchall()
+        mismatches.extend(
+            CounterMismatch(table, column, row[0], row[1], row[2])
+            for row in rows
+        )
+    return mismatches
+
+
+def repair_counters(db: Connection, mismatches: List[CounterMismatch]):
+    expressions = {(table, column): actual for table, column, actual in COUNTERS}
+    for mismatch in mismatches:
+        actual = expressions[(mismatch.table, mismatch.column)]
+        db.execute(
+            f"update {mismatch.table} set {mismatch.column} = {actual} "
+            f"where id = ?",
+            (mismatch.row_id,)
+        )
+    db.commit()
+
+
+@click.command("check-counters")
+@click.option("--repair", is_flag=True, help="Rewrite counters that drifted.")
+@with_appcontext
+def check_counters_command(repair: bool):
+    """Compare denormalized counters against their source tables."""
+    with current_app.database as db:
+        mismatches = check_counters(db)
+        for mismatch in mismatches:
+            click.echo(
+                f"{mismatch.table}.{mismatch.column} id={mismatch.row_id}: "
+                f"stored {mismatch.stored}, actual {mismatch.actual}"
+            )
+        if mismatches and repair:
+            repair_counters(db, mismatches)
+            click.echo(f"repaired {len(mismatches)} counter(s)")
+        elif not mismatches:
+            click.echo("counters are consistent")
+
+    if mismatches and not repair:
+        raise SystemExit(1)
@@ -1,31 +1,402 @@
+import pathlib
+import re
 import sqlite3
-from threading import Lock
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from queue import Empty, LifoQueue
+from typing import Iterator, Optional
 
-mutex = Lock()
+LEADING_COMMENTS = re.compile(r"^(?:\s+|--[^\n]*|/\*.*?\*/)*", re.DOTALL)
+FIRST_KEYWORD = re.compile(r"\w+")
+PRAGMA_NAME = re.compile(r"pragma\s+(?:\w+\.)?(\w+)", re.IGNORECASE)
+DML_KEYWORD = re.compile(r"\b(insert|update|delete|replace)\b", re.IGNORECASE)
+LOCKING_BEGIN = re.compile(r"^begin\s+(immediate|exclusive)\b", re.IGNORECASE)
+
+# statements that never write; anything else takes the writer lock
+READ_STATEMENTS = frozenset((
+    "select", "values", "explain", "commit", "end", "rollback", "release", "savepoint",
+))
+
+# pragmas that write without assigning a value
+WRITE_PRAGMAS = frozenset(("optimize", "wal_checkpoint", "incremental_vacuum"))
+
+PRAGMA_VALUE = re.compile(r"^-?\w+$")
+
+# config key -> pragma applied to every new connection
+PRAGMA_PROFILE = (
+    ("DATABASE_JOURNAL_MODE", "journal_mode"),
+    ("DATABASE_SYNCHRONOUS", "synchronous"),
+    ("DATABASE_MMAP_SIZE", "mmap_size"),
+    ("DATABASE_CACHE_SIZE", "cache_size"),
+    ("DATABASE_TEMP_STORE", "temp_store"),
+    ("DATABASE_BUSY_TIMEOUT", "busy_timeout"),
+    ("DATABASE_FOREIGN_KEYS", "foreign_keys"),
+)
+
+
+# pragmas from the profile that apply to a read-only connection
+READ_ONLY_PRAGMAS = ("mmap_size", "cache_size", "temp_store", "busy_timeout")
+
+# statements per connection beyond the loaded queries, for ad hoc SQL
+STATEMENT_CACHE_HEADROOM = 32
+
+_reserved_statements = 0
+
+
+def reserve_statements(count: int):
+    """
+    Grow the prepared statement cache of connections opened
+    from now on, so that count more statements stay cached.
+    """
+    global _reserved_statements
+    _reserved_statements += count
+
+
+def statement_cache_size() -> int:
+    return max(128, _reserved_statements + STATEMENT_CACHE_HEADROOM)
+
+
+@lru_cache(maxsize=512)
+def is_write(sql: str) -> bool:
+    """
+    Whether sql may write, and so must hold the writer lock.
+    Statements not known to be reads are taken as writes;
+    a with clause counts as a write if it has any DML in it.
+    """
+    sql = LEADING_COMMENTS.sub("", sql, count=1)
+    match = FIRST_KEYWORD.match(sql)
+    if match is None:
+        return False
+
+    keyword = match.group().lower()
+    if keyword == "begin":
+        return bool(LOCKING_BEGIN.match(sql))
+    if keyword == "with":
+        return bool(DML_KEYWORD.search(sql))
+    if keyword == "pragma":
+        name = PRAGMA_NAME.match(sql)
+        return "=" in sql or (name is not None and name.group(1).lower() in WRITE_PRAGMAS)
+    return keyword not in READ_STATEMENTS
+
+
+class PoolTimeout(Exception):
+    """
+    Raised when a connection or the writer lock
+    could not be acquired before the configured timeout.
+    """
+
+
+@dataclass
+class PoolStats:
+    size: int
+    in_use: int = 0
+    checkouts: int = 0
+    checkout_timeouts: int = 0
+    checkout_wait_total: float = 0.0
+    checkout_wait_max: float = 0.0
+
+
+class PooledCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        if is_write(sql):
+            self.connection.acquire_writer()
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if is_write(sql):
+            self.connection.acquire_writer()
+        return super().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        self.connection.acquire_writer()
+        return super().executescript(sql_script)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Connection handed out by the pool.
+    The first statement of a transaction that may write (see
+    is_write) takes the database writer lock, which is held
+    until the transaction is committed or rolled back;
+    Database.transaction() takes it as the transaction begins.
+
+    Inside Database.transaction() commit() is a no-op;
+    the outermost scope commits instead.
+    """
+    database = None
+    holds_writer = False
+    transaction_depth = 0
+
+    def cursor(self, factory=PooledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def acquire_writer(self):
+        if self.holds_writer:
+            return
+        self.database.acquire_writer()
+        self.holds_writer = True
+
+    def release_writer(self):
+        if not self.holds_writer:
+            return
+        self.holds_writer = False
+        self.database.release_writer()
+
+    def commit(self):
+        if self.transaction_depth:
+            return
+        try:
+            super().commit()
+        finally:
+            self.release_writer()
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self.release_writer()
 
 
 class Database:
-    def __init__(self, app):
+    """
+    Bounded pool of sqlite3 connections.
+
+    `with app.database as db` checks out a connection for the
+    current thread; nested blocks on the same thread share it.
+    The outermost block commits on success and rolls back on error
+    before returning the connection to the pool.
+    """
+
+    def __init__(self, app, path: Optional[str] = None):
         self.app = app
         self.path = None
         self.timeout = None
 
-        self.path = self.app.config["DATABASE_PATH"]
+        self.path = path or self.app.config["DATABASE_PATH"]
         self.timeout = int(self.app.config.get("DATABASE_MUTEX_TIMEOUT", 30))
-        self.connection = sqlite3.Connection(
-            self.path,
-            check_same_thread=False,
-        )
+        self.pool_timeout = float(self.app.config.get("DATABASE_POOL_TIMEOUT", self.timeout))
+
+        pool_size = int(self.app.config.get("DATABASE_POOL_SIZE", 4))
+        if self.is_memory:
+            # every connection to :memory: is a separate database
+            pool_size = 1
+
+        self.pragmas = self._pragma_profile(self.app.config)
+        self.pool_size = max(1, pool_size)
+        self._idle = LifoQueue(maxsize=self.pool_size)
+        self._created = 0
+        self._pool_lock = threading.Lock()
+        self._writer_lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = PoolStats(size=self.pool_size)
 
         if not hasattr(self.app, "database"):
             setattr(self.app, "database", self)
 
-    def __enter__(self):
-        mutex.acquire(
-            blocking=True,
+    @property
+    def is_memory(self) -> bool:
+        return self.path == ":memory:" or "mode=memory" in self.path
+
+    @staticmethod
+    def _pragma_profile(config) -> dict:
+        pragmas = dict()
+        for key, pragma in PRAGMA_PROFILE:
+            value = config.get(key)
+            if value is None or value == "":
+                continue
+            if not PRAGMA_VALUE.match(str(value)):
+                raise ValueError(f"invalid value for {key}: {value!r}")
+            pragmas[pragma] = value
+        return pragmas
+
+    def connect(self) -> PooledConnection:
+        connection = sqlite3.connect(
+            self.path,
             timeout=self.timeout,
+            check_same_thread=False,
+            factory=PooledConnection,
+            cached_statements=statement_cache_size(),
+            uri=self.path.startswith("file:"),
         )
-        return self.connection
+        connection.database = self
+        # connection settings, not writes to serialize with others
+        cursor = connection.cursor(sqlite3.Cursor)
+        for pragma, value in self.pragmas.items():
+            cursor.execute(f"pragma {pragma} = {value}")
+        return connection
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """
+        Read-only connection outside the pool, held to a single
+        snapshot of the database until the block exits. In WAL
+        mode writers carry on meanwhile; only checkpoints wait
+        for the snapshot to be released.
+
+        An in-memory database cannot be opened a second time,
+        so its snapshot is a pooled connection instead.
+        """
+        if self.is_memory:
+            with self as connection:
+                yield connection
+            return
+
+        if self.path.startswith("file:"):
+            uri = self.path + ("&" if "?" in self.path else "?") + "mode=ro"
+        else:
+            uri = pathlib.Path(self.path).resolve().as_uri() + "?mode=ro"
+
+        connection = sqlite3.connect(uri, uri=True, timeout=self.timeout, check_same_thread=False)
+        try:
+            for pragma in READ_ONLY_PRAGMAS:
+                if pragma in self.pragmas:
+                    connection.execute(f"pragma {pragma} = {self.pragmas[pragma]}")
+            connection.execute("begin")
+            # the first read fixes the snapshot
+            connection.execute("select count(1) from sqlite_master").fetchone()
+            yield connection
+        finally:
+            connection.rollback()
+            connection.close()
+
+    def checkout(self) -> PooledConnection:
+        started = time.monotonic()
+        try:
+            connection = self._idle.get_nowait()
+        except Empty:
+            connection = None
+
+        if connection is None:
+            with self._pool_lock:
+                if self._created < self.pool_size:
+                    self._created += 1
+                    connection = self.connect()
+
+        if connection is None:
+            try:
+                connection = self._idle.get(timeout=self.pool_timeout)
+            except Empty:
+                self._record_checkout(started, timed_out=True)
+                raise PoolTimeout(
+                    f"no database connection available after {self.pool_timeout}s"
+                )
+
+        self._record_checkout(started)
+        return connection
+
+    def _record_checkout(self, started: float, timed_out: bool = False):
+        waited = time.monotonic() - started
+        with self._pool_lock:
+            if timed_out:
+                self._stats.checkout_timeouts += 1
+            else:
+                self._stats.in_use += 1
+                self._stats.checkouts += 1
+            self._stats.checkout_wait_total += waited
+            self._stats.checkout_wait_max = max(self._stats.checkout_wait_max, waited)
+
+    def checkin(self, connection: PooledConnection, failed: bool = False):
+        try:
+            if connection.in_transaction:
+                if failed:
+                    connection.rollback()
+                else:
+                    connection.commit()
+        finally:
+            connection.release_writer()
+            with self._pool_lock:
+                self._stats.in_use -= 1
+            self._idle.put_nowait(connection)
+
+    @contextmanager
+    def transaction(self) -> Iterator[PooledConnection]:
+        """
+        Unit of work spanning several model calls.
+
+            with app.database.transaction() as db:
+                ...
+
+        The outermost scope commits once on success and rolls back
+        on error; commits issued inside it are deferred to its end.
+        Nested scopes run in savepoints, so an inner scope that
+        fails is undone without aborting the enclosing one.
+
+        The writer lock is taken as the outermost scope begins,
+        with begin immediate: in WAL mode a deferred transaction
+        that reads and then writes fails with SQLITE_BUSY_SNAPSHOT
+        if another connection wrote in between, instead of
+        waiting out busy_timeout.
+        """
+        with self as connection:
+            depth = connection.transaction_depth
+            savepoint = f"unit_of_work_{depth}"
+            if depth:
+                connection.execute(f"savepoint {savepoint}")
+            elif not connection.in_transaction:
+                connection.execute("begin immediate")
+            else:
+                connection.acquire_writer()
+
+            connection.transaction_depth = depth + 1
+            try:
+                yield connection
+            except BaseException:
+                connection.transaction_depth = depth
+                if depth:
+                    connection.execute(f"rollback to {savepoint}")
+                    connection.execute(f"release {savepoint}")
+                else:
+                    connection.rollback()
+                raise
+
+            connection.transaction_depth = depth
+            if depth:
+                connection.execute(f"release {savepoint}")
+            else:
+                connection.commit()
+
+    def acquire_writer(self):
+        if not self._writer_lock.acquire(blocking=True, timeout=self.timeout):
+            raise PoolTimeout(f"database writer busy for more than {self.timeout}s")
+
+    def release_writer(self):
+        self._writer_lock.release()
+
+    def stats(self) -> PoolStats:
+        with self._pool_lock:
+            return replace(self._stats)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                break
+
+    def __enter__(self) -> PooledConnection:
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            self._local.connection = self.checkout()
+        self._local.depth = depth + 1
+        return self._local.connection
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        mutex.release()
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+
+        connection = self._local.connection
+        self._local.connection = None
+        self.checkin(connection, failed=exc_type is not None)
@@ -0,0 +1,168 @@
+"""
+
+Board export
+
+Streams one board, or every board a user has accepted a role
+on, as JSON Lines or CSV: a record per board, task, comment and
+event, in that order for each board. Everything is read from a
+Database.snapshot(), so the export is consistent, never takes
+the writer lock, and writers are not held up while it streams.
+Rows are read from the cursors as the output is consumed and
+written out in chunks, so memory stays flat however large the
+boards are.
+
+    flask export --board alice/TODO > todo.jsonl
+    flask export --user alice --format csv -o alice.csv
+
+"""
+import csv
+import io
+import json
+from typing import Iterable, Iterator, Optional, TextIO
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from src.database import Database
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+from src.todo.board.models import queries as board_queries
+from src.todo.task.models import queries as task_queries
+
+FORMATS = ("jsonl", "csv")
+
+MIMETYPES = {
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# every field of every record type; CSV rows leave the others empty
+CSV_COLUMNS = (
+    "type", "board", "task", "number", "name", "title", "body", "status",
+    "creator", "assignee", "user", "tags", "contents", "description",
+    "change_field", "change_old", "change_new", "created", "modified",
+)
+
+# bytes of output gathered before a chunk is handed on
+CHUNK_SIZE = 64 * 1024
+
+
+def _board_records(db, board: tuple) -> Iterator[dict]:
+    board_id, creator, symbol, name, status, created, modified = board
+    path = f"{creator}/{symbol}"
+
+    yield dict(
+        type="board", board=path, name=name, status=status,
+        created=created, modified=modified,
+    )
+
+    for number, title, body, status, creator, assignee, tags, created, modified \
+            in task_queries.export_tasks_by_board.iter(db, board_id=board_id):
+        yield dict(
+            type="task", board=path, number=number, title=title, body=body,
+            status=status, creator=creator, assignee=assignee,
+            tags=json.loads(tags), created=created, modified=modified,
+        )
+
+    for task, number, user, contents, created, modified \
+            in task_queries.export_comments_by_board.iter(db, board_id=board_id):
+        yield dict(
+            type="comment", board=path, task=task, number=number, user=user,
+            contents=contents, created=created, modified=modified,
+        )
+
+    for task, user, description, change_field, change_old, change_new, created \
+            in task_queries.export_events_by_board.iter(db, board_id=board_id):
+        yield dict(
+            type="event", board=path, task=task, user=user, description=description,
+            change_field=change_field, change_old=change_old, change_new=change_new,
+            created=created,
+        )
+
+
+def export_records(
+        database: Database,
+        board_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+) -> Iterator[dict]:
+    """
+    Records of one board, or of every board the user can view.
+    The snapshot stays open until the iterator is exhausted or closed.
+    """
+    with database.snapshot() as db:
+        if board_id is not None:
+            boards = board_queries.export_board.many(db, board_id=board_id)
+        else:
+            boards = board_queries.export_boards_by_user.iter(db, user_id=user_id)
+
+        for board in boards:
+            yield from _board_records(db, board)
+
+
+def _jsonl_lines(records: Iterable[dict]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def _csv_lines(records: Iterable[dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, CSV_COLUMNS)
+    writer.writeheader()
+    for record in records:
+        if "tags" in record:
+            record["tags"] = "\n".join(record["tags"])
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def serialize(records: Iterable[dict], fmt: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Encode records as JSON Lines or CSV, in chunks of about chunk_size
+    """
+    if fmt == "jsonl":
+        lines = _jsonl_lines(records)
+    elif fmt == "csv":
+        lines = _csv_lines(records)
+    else:
+        raise ValueError(f"unknown export format: {fmt}")
+
+    chunk, size = list(), 0
+    for line in lines:
+        chunk.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(chunk)
+            chunk, size = list(), 0
+    if chunk:
+        yield "".join(chunk)
+
+
+@click.command("export")
+@click.option("--board", "board_path", help="board to export, as creator/SYMBOL")
+@click.option("--user", "username", help="export every board this user can view")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default="jsonl", show_default=True)
+@click.option("-o", "--output", type=click.File("w", encoding="utf-8"), default="-", help="defaults to stdout")
+@with_appcontext
+def export_command(board_path: Optional[str], username: Optional[str], fmt: str, output: TextIO):
+    """Export boards with their tasks, comments, tags and events."""
+    if bool(board_path) == bool(username):
+        raise click.UsageError("pass exactly one of --board and --user")
+
+    if board_path:
+        creator_name, _, symbol = board_path.partition("/")
+        creator = User.select_by_username(creator_name)
+        board = Board.select_by_creator_symbol(creator.id, symbol) if creator else None
+        if not board:
+            raise click.BadParameter(f"board not found: {board_path}", param_hint="--board")
+        records = export_records(current_app.database, board_id=board.id)
+    else:
+        user = User.select_by_username(username)
+        if not user:
+            raise click.BadParameter(f"user not found: {username}", param_hint="--user")
+        records = export_records(current_app.database, user_id=user.id)
+
+    for chunk in serialize(records, fmt):
+        output.write(chunk)
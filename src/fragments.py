@@ -0,0 +1,125 @@
+"""
+
+Rendered fragment cache
+
+List pages render one row template per task or board. Rows
+rendered through `fragment` are kept, keyed by the template, the
+entity's id and last_updated, and the rest of the entity's
+fields, so a row is rendered again as soon as anything it shows
+changes, even within the same second. Entries are evicted least
+recently used first once the cached text exceeds
+FRAGMENT_CACHE_BYTES; 0 turns the cache off. The cache is per
+process and holds text only, no request state.
+
+    {{ fragment("task/task_item.html", task=task_summary) }}
+
+Row templates rendered this way see the including template's
+context plus the keyword arguments, as with a `with` block
+around an include, but must only depend on the entity they are
+keyed by.
+
+"""
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields, replace
+from operator import attrgetter
+from typing import Callable, Dict, Hashable
+
+from flask import current_app
+from jinja2 import pass_context
+from jinja2.runtime import Context
+from markupsafe import Markup
+
+
+@dataclass
+class FragmentStats:
+    budget: int
+    size: int = 0
+    entries: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+# field getter per entity dataclass
+_getters: Dict[type, Callable] = dict()
+
+
+def _entity_key(entity) -> Hashable:
+    getter = _getters.get(type(entity))
+    if getter is None:
+        getter = _getters[type(entity)] = attrgetter(*(f.name for f in fields(entity)))
+    return entity.id, entity.last_updated, getter(entity)
+
+
+class FragmentCache:
+    """
+    LRU cache of rendered row fragments within a memory budget
+    """
+
+    def __init__(self, app):
+        self.budget = max(0, int(app.config.get("FRAGMENT_CACHE_BYTES", 16 * 1024 * 1024)))
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = FragmentStats(budget=self.budget)
+
+        app.add_template_global(fragment)
+
+        if not hasattr(app, "fragments"):
+            setattr(app, "fragments", self)
+
+    def get(self, key: Hashable, render: Callable[[], str]) -> Markup:
+        if not self.budget:
+            return Markup(render())
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return cached
+            self._stats.misses += 1
+
+        rendered = Markup(render())
+        size = sys.getsizeof(rendered)
+        if size > self.budget:
+            return rendered
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._stats.size -= sys.getsizeof(previous)
+            self._entries[key] = rendered
+            self._stats.size += size
+
+            while self._stats.size > self.budget:
+                _, evicted = self._entries.popitem(last=False)
+                self._stats.size -= sys.getsizeof(evicted)
+                self._stats.evictions += 1
+            self._stats.entries = len(self._entries)
+        return rendered
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.size = self._stats.entries = 0
+
+    def stats(self) -> FragmentStats:
+        with self._lock:
+            return replace(self._stats)
+
+
+@pass_context
+def fragment(context: Context, name: str, **variables) -> Markup:
+    """
+    Render the template name with variables, or reuse the copy
+    rendered for the same entities
+    """
+    template = context.environment.get_template(name, parent=context.name)
+
+    def render() -> str:
+        return template.render({**context.get_all(), **variables})
+
+    key = (name, *((k, _entity_key(v)) for k, v in sorted(variables.items())))
+    return current_app.fragments.get(key, render)
@@ -0,0 +1,67 @@
+"""
+
+Request-scoped identity map
+
+Rows loaded by primary key (or by a natural key that resolves
+to one) are kept on flask.g for the rest of the request, so each
+row hits SQLite at most once. Model methods that write a row
+must invalidate it.
+
+"""
+from typing import Hashable, Optional
+
+from flask import g, has_app_context
+
+
+class IdentityMap:
+    def __init__(self):
+        self.rows = dict()
+        self.aliases = dict()
+        self.aliases_by_row = dict()
+
+    def get(self, table: str, key: Hashable) -> Optional[tuple]:
+        pk = self.aliases.get((table, key), key)
+        return self.rows.get((table, pk))
+
+    def add(self, table: str, pk: Hashable, row: tuple, *aliases: Hashable):
+        self.rows[(table, pk)] = row
+        for alias in aliases:
+            self.aliases[(table, alias)] = pk
+            self.aliases_by_row.setdefault((table, pk), set()).add(alias)
+
+    def invalidate(self, table: str, pk: Hashable = None):
+        if pk is None:
+            for key in [k for k in self.rows if k[0] == table]:
+                self.invalidate(table, key[1])
+            return
+
+        self.rows.pop((table, pk), None)
+        for alias in self.aliases_by_row.pop((table, pk), set()):
+            self.aliases.pop((table, alias), None)
+
+
+def current_identity_map() -> Optional[IdentityMap]:
+    if not has_app_context():
+        return None
+    if "identity_map" not in g:
+        g.identity_map = IdentityMap()
+    return g.identity_map
+
+
+def get(table: str, key: Hashable) -> Optional[tuple]:
+    identity_map = current_identity_map()
+    if identity_map is None:
+        return None
+    return identity_map.get(table, key)
+
+
+def add(table: str, pk: Hashable, row: tuple, *aliases: Hashable):
+    identity_map = current_identity_map()
+    if identity_map is not None:
+        identity_map.add(table, pk, row, *aliases)
+
+
+def invalidate(table: str, pk: Hashable = None):
+    identity_map = current_identity_map()
+    if identity_map is not None:
+        identity_map.invalidate(table, pk)
@@ -0,0 +1,316 @@
+"""
+
+Bulk task import
+
+Tasks, with their tags, comments and status, are read from CSV
+or JSON Lines and added to one board in batched transactions.
+Within a batch, task numbers are reserved with a single update
+of the board's sequence and rows are inserted with executemany.
+The search triggers index each batch within its transaction.
+
+    flask tasks import --board alice/TODO backlog.jsonl
+
+The import command instead suspends search indexing for the
+whole database and rebuilds the indexes once at the end, which
+is faster for very large files. Search misses every change made
+meanwhile, and an import that dies leaves indexing off until
+`flask search rebuild --resume`, so it is for operators only;
+uploads never suspend indexing.
+
+JSON Lines, one task per line:
+
+    {"title": "...", "body": "...", "status": "todo", "assignee": "bob",
+     "tags": ["infra"], "comments": ["first comment"]}
+
+CSV with a header row naming the same columns; the tags and
+comments cells hold one value per line. Only title is required.
+Records that cannot be imported are skipped and reported.
+
+"""
+import csv
+import io
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, TextIO, Tuple, Union
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from src import identity_map
+from src.search import suspended_search_indexing
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+from src.todo.task.models import TASK_STATUSES, queries
+
+FORMATS = ("csv", "jsonl")
+
+EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+MIMETYPES = {
+    "text/csv": "csv",
+    "application/jsonl": "jsonl",
+    "application/x-ndjson": "jsonl",
+}
+
+# errors kept on the result; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+class TaskImportError(ValueError):
+    """
+    Raised for a record that cannot be imported.
+    """
+
+
+@dataclass(slots=True)
+class ImportedTask:
+    title: str
+    body: str = ""
+    status: str = TASK_STATUSES[0]
+    assignee: Optional[str] = None
+    tags: Tuple[str, ...] = ()
+    comments: Tuple[str, ...] = ()
+
+    @property
+    def statuses(self) -> Tuple[str, ...]:
+        if self.status in TASK_STATUSES:
+            return TASK_STATUSES
+        return TASK_STATUSES + (self.status,)
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    skipped: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def skip(self, line: int, error: Exception):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line}: {error}")
+
+
+def format_for(filename: Optional[str] = None, mimetype: Optional[str] = None) -> Optional[str]:
+    if filename:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension in EXTENSIONS:
+            return EXTENSIONS[extension]
+    return MIMETYPES.get(mimetype)
+
+
+def _text(record: dict, key: str, default: Optional[str] = None) -> Optional[str]:
+    value = record.get(key)
+    if value is None or value == "":
+        return default
+    if not isinstance(value, str):
+        raise TaskImportError(f"{key} must be a string")
+    return value
+
+
+def _values(record: dict, key: str) -> Tuple[str, ...]:
+    value = record.get(key)
+    if not value:
+        return ()
+    if isinstance(value, str):
+        value = value.splitlines()
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise TaskImportError(f"{key} must be a list of strings")
+    return tuple(v.strip() for v in value if v.strip())
+
+
+def parse_record(record: Union[str, dict]) -> ImportedTask:
+    """
+    Build an ImportedTask from a CSV row or a JSON Lines line
+    """
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except json.JSONDecodeError as error:
+            raise TaskImportError(f"invalid JSON: {error.msg}")
+        if not isinstance(record, dict):
+            raise TaskImportError("expected a JSON object")
+
+    title = _text(record, "title", "").strip()
+    if not title:
+        raise TaskImportError("title is required")
+
+    return ImportedTask(
+        title=title,
+        body=_text(record, "body", ""),
+        status=_text(record, "status", TASK_STATUSES[0]).strip(),
+        assignee=_text(record, "assignee"),
+        tags=_values(record, "tags"),
+        comments=_values(record, "comments"),
+    )
+
+
+def read_tasks(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Union[ImportedTask, TaskImportError]]]:
+    """
+    Yield (line number, ImportedTask) for each record read from
+    the stream, or (line number, TaskImportError) for a record
+    that cannot be imported.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        records = ((reader.line_num, row) for row in reader)
+    elif fmt == "jsonl":
+        records = ((line, text) for line, text in enumerate(stream, 1) if text.strip())
+    else:
+        raise ValueError(f"unknown import format: {fmt}")
+
+    for line, record in records:
+        try:
+            yield line, parse_record(record)
+        except TaskImportError as error:
+            yield line, error
+
+
+def _insert_batch(board_id: int, user_id: int, batch: List[Tuple[ImportedTask, Optional[int]]]):
+    created = int(time.time())
+    with current_app.database.transaction() as db:
+        last = queries.reserve_task_numbers.one(db, board_id=board_id, count=len(batch))[0]
+        first = last - len(batch) + 1
+
+        queries.create_new_task.executemany(db, (
+            (first + i, board_id, user_id, assignee_id, task.title, task.body, created)
+            for i, (task, assignee_id) in enumerate(batch)
+        ))
+        rows = queries.select_task_ids_by_number_range(db, board_id=board_id, first=first, last=last)
+        tasks = [(row[0], task) for row, (task, _) in zip(rows, batch)]
+
+        queries.create_task_status.executemany(db, (
+            dict(task_id=task_id, name=name)
+            for task_id, task in tasks for name in task.statuses
+        ))
+        queries.set_task_status_by_name.executemany(db, (
+            dict(task_id=task_id, name=task.status) for task_id, task in tasks
+        ))
+        queries.set_task_tag.executemany(db, (
+            dict(task_id=task_id, value=value)
+            for task_id, task in tasks for value in task.tags
+        ))
+        queries.create_task_comment.executemany(db, (
+            (task_id, number, user_id, contents, created)
+            for task_id, task in tasks for number, contents in enumerate(task.comments, 1)
+        ))
+        queries.set_comment_number_sequence.executemany(db, (
+            dict(task_id=task_id, number=len(task.comments))
+            for task_id, task in tasks if task.comments
+        ))
+
+        rows = queries.select_task_ids_by_number_range(db, board_id=board_id, first=first, last=last)
+        status_ids = dict(rows)
+        queries.create_task_event.executemany(db, (
+            event
+            for task_id, task in tasks
+            for event in (
+                (task_id, user_id, created, "created task", None, None, None),
+                (task_id, user_id, created, "update", "status", status_ids[task_id], None),
+                *(
+                    (task_id, user_id, created, "new", "comment", "", contents)
+                    for contents in task.comments
+                ),
+            )
+        ))
+
+
+def import_tasks(
+        board: Board,
+        user: User,
+        stream: TextIO,
+        fmt: str,
+        batch_size: Optional[int] = None,
+        suspend_search: bool = False,
+) -> ImportResult:
+    """
+    Add every task read from the stream to the board, created by user.
+    With suspend_search, search indexing is switched off for the
+    whole import and every index rebuilt when it finishes.
+    """
+    if batch_size is None:
+        batch_size = int(current_app.config.get("IMPORT_BATCH_SIZE", 1000))
+
+    result = ImportResult()
+    if suspend_search:
+        with suspended_search_indexing(current_app.database):
+            _import(board, user, read_tasks(stream, fmt), batch_size, result)
+    else:
+        _import(board, user, read_tasks(stream, fmt), batch_size, result)
+
+    identity_map.invalidate("board", board.id)
+    return result
+
+
+def _import(board: Board, user: User, tasks: Iterator, batch_size: int, result: ImportResult):
+    assignees = dict()
+    batch = list()
+
+    for line, task in tasks:
+        if isinstance(task, ImportedTask) and task.assignee:
+            if task.assignee not in assignees:
+                assignee = User.select_by_username(task.assignee)
+                assignees[task.assignee] = assignee.id if assignee else None
+            if assignees[task.assignee] is None:
+                task = TaskImportError(f"unknown assignee: {task.assignee}")
+
+        if isinstance(task, TaskImportError):
+            result.skip(line, task)
+            continue
+
+        batch.append((task, assignees.get(task.assignee)))
+        if len(batch) >= batch_size:
+            _insert_batch(board.id, user.id, batch)
+            result.imported += len(batch)
+            batch = list()
+
+    if batch:
+        _insert_batch(board.id, user.id, batch)
+        result.imported += len(batch)
+
+
+@click.group("tasks")
+def tasks_cli():
+    """Manage tasks in bulk."""
+
+
+@tasks_cli.command("import")
+@click.option("--board", "board_path", required=True, help="target board, as creator/SYMBOL")
+@click.option("--user", "username", help="user the tasks are created by; defaults to the board creator")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="defaults to the file extension")
+@click.option("--batch-size", type=int, help="tasks per transaction")
+@click.argument("source", type=click.File("r", encoding="utf-8", lazy=False))
+@with_appcontext
+def import_command(board_path: str, username: Optional[str], fmt: Optional[str], batch_size: Optional[int], source: TextIO):
+    """Import tasks from a CSV or JSON Lines file ('-' for stdin)."""
+    fmt = fmt or format_for(source.name)
+    if not fmt:
+        raise click.UsageError("cannot tell the format from the file name; pass --format")
+
+    creator_name, _, symbol = board_path.partition("/")
+    creator = User.select_by_username(creator_name)
+    board = Board.select_by_creator_symbol(creator.id, symbol) if creator else None
+    if not board:
+        raise click.BadParameter(f"board not found: {board_path}", param_hint="--board")
+
+    user = User.select_by_username(username) if username else creator
+    if not user:
+        raise click.BadParameter(f"user not found: {username}", param_hint="--user")
+
+    if fmt == "csv" and isinstance(source, io.TextIOWrapper):
+        # quoted cells may span lines
+        source.reconfigure(newline="")
+
+    started = time.monotonic()
+    result = import_tasks(board, user, source, fmt, batch_size, suspend_search=True)
+
+    click.echo(
+        f"imported {result.imported} tasks into {board_path} "
+        f"in {time.monotonic() - started:.2f}s"
+    )
+    if result.skipped:
+        for error in result.errors:
+            click.echo(error, err=True)
+        click.echo(f"skipped {result.skipped} records", err=True)
+        raise SystemExit(1)
@@ -0,0 +1,97 @@
+"""
+
+Password hashing pool
+
+scrypt is deliberately slow and memory hungry, so it runs on a
+small pool of threads (hashlib releases the GIL while it works)
+instead of on however many request threads are logging in at
+once. KDF_WORKERS hashes run at a time and up to KDF_QUEUE_DEPTH
+more may wait; beyond that `run` raises KdfBusy immediately and
+the request is answered with a 429 instead of queueing behind
+the burst. Limits and stats are per process.
+
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class KdfBusy(Exception):
+    """
+    Raised when every worker is busy and the queue is full.
+    """
+
+
+@dataclass
+class KdfStats:
+    workers: int
+    queue_depth: int
+    in_flight: int = 0
+    completed: int = 0
+    rejected: int = 0
+    queue_wait_total: float = 0.0
+    queue_wait_max: float = 0.0
+    hash_total: float = 0.0
+    hash_max: float = 0.0
+
+
+class KdfPool:
+    """
+    Bounded executor for key derivation.
+    `run` blocks the calling thread until its job has finished.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.workers = max(1, int(app.config.get("KDF_WORKERS", 2)))
+        self.queue_depth = max(0, int(app.config.get("KDF_QUEUE_DEPTH", 8)))
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="kdf")
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_depth)
+        self._lock = threading.Lock()
+        self._stats = KdfStats(workers=self.workers, queue_depth=self.queue_depth)
+
+        if not hasattr(self.app, "kdf"):
+            setattr(self.app, "kdf", self)
+
+    def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats.rejected += 1
+            raise KdfBusy(
+                f"{self.workers} password hashes running and {self.queue_depth} queued"
+            )
+
+        with self._lock:
+            self._stats.in_flight += 1
+        try:
+            return self._executor.submit(self._timed, time.monotonic(), fn, *args, **kwargs).result()
+        finally:
+            with self._lock:
+                self._stats.in_flight -= 1
+            self._slots.release()
+
+    def _timed(self, submitted: float, fn: Callable[..., T], *args, **kwargs) -> T:
+        started = time.monotonic()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            finished = time.monotonic()
+            waited, hashed = started - submitted, finished - started
+            with self._lock:
+                self._stats.completed += 1
+                self._stats.queue_wait_total += waited
+                self._stats.queue_wait_max = max(self._stats.queue_wait_max, waited)
+                self._stats.hash_total += hashed
+                self._stats.hash_max = max(self._stats.hash_max, hashed)
+
+    def stats(self) -> KdfStats:
+        with self._lock:
+            return replace(self._stats)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -3,7 +3,7 @@ import pathlib
 from dataclasses import dataclass
 from sqlite3 import Connection
 
-import anosql
+from src.queries import parse_queries
 
 
 @dataclass
@@ -48,11 +48,11 @@ class Migrator:
             if self._migration_is_applied(db, migration):
                 continue
 
-            queries = anosql.from_path(migration.path, "sqlite3")
+            with open(migration.path) as fp:
+                queries = parse_queries(fp.read())
 
-            for query in queries.available_queries:
-                migrate = getattr(queries, query)
-                migrate(db)
+            for query in queries:
+                query.execute(db)
                 db.commit()
 
             cursor = db.cursor()
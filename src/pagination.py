@@ -0,0 +1,100 @@
+"""
+
+Keyset pagination
+
+List pages are keyed on (last_updated, id) of their edge rows
+instead of an offset, so the backing queries seek straight to
+the cursor. Cursors are signed, URL-safe tokens; anything that
+fails to verify is treated as the first page.
+
+"""
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+
+NEXT = "next"
+PREV = "prev"
+
+# keys sorting before / after every row
+FIRST_ASCENDING = (-1, -1)
+FIRST_DESCENDING = (2 ** 62, 2 ** 62)
+
+Key = Tuple[int, int]
+
+
+@dataclass
+class Page:
+    items: List = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+
+def _serializer() -> URLSafeSerializer:
+    return URLSafeSerializer(current_app.secret_key, salt="page-cursor")
+
+
+def encode_cursor(direction: str, key: Key) -> str:
+    return _serializer().dumps([direction, list(key)])
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, Key]]:
+    if not cursor:
+        return None
+    try:
+        direction, key = _serializer().loads(cursor)
+        last_updated, row_id = key
+    except (BadSignature, TypeError, ValueError):
+        return None
+    if direction not in (NEXT, PREV):
+        return None
+    return direction, (int(last_updated), int(row_id))
+
+
+def paginate(
+        next_page: Callable[[Key, int], List],
+        prev_page: Callable[[Key, int], List],
+        key: Callable[[object], Key],
+        first: Key,
+        cursor: Optional[str] = None,
+        page_size: Optional[int] = None,
+) -> Page:
+    """
+    next_page(key, limit) returns up to limit rows after key in list order;
+    prev_page(key, limit) returns up to limit rows before key, nearest first.
+    """
+    if page_size is None:
+        page_size = int(current_app.config.get("PAGE_SIZE", 50))
+
+    decoded = decode_cursor(cursor)
+    direction, position = decoded or (NEXT, first)
+
+    if direction == NEXT:
+        items = next_page(position, page_size + 1)
+        has_next = len(items) > page_size
+        has_prev = decoded is not None
+        items = items[:page_size]
+    else:
+        items = prev_page(position, page_size + 1)
+        has_prev = len(items) > page_size
+        has_next = True
+        items = list(reversed(items[:page_size]))
+
+    if not items:
+        return Page()
+
+    return Page(
+        items=items,
+        next_cursor=encode_cursor(NEXT, key(items[-1])) if has_next else None,
+        prev_cursor=encode_cursor(PREV, key(items[0])) if has_prev else None,
+    )
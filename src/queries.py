@@ -0,0 +1,123 @@
+"""
+
+Precompiled queries
+
+Parses the `-- name:` blocks of a .sql file once, at import time,
+into Query objects. A Query always executes the same SQL string,
+so after the first call sqlite3 serves it from the connection's
+prepared statement cache, which is sized to hold every loaded
+query. Whether a query writes is decided once, when it is loaded,
+instead of on every execution.
+
+    queries = load_queries(path)
+    row = queries.select_user_by_id.one(db, user_id=1)
+    rows = queries.select_board_statuses.many(db, board_id)
+    for row in queries.select_users_for_admin_page.iter(db, after=0, limit=50): ...
+    queries.create_task_status.executemany(db, [{"task_id": 1, "name": "todo"}])
+
+Calling a query directly is the same as `many`.
+
+"""
+import re
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from src.database import PooledConnection, is_write, reserve_statements
+
+NAME = re.compile(r"^--\s*name\s*:\s*", re.MULTILINE)
+COMMENT = re.compile(r"^\s*--\s*(.*)$")
+
+
+class Query:
+    __slots__ = ("name", "sql", "doc", "writes")
+
+    def __init__(self, name: str, sql: str, doc: str = ""):
+        self.name = name
+        self.sql = sql
+        self.doc = doc
+        self.writes = is_write(sql)
+
+    def __repr__(self):
+        return f"Query({self.name!r})"
+
+    def execute(self, db: PooledConnection, *args, **kwargs) -> sqlite3.Cursor:
+        if self.writes:
+            db.acquire_writer()
+        # a plain cursor skips PooledCursor's per-statement classification
+        return db.cursor(sqlite3.Cursor).execute(self.sql, kwargs or args)
+
+    def executemany(self, db: PooledConnection, rows: Iterable) -> sqlite3.Cursor:
+        """
+        Run the statement once per parameter row,
+        binding them all to the one prepared statement.
+        """
+        if self.writes:
+            db.acquire_writer()
+        return db.cursor(sqlite3.Cursor).executemany(self.sql, rows)
+
+    def one(self, db: PooledConnection, *args, **kwargs) -> Optional[tuple]:
+        return self.execute(db, *args, **kwargs).fetchone()
+
+    def many(self, db: PooledConnection, *args, **kwargs) -> List[tuple]:
+        return self.execute(db, *args, **kwargs).fetchall()
+
+    def iter(self, db: PooledConnection, *args, **kwargs) -> Iterator[tuple]:
+        """
+        Rows are read from the cursor as they are consumed,
+        so iterate before the connection is returned to the pool.
+        """
+        return iter(self.execute(db, *args, **kwargs))
+
+    __call__ = many
+
+
+class Queries:
+    def __init__(self, queries: List[Query]):
+        self._queries: Dict[str, Query] = dict()
+        for query in queries:
+            if query.name in self._queries:
+                raise ValueError(f"duplicate query name: {query.name}")
+            self._queries[query.name] = query
+            setattr(self, query.name, query)
+
+    @property
+    def available_queries(self) -> List[str]:
+        """query names, in file order"""
+        return list(self._queries)
+
+    def __iter__(self) -> Iterator[Query]:
+        return iter(self._queries.values())
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+
+def parse_queries(text: str) -> Queries:
+    queries = list()
+    for block in NAME.split(text)[1:]:
+        lines = block.strip().splitlines()
+        name = lines[0].strip()
+        if not name.isidentifier():
+            raise ValueError(f"invalid query name: {name!r}")
+
+        doc, sql = list(), list()
+        for line in lines[1:]:
+            match = COMMENT.match(line)
+            if match:
+                doc.append(match.group(1))
+            else:
+                sql.append(line)
+
+        queries.append(Query(name, "\n".join(sql).strip(), "\n".join(doc).strip()))
+    return Queries(queries)
+
+
+def load_queries(path: str) -> Queries:
+    """
+    Load a module's queries and reserve room for them
+    in the statement cache of connections opened afterwards.
+    """
+    with open(path) as fp:
+        queries = parse_queries(fp.read())
+    reserve_statements(len(queries))
+    return queries
@@ -0,0 +1,179 @@
+"""
+
+Full-text search indexes
+
+Task titles and bodies, comments and tags each have an
+external-content FTS5 index kept in sync by triggers
+(see the task migrations); `task_search` in the task models
+merges them. The triggers only touch an index when an indexed
+column changes.
+
+`flask search rebuild` rebuilds every index from its content
+table, e.g. after bulk changes made with the triggers dropped
+or suspended. With --chunk-size each index is rebuilt a chunk of
+rows per transaction instead, so writers only ever wait for one
+chunk; searches miss the rows not reached yet until it finishes.
+
+`flask search optimize` merges each index's b-trees, all at once
+or, with --merge, a few pages per transaction. Run it from cron:
+
+    */15 * * * * flask search optimize --merge 500
+    0 4 * * 0    flask search optimize
+
+"""
+import time
+from contextlib import contextmanager
+from sqlite3 import Connection
+from typing import Iterator
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from src.database import Database
+
+# fts5 table, content table, indexed columns
+SEARCH_INDEXES = (
+    ("task_search", "task", ("title", "body")),
+    ("task_comment_search", "task_comment", ("contents",)),
+    ("task_tag_search", "task_tag", ("value",)),
+)
+
+# merge transactions per index before giving up for this run
+MERGE_MAX_STEPS = 10_000
+
+
+@contextmanager
+def suspended_search_indexing(database):
+    """
+    Switch the search triggers off for the duration of a bulk
+    change and rebuild the indexes at the end, even if it fails
+    partway. The count in search_sync lets bulk changes overlap;
+    indexing resumes when the last one finishes.
+    """
+    with database as db:
+        db.execute("update search_sync set suspended = suspended + 1 where id = 1")
+        db.commit()
+    try:
+        yield
+    finally:
+        with database as db:
+            db.execute("update search_sync set suspended = max(suspended - 1, 0) where id = 1")
+            rebuild_search_indexes(db)
+
+
+def rebuild_search_indexes(db: Connection):
+    for index, _, _ in SEARCH_INDEXES:
+        db.execute(f"insert into {index}({index}) values ('rebuild')")
+    db.execute("delete from search_rebuild")
+    db.commit()
+
+
+def rebuild_search_index_in_chunks(database: Database, index: str, chunk_size: int) -> Iterator[int]:
+    """
+    Rebuild one index, chunk_size rows per transaction, yielding
+    the id of the last row indexed after each chunk. Progress is
+    kept in search_rebuild, so an interrupted rebuild resumes
+    where it stopped.
+    """
+    _, table, columns = next(i for i in SEARCH_INDEXES if i[0] == index)
+    columns = ", ".join(columns)
+
+    with database.transaction() as db:
+        if not db.execute("select 1 from search_rebuild where name = ?", (index,)).fetchone():
+            db.execute(f"insert into {index}({index}) values ('delete-all')")
+            db.execute("insert into search_rebuild (name, through) values (?, 0)", (index,))
+
+    while True:
+        with database.transaction() as db:
+            through = db.execute(
+                "select through from search_rebuild where name = ?", (index,)
+            ).fetchone()[0]
+            last = db.execute(
+                f"select max(id) from (select id from {table} where id > ? order by id limit ?)",
+                (through, chunk_size),
+            ).fetchone()[0]
+            if last is None:
+                db.execute("delete from search_rebuild where name = ?", (index,))
+                return
+
+            db.execute(
+                f"insert into {index} (rowid, {columns}) "
+                f"select id, {columns} from {table} where id > ? and id <= ?",
+                (through, last),
+            )
+            db.execute("update search_rebuild set through = ? where name = ?", (last, index))
+        yield last
+
+
+def optimize_search_indexes(database: Database):
+    for index, _, _ in SEARCH_INDEXES:
+        with database.transaction() as db:
+            db.execute(f"insert into {index}({index}) values ('optimize')")
+
+
+def merge_search_indexes(database: Database, pages: int, max_steps: int = MERGE_MAX_STEPS) -> int:
+    """
+    Incrementally merge every index, up to pages pages per
+    transaction, until there is nothing left to merge or
+    max_steps transactions have done work on one index.
+    Returns the number of transactions that did work.
+    """
+    steps = 0
+    for index, _, _ in SEARCH_INDEXES:
+        for _ in range(max_steps):
+            with database.transaction() as db:
+                before = db.total_changes
+                db.execute(f"insert into {index}({index}, rank) values ('merge', ?)", (pages,))
+                # per the FTS5 docs, a total_changes() delta below two
+                # means the merge was a no-op; changes() is always one
+                merged = db.total_changes - before >= 2
+            if not merged:
+                break
+            steps += 1
+    return steps
+
+
+@click.group("search")
+def search_cli():
+    """Manage the full-text search indexes."""
+
+
+@search_cli.command("rebuild")
+@click.option("--resume", is_flag=True, help="re-enable indexing left suspended by an interrupted import")
+@click.option("--chunk-size", type=int, help="rows per transaction; rebuilds in one transaction if omitted")
+@with_appcontext
+def rebuild_command(resume: bool, chunk_size: int):
+    """Rebuild every search index from its content table."""
+    started = time.monotonic()
+    if resume:
+        with current_app.database as db:
+            db.execute("update search_sync set suspended = 0 where id = 1")
+
+    if chunk_size:
+        for index, _, _ in SEARCH_INDEXES:
+            chunks = sum(1 for _ in rebuild_search_index_in_chunks(current_app.database, index, chunk_size))
+            click.echo(f"{index}: {chunks} chunks")
+    else:
+        with current_app.database as db:
+            rebuild_search_indexes(db)
+
+    click.echo(
+        f"rebuilt {len(SEARCH_INDEXES)} search indexes "
+        f"in {time.monotonic() - started:.2f}s"
+    )
+
+
+@search_cli.command("optimize")
+@click.option("--merge", "pages", type=int, help="merge incrementally, this many pages per transaction")
+@with_appcontext
+def optimize_command(pages: int):
+    """Merge the b-trees of every search index."""
+    started = time.monotonic()
+    if pages:
+        steps = merge_search_indexes(current_app.database, pages)
+        click.echo(f"merged search indexes in {steps} steps")
+    else:
+        optimize_search_indexes(current_app.database)
+        click.echo("optimized search indexes")
+    click.echo(f"took {time.monotonic() - started:.2f}s")
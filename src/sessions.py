@@ -0,0 +1,183 @@
+"""
+
+Server-side sessions in SQLite
+
+Session data lives in the session table (see the auth migrations)
+of the app's database or, when SESSION_DATABASE_PATH is set, of a
+database of its own with a separate pool and writer lock. The
+cookie holds only a random session id; the table is keyed by its
+sha256, so a copy of the table cannot be replayed as cookies.
+
+A session is only written when its contents changed, or when less
+than half of its lifetime is left, to extend it. Requests that
+don't touch the session write nothing. Expired rows are deleted
+in bulk, at most every SESSION_PURGE_INTERVAL seconds per process
+and by `flask sessions purge`.
+
+"""
+import hashlib
+import secrets
+import threading
+import time
+from typing import Optional
+
+import click
+from flask import Flask, Request, Response, current_app
+from flask.cli import with_appcontext
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from src.database import Database
+from src.migrator import Migration, Migrator
+
+SESSION_MIGRATION = Migration("todo", "auth", "0005_sessions.sql")
+
+SESSION_ID_BYTES = 32
+
+
+class SqliteSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid: Optional[str] = None, expires: int = 0):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires = expires
+        self.new = sid is None
+        self.modified = False
+
+
+def _key(sid: str) -> str:
+    return hashlib.sha256(sid.encode()).hexdigest()
+
+
+def purge_expired_sessions(database: Database, now: Optional[int] = None) -> int:
+    """
+    Delete every expired session; returns how many were deleted
+    """
+    with database as db:
+        cursor = db.execute(
+            "delete from session where expires <= ?",
+            (int(time.time()) if now is None else now,),
+        )
+        db.commit()
+    return cursor.rowcount
+
+
+class SqliteSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+    session_class = SqliteSession
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.purge_interval = float(app.config.get("SESSION_PURGE_INTERVAL", 300))
+        self._next_purge = 0.0
+        self._purge_lock = threading.Lock()
+
+        path = app.config.get("SESSION_DATABASE_PATH")
+        if path:
+            self.database = Database(app, path=path)
+            with self.database as db:
+                migrator = Migrator()
+                migrator.init_migrations(db)
+                migrator.apply_migrations(db, [SESSION_MIGRATION])
+        else:
+            self.database = app.database
+
+        app.session_interface = self
+
+    def open_session(self, app: Flask, request: Request) -> SqliteSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return self.session_class()
+
+        with self.database as db:
+            row = db.execute(
+                "select data, expires from session where id = ? and expires > ?",
+                (_key(sid), int(time.time())),
+            ).fetchone()
+
+        if row is None:
+            # unknown or expired ids are never adopted
+            return self.session_class()
+
+        data, expires = row
+        return self.session_class(self.serializer.loads(data), sid=sid, expires=expires)
+
+    def save_session(self, app: Flask, session: SqliteSession, response: Response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.sid is not None or session:
+            response.vary.add("Cookie")
+
+        if not session:
+            if session.sid is not None and session.modified:
+                with self.database as db:
+                    db.execute("delete from session where id = ?", (_key(session.sid),))
+                    db.commit()
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = int(time.time())
+        lifetime = int(app.permanent_session_lifetime.total_seconds())
+        refresh = session.expires - now < lifetime // 2
+
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(SESSION_ID_BYTES)
+        elif not session.modified and not refresh:
+            self._purge_if_due()
+            return
+
+        expires = now + lifetime
+        with self.database as db:
+            if session.new or session.modified:
+                db.execute(
+                    "insert into session (id, data, expires) values (?, ?, ?) "
+                    "on conflict (id) do update set data = excluded.data, expires = excluded.expires",
+                    (_key(session.sid), self.serializer.dumps(dict(session)), expires),
+                )
+            else:
+                db.execute(
+                    "update session set expires = ? where id = ?",
+                    (expires, _key(session.sid)),
+                )
+            db.commit()
+        session.expires = expires
+
+        if session.new or session.modified or session.permanent:
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+        self._purge_if_due()
+
+    def _purge_if_due(self):
+        if time.monotonic() < self._next_purge or not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_purge = time.monotonic() + self.purge_interval
+            purge_expired_sessions(self.database)
+        finally:
+            self._purge_lock.release()
+
+
+@click.group("sessions")
+def sessions_cli():
+    """Manage server-side sessions."""
+
+
+@sessions_cli.command("purge")
+@with_appcontext
+def purge_command():
+    """Delete expired sessions."""
+    deleted = purge_expired_sessions(current_app.session_interface.database)
+    click.echo(f"deleted {deleted} expired sessions")
@@ -5,11 +5,31 @@ PASSWORD_SALT = "test"
 ALLOW_NEW_ACCOUNTS = True
 DATABASE_PATH = ":memory:"
 DATABASE_MUTEX_TIMEOUT = 5
+DATABASE_POOL_SIZE = 1
+DATABASE_POOL_TIMEOUT = 5
+DATABASE_JOURNAL_MODE = "WAL"
+DATABASE_SYNCHRONOUS = "NORMAL"
+DATABASE_TEMP_STORE = "MEMORY"
+DATABASE_BUSY_TIMEOUT = 5000
+DATABASE_FOREIGN_KEYS = "ON"
+
+SEARCH_PAGE_SIZE = 25
+PAGE_SIZE = 50
+IMPORT_BATCH_SIZE = 2
+MAX_CONTENT_LENGTH = 64 * 1024
+
+KDF_WORKERS = 2
+KDF_QUEUE_DEPTH = 8
+KDF_N = 1024
+KDF_R = 1
+KDF_P = 1
 
 SESSION_COOKIE_HTTPONLY = True
 REMEMBER_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SECURE = True
 REMEMBER_COOKIE_SECURE = True
 SESSION_COOKIE_NAME = "__todoapp"
-SESSION_TYPE = "filesystem"
-SESSION_USE_SIGNER = True
+SESSION_PURGE_INTERVAL = 300
+USER_VERSION_TTL = 10
+USER_VERSION_CACHE_SIZE = 100
+FRAGMENT_CACHE_BYTES = 1024 * 1024
@@ -4,12 +4,16 @@ Auth module
 
 """
 
+from dataclasses import asdict
 from datetime import datetime
 
 from flask import (
     current_app,
     render_template,
+    stream_template,
     Blueprint,
+    abort,
+    jsonify,
     redirect,
     request,
     Response,
@@ -17,6 +21,7 @@ from flask import (
     flash,
 )
 
+from src.kdf import KdfBusy
 from .models import User
 
 auth_bp = Blueprint(
@@ -36,6 +41,20 @@ def format_epoch_timestamp_as_datetime(ts) -> str:
     return parsed.strftime("%d/%m/%Y %-I:%M:%S %p UTC")
 
 
+@auth_bp.app_errorhandler(KdfBusy)
+def kdf_busy(error: KdfBusy):
+    """
+    Password hashing is saturated; ask the client to retry
+    rather than queueing the request behind the others.
+    """
+    return Response(
+        response="too many sign-in attempts in progress, try again shortly",
+        status=429,
+        headers={"Retry-After": "1"},
+        mimetype="text/plain",
+    )
+
+
 @auth_bp.post("/login")
 def login_post():
     """
@@ -48,12 +67,11 @@ def login_post():
 
     if not user or not user.verify_password(guessed_password):
         flash("login failed")
-        if "username" in session:
-            del session["username"]
+        User.clear_flask_session(session)
 
         return redirect(location="/")
 
-    session["username"] = user.username
+    user.save_to_flask_session(session)
     return redirect(location="/")
 
 
@@ -62,8 +80,7 @@ def logout_get():
     """
     Invalidate session and redirect to index
     """
-    if "username" in session:
-        del session["username"]
+    User.clear_flask_session(session)
     return redirect(location="/")
 
 
@@ -90,7 +107,7 @@ def signup_post():
         password=bytes(password, "utf8"),
     )
 
-    session["username"] = new_user.username
+    new_user.save_to_flask_session(session)
     flash("user created")
     return redirect("/")
 
@@ -117,12 +134,12 @@ def settings_get():
 
     all_users = None
     if user.is_admin:
-        all_users = User.all_users_for_admin()
+        all_users = User.iter_users_for_admin()
 
     return Response(
-        response=render_template(
+        response=stream_template(
             "auth/settings.html",
-            current_user=user,
+            current_user=user.load(),
             all_users=all_users,
         )
     )
@@ -134,3 +151,27 @@ def settings_post():
     Modify user settings
     """
     return Response(response=render_template("auth/settings.html"))
+
+
+@auth_bp.get("/settings/kdf")
+def settings_kdf_get():
+    """
+    Password hashing pool metrics, for admins
+    """
+    user = User.from_flask_session(session)
+    if not user or not user.is_admin:
+        abort(403)
+
+    return jsonify(asdict(current_app.kdf.stats()))
+
+
+@auth_bp.get("/settings/fragments")
+def settings_fragments_get():
+    """
+    Rendered fragment cache metrics, for admins
+    """
+    user = User.from_flask_session(session)
+    if not user or not user.is_admin:
+        abort(403)
+
+    return jsonify(asdict(current_app.fragments.stats()))
@@ -0,0 +1,8 @@
+-- name: add_user_kdf_n
+alter table user add column kdf_n int not null default 16384;
+
+-- name: add_user_kdf_r
+alter table user add column kdf_r int not null default 1;
+
+-- name: add_user_kdf_p
+alter table user add column kdf_p int not null default 1;
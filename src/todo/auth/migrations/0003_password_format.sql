@@ -0,0 +1,15 @@
+-- name: encode_legacy_password_hashes
+-- raw digests become self-describing hashes with an empty salt,
+-- which marks them as derived with the app-wide PASSWORD_SALT
+update user
+set password = printf('scrypt$%d$%d$%d$$%s', kdf_n, kdf_r, kdf_p, lower(hex(password)))
+where typeof(password) = 'blob';
+
+-- name: drop_user_kdf_n
+alter table user drop column kdf_n;
+
+-- name: drop_user_kdf_r
+alter table user drop column kdf_r;
+
+-- name: drop_user_kdf_p
+alter table user drop column kdf_p;
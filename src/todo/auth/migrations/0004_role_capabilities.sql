@@ -0,0 +1,13 @@
+-- name: add_role_capabilities
+-- bitmask of src.todo.auth.models.Capability
+alter table role add column capabilities int not null default 0;
+
+-- name: seed_role_capabilities
+-- view = 1, create = 2, edit = 4, delete = 8, invite = 16
+update role
+set capabilities = case name
+                       when 'manager' then 31
+                       when 'collaborator' then 15
+                       when 'viewer' then 1
+                       else capabilities
+    end;
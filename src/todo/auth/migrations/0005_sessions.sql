@@ -0,0 +1,12 @@
+-- name: create_session_table
+-- id is the sha256 of the session id in the cookie
+create table if not exists session
+(
+    id      text primary key,
+    data    text not null,
+    expires int  not null
+) without rowid;
+
+-- name: create_session_expires_idx
+create index if not exists session_expires_idx
+    on session (expires);
@@ -0,0 +1,15 @@
+-- name: add_user_version
+alter table user add column version int not null default 0;
+
+-- name: create_user_version_trigger
+-- sessions carry the version they were issued with,
+-- so any change to a user's credentials or access ends them
+create trigger if not exists user_version_bump
+    after update of password, is_admin, is_active
+    on user
+    when old.password is not new.password
+        or old.is_admin is not new.is_admin
+        or old.is_active is not new.is_active
+begin
+    update user set version = version + 1 where id = new.id;
+end;
@@ -0,0 +1,15 @@
+-- name: drop_user_version_trigger
+drop trigger if exists user_version_bump;
+
+-- name: create_user_version_trigger
+-- password changes bump the version in update_user_password instead:
+-- upgrading a hash on sign-in rewrites the password column without
+-- changing the password, and must not end the user's other sessions
+create trigger user_version_bump
+    after update of is_admin, is_active
+    on user
+    when old.is_admin is not new.is_admin
+        or old.is_active is not new.is_active
+begin
+    update user set version = version + 1 where id = new.id;
+end;
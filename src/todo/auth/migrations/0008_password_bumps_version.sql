@@ -0,0 +1,16 @@
+-- name: drop_user_version_trigger
+drop trigger if exists user_version_bump;
+
+-- name: create_user_version_trigger
+-- sessions carry the version they were issued with, so any change
+-- to a user's credentials or access ends them, however it is made;
+-- rehash_user_password offsets the bump in the statement it fires on
+create trigger user_version_bump
+    after update of password, is_admin, is_active
+    on user
+    when old.password is not new.password
+        or old.is_admin is not new.is_admin
+        or old.is_active is not new.is_active
+begin
+    update user set version = version + 1 where id = new.id;
+end;
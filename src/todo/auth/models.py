@@ -1,73 +1,155 @@
 from datetime import datetime
 from pytz import utc
+import hmac
 import os
 import pathlib
+import threading
 import time
 from dataclasses import dataclass, field
-from hashlib import scrypt
-from typing import List, Tuple
+from enum import IntFlag
+from typing import Dict, Iterator, List, Tuple
 from typing import Optional
 
-import anosql
 from flask import current_app
 from flask.sessions import SessionMixin
 
+from src import identity_map
+from src.kdf import KdfBusy
+from src.queries import load_queries
+from src.todo.auth.passwords import ScryptParams, decode_hash, derive, encode_hash, new_salt
+
 sql_path = os.path.join(
     pathlib.Path(__file__).parent.resolve(), "queries.sql"
 )
 
-queries = anosql.from_path(sql_path, "sqlite3")
+queries = load_queries(sql_path)
+
+
+class Capability(IntFlag):
+    """
+    What a role allows on a board.
+    Each role's mask is stored in role.capabilities.
+    """
+    NONE = 0
+    VIEW = 1
+    CREATE = 2
+    EDIT = 4
+    DELETE = 8
+    INVITE = 16
+    ALL = VIEW | CREATE | EDIT | DELETE | INVITE
 
 
 @dataclass
 class Role:
     id: int
     name: str
+    capabilities: Capability
 
     @classmethod
     def _build_from_tuple(cls, row: tuple):
         role = cls(
             id=row[0],
             name=row[1],
+            capabilities=Capability(row[2]),
         )
         return role
 
     @classmethod
     def select_by_name(cls, role_name: str) -> Optional['Role']:
         with current_app.database as db:
-            response = queries.select_role_by_name(
+            role = queries.select_role_by_name.one(
                 db, role_name=role_name,
             )
 
-        if not response:
+        if not role:
             return
 
-        role = response.pop(0)
         return cls._build_from_tuple(role)
 
     @classmethod
     def select_by_id(cls, role_id: int) -> Optional['Role']:
         with current_app.database as db:
-            response = queries.select_role_by_id(
+            role = queries.select_role_by_id.one(
                 db, role_id
             )
 
-        if not response:
+        if not role:
             return
 
-        role = response.pop(0)
         return cls._build_from_tuple(role)
 
 
+class UserVersionCache:
+    """
+    Versions of recently seen users, for validating sessions
+    without loading the user. The version is bumped by a trigger
+    whenever a user's password, is_admin or is_active changes.
+    Entries expire after USER_VERSION_TTL seconds, so changes made
+    by other processes take effect within that window; changes
+    made by this one invalidate the entry right away.
+    """
+
+    def __init__(self, app):
+        self.ttl = float(app.config.get("USER_VERSION_TTL", 10))
+        self.max_size = int(app.config.get("USER_VERSION_CACHE_SIZE", 10000))
+        self._entries: Dict[int, Tuple[Optional[int], float]] = dict()
+        self._lock = threading.Lock()
+
+        if not hasattr(app, "user_versions"):
+            setattr(app, "user_versions", self)
+
+    def version(self, user_id: int) -> Optional[int]:
+        """
+        Current version of an active user, None for an inactive
+        or deleted one
+        """
+        now = time.monotonic()
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        with current_app.database as db:
+            row = queries.select_active_user_version.one(db, user_id=user_id)
+        version = row[0] if row else None
+
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_size:
+                    self._entries.clear()
+            self._entries[user_id] = (version, now + self.ttl)
+        return version
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+@dataclass(slots=True)
+class SessionUser:
+    """
+    The signed-in user as recorded in their session.
+    Enough for authorization; load() fetches the full row.
+    """
+    id: int
+    username: str
+    is_admin: bool
+    version: int
+
+    def load(self) -> Optional['User']:
+        return User.select_by_id(self.id)
+
+
 @dataclass
 class User:
     id: Optional[int]
     username: str
-    password: bytes
+    password: str
     is_admin: bool
     is_active: bool
     created: int
     modified: Optional[int]
+    version: int = 0
 
     @classmethod
     def _from_tuple(cls, row: tuple):
@@ -79,6 +161,7 @@ class User:
             is_active=bool(row[4]),
             created=row[5],
             modified=row[6],
+            version=row[7],
         )
 
     @classmethod
@@ -143,19 +226,27 @@ class User:
 
     @classmethod
     def select_by_id(cls, user_id: int) -> Optional['User']:
-        with current_app.database as db:
-            response = queries.select_user_by_id(
-                db, user_id=user_id
-            )
+        row = identity_map.get("user", user_id)
+        if row is None:
+            with current_app.database as db:
+                row = queries.select_user_by_id.one(
+                    db, user_id=user_id
+                )
 
-        if not response:
-            return
+            if not row:
+                return
 
-        user = cls._from_tuple(response.pop(0))
-        return user
+            identity_map.add("user", row[0], row, ("username", row[1]))
+
+        return cls._from_tuple(row)
 
     @classmethod
     def select_by_username(cls, username: str) -> Optional['User']:
+        row = identity_map.get("user", ("username", username))
+        if row is not None:
+            # select_user_by_username only matches active users
+            return cls._from_tuple(row) if row[4] else None
+
         with current_app.database as db:
             response = queries.select_user_by_username(
                 db, username
@@ -167,37 +258,101 @@ class User:
         if len(response) != 1:
             raise ValueError("Expected single user")
 
-        user = response.pop(0)
-        return cls._from_tuple(user)
+        row = response.pop(0)
+        identity_map.add("user", row[0], row, ("username", row[1]))
+        return cls._from_tuple(row)
 
     @classmethod
     def all_users_for_admin(cls) -> List:
-        with current_app.database as db:
-            response = queries.select_all_users_for_admin(db)
-        if not response:
-            return list()
-        return response
+        return list(cls.iter_users_for_admin())
+
+    @classmethod
+    def iter_users_for_admin(cls) -> Iterator[tuple]:
+        """
+        Read STREAM_BATCH_SIZE rows per connection checkout, so a
+        page streamed to a slow client holds no pooled connection.
+        """
+        batch = int(current_app.config.get("STREAM_BATCH_SIZE", 500))
+        after = 0
+        while True:
+            with current_app.database as db:
+                rows = queries.select_users_for_admin_page.many(db, after=after, limit=batch)
+            yield from rows
+            if len(rows) < batch:
+                return
+            after = rows[-1][-1]
 
     @staticmethod
-    def hash_password(password: bytes) -> bytes:
-        """https://datatracker.ietf.org/doc/html/rfc7914.html#section-2"""
-        salt = bytes(current_app.config["PASSWORD_SALT"], "utf8")
-        return scrypt(password, salt=salt, n=16384, r=1, p=1)
+    def hash_password(password: bytes) -> str:
+        """
+        Hash with a new salt and the configured parameters.
+        Runs on the KDF pool; raises KdfBusy when it is saturated.
+        """
+        params = ScryptParams.from_config(current_app.config)
+        salt = new_salt()
+        digest = current_app.kdf.run(derive, password, params, salt)
+        return encode_hash(params, salt, digest)
+
+    @property
+    def password_needs_rehash(self) -> bool:
+        params, salt, _ = decode_hash(self.password)
+        return not salt or params != ScryptParams.from_config(current_app.config)
+
+    def verify_password(self, guessed_password: bytes) -> bool:
+        """
+        Check against the stored hash with the parameters and salt
+        it names. On success, a hash that is outdated is replaced.
+        """
+        params, salt, digest = decode_hash(self.password)
+        if not salt:
+            salt = bytes(current_app.config["PASSWORD_SALT"], "utf8")
+        guessed = current_app.kdf.run(derive, guessed_password, params, salt)
+
+        if not hmac.compare_digest(digest, guessed):
+            return False
+
+        if self.password_needs_rehash:
+            self._rehash_password(guessed_password)
+        return True
+
+    def _rehash_password(self, password: bytes):
+        try:
+            hashed_password = self.hash_password(password)
+        except KdfBusy:
+            # try again on a quieter sign-in
+            return
 
-    def verify_password(self, guessed_password) -> bool:
-        return self.password == self.hash_password(guessed_password)
+        with current_app.database as db:
+            queries.rehash_user_password(db, user_id=self.id, password=hashed_password)
+            db.commit()
+        identity_map.invalidate("user", self.id)
+        self.password = hashed_password
 
-    @classmethod
-    def from_flask_session(cls, s: SessionMixin) -> Optional['User']:
-        if "username" not in s or not s["username"]:
+    @staticmethod
+    def from_flask_session(s: SessionMixin) -> Optional[SessionUser]:
+        """
+        The user the session was issued to, if it is still valid:
+        the user is active and their version hasn't changed since.
+        """
+        recorded = s.get("user")
+        if not recorded:
             return None
 
-        user = cls.select_by_username(s["username"])
-        if user is None:
-            del s["username"]
+        if current_app.user_versions.version(recorded["id"]) != recorded["version"]:
+            del s["user"]
             return None
 
-        if not user.is_active:
-            return None
+        return SessionUser(**recorded)
 
-        return user
+    def save_to_flask_session(self, s: SessionMixin):
+        s["user"] = dict(
+            id=self.id,
+            username=self.username,
+            is_admin=self.is_admin,
+            version=self.version,
+        )
+
+    @staticmethod
+    def clear_flask_session(s: SessionMixin):
+        if "user" in s:
+            del s["user"]
@@ -0,0 +1,73 @@
+"""
+
+Password hash format
+
+Hashes are stored as text that names everything needed to check
+them again:
+
+    scrypt$<n>$<r>$<p>$<salt hex>$<digest hex>
+
+Each user gets their own random salt. Hashes written before this
+format carry an empty salt and were derived with the app-wide
+PASSWORD_SALT. A hash whose parameters differ from the configured
+ones, or that has no salt of its own, is replaced the next time
+its owner signs in.
+
+"""
+import os
+from dataclasses import dataclass
+from hashlib import scrypt
+from typing import Mapping, Tuple
+
+ALGORITHM = "scrypt"
+SALT_BYTES = 16
+DIGEST_BYTES = 64
+
+
+@dataclass(frozen=True, slots=True)
+class ScryptParams:
+    n: int
+    r: int
+    p: int
+
+    @classmethod
+    def from_config(cls, config: Mapping) -> 'ScryptParams':
+        return cls(
+            n=int(config.get("KDF_N", 16384)),
+            r=int(config.get("KDF_R", 1)),
+            p=int(config.get("KDF_P", 1)),
+        )
+
+    @property
+    def maxmem(self) -> int:
+        # scrypt needs 128 * n * r bytes; leave headroom for p and overhead
+        return 256 * self.n * self.r + 1024 * 1024
+
+
+def new_salt() -> bytes:
+    return os.urandom(SALT_BYTES)
+
+
+def derive(password: bytes, params: ScryptParams, salt: bytes) -> bytes:
+    """https://datatracker.ietf.org/doc/html/rfc7914.html#section-2"""
+    return scrypt(
+        password, salt=salt, n=params.n, r=params.r, p=params.p,
+        maxmem=params.maxmem, dklen=DIGEST_BYTES,
+    )
+
+
+def encode_hash(params: ScryptParams, salt: bytes, digest: bytes) -> str:
+    return "$".join((
+        ALGORITHM, str(params.n), str(params.r), str(params.p), salt.hex(), digest.hex(),
+    ))
+
+
+def decode_hash(encoded: str) -> Tuple[ScryptParams, bytes, bytes]:
+    """
+    (params, salt, digest) of a stored hash; raises ValueError
+    if it is not in the format above.
+    """
+    algorithm, n, r, p, salt, digest = encoded.split("$")
+    if algorithm != ALGORITHM:
+        raise ValueError(f"unsupported password hash algorithm: {algorithm}")
+    return ScryptParams(int(n), int(r), int(p)), bytes.fromhex(salt), bytes.fromhex(digest)
@@ -1,20 +1,44 @@
 -- name: select_role_by_id
 -- fn(role_id: int)
-select *
+select id, name, capabilities
 from role
 where id = ?;
 
 -- name: select_role_by_name
 -- fn(role_name: str)
-select *
+select id, name, capabilities
 from role
 where name = :role_name;
 
 -- name: create_user
--- fn(username: str, password: bytes, created: int)
+-- fn(username: str, password: str, created: int)
 insert into user (username, password, created, is_admin, is_active)
 values (:username, :password, :created, :is_admin, :is_active);
 
+-- name: update_user_password
+-- fn(user_id: int, password: str)
+-- a new password ends every session issued before it
+-- (user_version_bump bumps the version)
+update user
+set password = :password
+where id = :user_id;
+
+-- name: rehash_user_password
+-- fn(user_id: int, password: str)
+-- the same password hashed with new parameters; sessions stay valid,
+-- so the version is lowered for user_version_bump to restore
+update user
+set password = :password,
+    version  = version - 1
+where id = :user_id;
+
+-- name: select_active_user_version
+-- fn(user_id: int)
+select version
+from user
+where id = :user_id
+  and is_active = true;
+
 -- name: select_user_by_id
 -- fn(username: str)
 select id,
@@ -23,7 +47,8 @@ select id,
        is_admin,
        is_active,
        created,
-       modified
+       modified,
+       version
 from user
 where user.id = :user_id;
 
@@ -35,17 +60,23 @@ select id,
        is_admin,
        is_active,
        created,
-       modified
+       modified,
+       version
 from user
 where user.username = ?
   and user.is_active = true;
 
--- name: select_all_users_for_admin
--- fn()
+-- name: select_users_for_admin_page
+-- fn(after: int, limit: int)
+-- read a page per connection checkout; the id comes last
 select u.username,
        u.is_admin,
        u.is_active,
-       coalesce(u.modified, u.created)                          as last_modified,
-       (select count(1) from task t where t.creator_id = u.id)  as task_count,
-       (select count(1) from board b where b.creator_id = u.id) as board_count
-from user u;
+       coalesce(u.modified, u.created) as last_modified,
+       u.task_count                    as task_count,
+       u.board_count                   as board_count,
+       u.id
+from user u
+where u.id > :after
+order by u.id
+limit :limit;
@@ -5,7 +5,11 @@ Task Board module
 """
 from datetime import datetime
 
-from flask import Blueprint, Response, render_template, session, redirect, flash, request, abort, url_for
+from flask import Blueprint, Response, current_app, render_template, session, redirect, flash, request, abort, url_for
+from werkzeug.utils import secure_filename
+
+from src.conditional import board_validator
+from src.exporter import FORMATS, MIMETYPES, export_records, serialize
 from src.todo.auth.models import User, Role
 from src.todo.board.models import Board
 
@@ -36,17 +40,75 @@ def boards():
         flash("please sign in")
         return redirect("/")
 
-    user_boards = Board.user_boards(user)
+    page = Board.user_boards(user, request.args.get("cursor"))
 
     return Response(
         response=render_template(
             "board/board_list.html",
             username=user.username,
-            user_boards=user_boards,
+            user_boards=page.items,
+            page=page,
         ),
     )
 
 
+def _export_response(records, name: str) -> Response:
+    fmt = request.args.get("format", "jsonl")
+    if fmt not in FORMATS:
+        abort(400, f"format must be one of {', '.join(FORMATS)}")
+
+    filename = secure_filename(f"{name}.{fmt}")
+    return Response(
+        response=serialize(records, fmt),
+        mimetype=MIMETYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@board_bp.get("/export")
+def boards_export():
+    """
+    Stream every board the user can view, with its tasks
+    """
+    user = User.from_flask_session(session)
+    if not user:
+        flash("please sign in")
+        return redirect("/")
+
+    return _export_response(
+        export_records(current_app.database, user_id=user.id),
+        f"{user.username}-boards",
+    )
+
+
+@board_bp.get("/<username>/<symbol>/export")
+def board_export(username: str, symbol: str):
+    """
+    Stream the board with its tasks
+    """
+    user = User.from_flask_session(session)
+    if not user:
+        flash("please sign in")
+        return redirect("/")
+
+    creator = User.select_by_username(username)
+    if not creator:
+        abort(404, "board not found")
+
+    board = Board.select_by_creator_symbol(creator.id, symbol)
+    if not board:
+        abort(404, "board not found")
+
+    if not board.user_can_view(user):
+        flash("not authorized")
+        return redirect("/")
+
+    return _export_response(
+        export_records(current_app.database, board_id=board.id),
+        f"{username}-{symbol}",
+    )
+
+
 @board_bp.get("/<username>/<symbol>")
 def board_detail_get(username: str, symbol: str):
     """
@@ -62,17 +124,21 @@ def board_detail_get(username: str, symbol: str):
         creator.id, symbol,
     )
 
-    if user != board.creator and not board.user_can_view(user):
+    if not board.user_can_view(user):
         flash("not authorized")
         return redirect("/")
 
-    return Response(
+    validator = board_validator(user, board)
+    if validator.is_fresh():
+        return validator.not_modified()
+
+    return validator.apply(Response(
         response=render_template(
             "board/board_detail.html",
             creator=creator,
             board=board,
         )
-    )
+    ))
 
 
 @board_bp.post("/<username>/<symbol>")
@@ -90,7 +156,7 @@ def board_detail_post(username: str, symbol: str):
     symbol = request.form.get("symbol")
     status = request.form.get("status")
 
-    if user != board.creator and not board.user_can_edit(user):
+    if not board.user_can_edit(user):
         flash("not authorized")
         return redirect("/")
 
@@ -116,7 +182,7 @@ def board_delete_post(username: str, symbol: str):
     creator = User.select_by_username(username)
     board = Board.select_by_creator_symbol(creator.id, symbol)
 
-    if user != board.creator and not board.user_can_delete(user):
+    if not board.user_can_delete(user):
         flash("not authorized")
         return redirect("/")
 
@@ -176,7 +242,7 @@ def board_users_list_get(username: str, symbol: str):
     if not board:
         abort(404, "board not found")
 
-    if user != board.creator and not board.user_can_view(user):
+    if not board.user_can_view(user):
         flash("not authorized")
         return redirect("/")
 
@@ -213,7 +279,7 @@ def board_users_share_get(username: str, symbol: str):
         flash("unknown board")
         return redirect("/")
 
-    if user != board.creator and not board.user_can_invite(user):
+    if not board.user_can_invite(user):
         flash("not authorized")
         return redirect("/")
 
@@ -246,7 +312,7 @@ def board_users_share_post(username: str, symbol: str):
         flash("unknown board")
         return redirect("/")
 
-    if user != board.creator and not board.user_can_invite(user):
+    if not board.user_can_invite(user):
         flash("not authorized")
         return redirect("/")
 
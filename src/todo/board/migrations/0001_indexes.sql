@@ -0,0 +1,7 @@
+-- name: create_board_user_role_user_idx
+create index if not exists board_user_role_user_idx
+    on board_user_role (user_id, is_accepted, board_id, role_id);
+
+-- name: create_board_status_idx
+create index if not exists board_status_idx
+    on board (status);
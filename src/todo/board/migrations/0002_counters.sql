@@ -0,0 +1,52 @@
+-- name: add_board_accepted_count
+alter table board
+    add column accepted_count integer not null default 0;
+
+-- name: add_user_board_count
+alter table user
+    add column board_count integer not null default 0;
+
+-- name: create_board_count_insert_trigger
+create trigger board_count_on_insert
+    after insert
+    on board
+begin
+    update user set board_count = board_count + 1 where id = new.creator_id;
+end;
+
+-- name: create_board_count_delete_trigger
+create trigger board_count_on_delete
+    after delete
+    on board
+begin
+    update user set board_count = board_count - 1 where id = old.creator_id;
+end;
+
+-- name: create_board_accepted_count_insert_trigger
+create trigger board_accepted_count_on_insert
+    after insert
+    on board_user_role
+    when new.is_accepted = 1
+begin
+    update board set accepted_count = accepted_count + 1 where id = new.board_id;
+end;
+
+-- name: create_board_accepted_count_update_trigger
+create trigger board_accepted_count_on_update
+    after update of is_accepted
+    on board_user_role
+    when old.is_accepted is not new.is_accepted
+begin
+    update board
+    set accepted_count = accepted_count + (case when new.is_accepted = 1 then 1 else -1 end)
+    where id = new.board_id;
+end;
+
+-- name: create_board_accepted_count_delete_trigger
+create trigger board_accepted_count_on_delete
+    after delete
+    on board_user_role
+    when old.is_accepted = 1
+begin
+    update board set accepted_count = accepted_count - 1 where id = old.board_id;
+end;
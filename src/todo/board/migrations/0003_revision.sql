@@ -0,0 +1,56 @@
+-- name: add_board_revision
+-- bumped by the triggers below and in the task migrations on every
+-- change to what a board's pages show; conditional GETs compare it
+alter table board
+    add column revision integer not null default 0;
+
+-- name: add_board_revised
+alter table board
+    add column revised integer;
+
+-- name: create_board_revision_update_trigger
+create trigger board_revision_on_update
+    after update of symbol, name, status
+    on board
+    when old.symbol is not new.symbol
+        or old.name is not new.name
+        or old.status is not new.status
+begin
+    update board
+    set revision = revision + 1,
+        revised  = cast(strftime('%s', 'now') as integer)
+    where id = new.id;
+end;
+
+-- name: create_board_revision_role_insert_trigger
+create trigger board_revision_on_role_insert
+    after insert
+    on board_user_role
+begin
+    update board
+    set revision = revision + 1,
+        revised  = cast(strftime('%s', 'now') as integer)
+    where id = new.board_id;
+end;
+
+-- name: create_board_revision_role_update_trigger
+create trigger board_revision_on_role_update
+    after update
+    on board_user_role
+begin
+    update board
+    set revision = revision + 1,
+        revised  = cast(strftime('%s', 'now') as integer)
+    where id = new.board_id;
+end;
+
+-- name: create_board_revision_role_delete_trigger
+create trigger board_revision_on_role_delete
+    after delete
+    on board_user_role
+begin
+    update board
+    set revision = revision + 1,
+        revised  = cast(strftime('%s', 'now') as integer)
+    where id = old.board_id;
+end;
@@ -0,0 +1,49 @@
+-- name: add_board_user_role_last_updated
+-- copy of the board's coalesce(modified, created), so a user's
+-- boards can be paged in that order straight from an index
+alter table board_user_role
+    add column last_updated integer not null default 0;
+
+-- name: backfill_board_user_role_last_updated
+update board_user_role
+set last_updated = (select coalesce(modified, created) from board where id = board_id);
+
+-- name: create_board_user_role_last_updated_idx
+create index if not exists board_user_role_last_updated_idx
+    on board_user_role (user_id, is_accepted, last_updated, id);
+
+-- name: create_board_user_role_last_updated_insert_trigger
+create trigger board_user_role_last_updated_on_insert
+    after insert
+    on board_user_role
+begin
+    update board_user_role
+    set last_updated = (select coalesce(modified, created) from board where id = new.board_id)
+    where id = new.id;
+end;
+
+-- name: create_board_last_updated_update_trigger
+create trigger board_last_updated_on_update
+    after update of created, modified
+    on board
+    when coalesce(old.modified, old.created) is not coalesce(new.modified, new.created)
+begin
+    update board_user_role
+    set last_updated = coalesce(new.modified, new.created)
+    where board_id = new.id;
+end;
+
+-- name: drop_board_revision_role_update_trigger
+drop trigger if exists board_revision_on_role_update;
+
+-- name: create_board_revision_role_update_trigger
+-- keeping last_updated in step is not a change to the board
+create trigger board_revision_on_role_update
+    after update of board_id, user_id, role_id, is_invited, is_accepted, is_declined
+    on board_user_role
+begin
+    update board
+    set revision = revision + 1,
+        revised  = cast(strftime('%s', 'now') as integer)
+    where id = new.board_id;
+end;
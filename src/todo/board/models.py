@@ -3,19 +3,22 @@ from pytz import utc
 import os
 import pathlib
 from dataclasses import dataclass
-from typing import List, Optional
+from functools import cached_property
+from typing import List, Optional, Tuple
 
-import anosql
 from flask import current_app
 
-from src.todo.auth.models import User
+from src import identity_map
+from src.queries import load_queries
+from src.pagination import FIRST_ASCENDING, FIRST_DESCENDING, Page, paginate
+from src.todo.auth.models import Capability, User
 from src.todo.task.models import Task, TaskSummary
 
 sql_path = os.path.join(
     pathlib.Path(__file__).parent.resolve(), "queries.sql"
 )
 
-queries = anosql.from_path(sql_path, "sqlite3")
+queries = load_queries(sql_path)
 
 
 @dataclass
@@ -42,6 +45,7 @@ class UserRole:
                 board_id=board_id,
                 user_id=user_id,
             )
+        identity_map.invalidate("board_user_role", (board_id, user_id))
 
     @classmethod
     def set_user_role(cls, user: User, board_id: int, user_id: int, role_name: str) -> 'UserRole':
@@ -59,20 +63,20 @@ class UserRole:
                 invitation_from=user.id,
             )
             db.commit()
+        identity_map.invalidate("board_user_role", (board_id, user_id))
 
         return cls.get_user_role(board_id=board_id, user_id=user_id)
 
     @classmethod
     def get_user_role(cls, board_id: int, user_id: int) -> Optional['UserRole']:
         with current_app.database as db:
-            response = queries.select_board_user(
+            user_role = queries.select_board_user.one(
                 db, board_id, user_id
             )
 
-        if not response:
+        if not user_role:
             return
 
-        user_role = response.pop(0)
         return cls._from_tuple(user_role)
 
     @classmethod
@@ -114,7 +118,7 @@ class NewShareRequest:
         ]
 
 
-@dataclass
+@dataclass(slots=True)
 class BoardUserRoleSummary:
     board_creator: str
     board_symbol: str
@@ -127,16 +131,8 @@ class BoardUserRoleSummary:
 
     @classmethod
     def _from_tuple(cls, row: tuple):
-        return cls(
-            board_creator=row[0],
-            board_symbol=row[1],
-            username=row[2],
-            role=row[3],
-            is_active=row[4],
-            is_invited=row[5],
-            is_accepted=row[6],
-            is_declined=row[7],
-        )
+        # columns are selected in field order
+        return cls(*row)
 
     @classmethod
     def board_user_role_summary(cls, board_id: int, user_id: int) -> List['BoardUserRoleSummary']:
@@ -184,14 +180,13 @@ class BoardStatus:
     @classmethod
     def select_by_id(cls, status_id: int) -> Optional['BoardStatus']:
         with current_app.database as db:
-            result = queries.select_board_status_by_id(
+            status = queries.select_board_status_by_id.one(
                 db, status_id=status_id,
             )
 
-        if not result:
+        if not status:
             return
 
-        status = result.pop(0)
         return cls._from_tuple(status)
 
     @classmethod
@@ -216,20 +211,20 @@ class BoardStatus:
         with current_app.database as db:
             queries.set_board_status(db, board.id, status)
             db.commit()
+        identity_map.invalidate("board", board.id)
 
     @classmethod
     def get_board_status(cls, board: 'Board', status: str):
         with current_app.database as db:
-            result = queries.get_board_status(db, board.id, status)
+            row = queries.get_board_status.one(db, board.id, status)
 
-        if not result:
+        if not row:
             return
 
-        status = result.pop(0)
-        return cls._from_tuple(status)
+        return cls._from_tuple(row)
 
 
-@dataclass
+@dataclass(slots=True)
 class BoardSummary:
     id: int
     symbol: str
@@ -244,18 +239,8 @@ class BoardSummary:
 
     @classmethod
     def _from_tuple(cls, row: tuple):
-        return cls(
-            id=row[0],
-            symbol=row[1],
-            name=row[2],
-            status=row[3],
-            creator_id=row[4],
-            creator=row[5],
-            role=row[6],
-            last_updated=row[7],
-            task_count=row[8],
-            user_count=row[9],
-        )
+        # columns are selected in field order
+        return cls(*row)
 
 
 @dataclass
@@ -264,61 +249,79 @@ class Board:
     symbol: str
     name: str
 
-    creator: User
+    creator_id: int
     created: int
     modified: Optional[int]
 
-    current_status: BoardStatus
-    possible_statuses: List[BoardStatus]
-
+    status_id: Optional[int]
     task_seq: int
-    tasks: List[Task]
 
     @classmethod
     def _from_tuple(cls, row: tuple):
         return cls(
             id=row[0],
-            creator=User.select_by_id(row[1]),
+            creator_id=row[1],
             symbol=row[2],
             task_seq=row[3],
+            status_id=row[4],
             name=row[5],
             created=row[6],
             modified=row[7],
-
-            tasks=Task.select_by_board_id(board_id=row[0]),
-            current_status=BoardStatus.select_by_id(row[4]),
-            possible_statuses=[
-                s for s in BoardStatus.select_by_board_id(row[0]) if s.id != row[4]
-            ]
         )
 
+    @cached_property
+    def creator(self) -> User:
+        return User.select_by_id(self.creator_id)
+
+    @cached_property
+    def tasks(self) -> List[Task]:
+        return Task.select_by_board_id(board_id=self.id)
+
+    @cached_property
+    def statuses(self) -> List[BoardStatus]:
+        return BoardStatus.select_by_board_id(self.id)
+
+    @cached_property
+    def current_status(self) -> Optional[BoardStatus]:
+        return next((s for s in self.statuses if s.id == self.status_id), None)
+
+    @cached_property
+    def possible_statuses(self) -> List[BoardStatus]:
+        return [s for s in self.statuses if s.id != self.status_id]
+
     @classmethod
     def select_by_id(cls, board_id: int) -> Optional['Board']:
         """
         Select by primary key
         """
-        with current_app.database as db:
-            result = queries.select_board_by_id(
-                db, board_id
-            )
+        board = identity_map.get("board", board_id)
+        if board is None:
+            with current_app.database as db:
+                board = queries.select_board_by_id.one(
+                    db, board_id
+                )
 
-        if not result:
-            return None
+            if not board:
+                return None
+
+            identity_map.add("board", board[0], board, ("creator_symbol", board[1], board[2]))
 
-        board = result.pop(0)
         return cls._from_tuple(board)
 
     @classmethod
     def select_by_creator_symbol(cls, creator_id: int, symbol: str) -> Optional['Board']:
-        with current_app.database as db:
-            result = queries.select_board_by_creator_symbol(
-                db, creator_id, symbol
-            )
+        board = identity_map.get("board", ("creator_symbol", creator_id, symbol))
+        if board is None:
+            with current_app.database as db:
+                board = queries.select_board_by_creator_symbol.one(
+                    db, creator_id, symbol
+                )
 
-        if not result:
-            return
+            if not board:
+                return
+
+            identity_map.add("board", board[0], board, ("creator_symbol", board[1], board[2]))
 
-        board = result.pop(0)
         return cls._from_tuple(board)
 
     @classmethod
@@ -327,31 +330,31 @@ class Board:
         Construct new Board, persist it to database
         and return newly created entry.
         """
-        with current_app.database as db:
+        with current_app.database.transaction() as db:
             queries.create_new_board(
                 db, symbol, name, creator.id, int(datetime.now(tz=utc).timestamp()),
             )
-            db.commit()
-
-        board = cls.select_by_creator_symbol(creator.id, symbol)
-        board.set_user_role(creator, creator, "manager")
-        board.accept_user_role(creator.id)
-        with current_app.database as db:
+            board = cls.select_by_creator_symbol(creator.id, symbol)
+            board.set_user_role(creator, creator, "manager")
+            board.accept_user_role(creator.id)
             queries.add_board_status(db, creator_id=creator.id, symbol=symbol, status="todo")
             queries.add_board_status(db, creator_id=creator.id, symbol=symbol, status="in-progress")
             queries.add_board_status(db, creator_id=creator.id, symbol=symbol, status="completed")
             queries.set_board_status(db, board.id, "todo")
-            db.commit()
 
+        identity_map.invalidate("board", board.id)
         return cls.select_by_id(board.id)
 
     def delete(self):
-        with current_app.database as db:
-            queries.delete_board(db, self.id)
+        # children first, so the delete holds with foreign_keys enabled
+        with current_app.database.transaction() as db:
+            queries.delete_board_roles(db, self.id)
             queries.delete_board_tasks(db, self.id)
             queries.delete_board_statuses(db, self.id)
-            queries.delete_board_roles(db, self.id)
-            db.commit()
+            queries.delete_board(db, self.id)
+
+        identity_map.invalidate("board", self.id)
+        identity_map.invalidate("task")
 
     def new_task(self, creator: User, title: str, body: str, assignee: User = None) -> Task:
         """
@@ -370,27 +373,64 @@ class Board:
         return Task.select_by_board_and_number(self.id, number)
 
     @staticmethod
-    def board_tasks(user: User, board_id) -> List['TaskSummary']:
-        with current_app.database as db:
-            result = queries.board_tasks_summary(
-                db,
-                user_id=user.id,
-                board_id=board_id
-            )
-
-        if not result:
-            return list()
+    def board_tasks(user: User, board_id, cursor: Optional[str] = None) -> Page:
+        """
+        One page of the board's tasks, most recently updated first
+        """
+        def fetch(query):
+            def page(key: tuple, limit: int) -> List[TaskSummary]:
+                with current_app.database as db:
+                    result = query(
+                        db,
+                        user_id=user.id,
+                        board_id=board_id,
+                        last_updated=key[0],
+                        id=key[1],
+                        limit=limit,
+                    )
+                return [TaskSummary._from_tuple(row) for row in result]
+            return page
+
+        return paginate(
+            fetch(queries.board_tasks_next_page),
+            fetch(queries.board_tasks_prev_page),
+            key=lambda summary: (summary.last_updated, summary.id),
+            first=FIRST_DESCENDING,
+            cursor=cursor,
+        )
 
-        return [
-            TaskSummary._from_tuple(row) for row in result
-        ]
+    @staticmethod
+    def user_boards(user: User, cursor: Optional[str] = None) -> Page:
+        """
+        One page of the boards the user has accepted a role on,
+        least recently updated first
+        """
+        def fetch(query):
+            def page(key: tuple, limit: int) -> List[BoardSummary]:
+                with current_app.database as db:
+                    result = query(
+                        db,
+                        user_id=user.id,
+                        last_updated=key[0],
+                        id=key[1],
+                        limit=limit,
+                    )
+                return [BoardSummary._from_tuple(row) for row in result]
+            return page
+
+        return paginate(
+            fetch(queries.user_boards_next_page),
+            fetch(queries.user_boards_prev_page),
+            key=lambda summary: (summary.last_updated, summary.id),
+            first=FIRST_ASCENDING,
+            cursor=cursor,
+        )
 
     @staticmethod
-    def user_boards(user: User) -> List[BoardSummary]:
+    def all_user_boards(user: User) -> List[BoardSummary]:
         """
-        Returns a list of boards belonging to user
+        Returns every board the user has accepted a role on
         """
-        # todo check user role
         with current_app.database as db:
             result = queries.user_boards_summary(db, user_id=user.id)
 
@@ -441,6 +481,7 @@ class Board:
                 board_id=self.id,
                 user_id=user_id,
             )
+        identity_map.invalidate("board_user_role", (self.id, user_id))
 
     def decline_user_role(self, user_id: int):
         with current_app.database as db:
@@ -449,6 +490,7 @@ class Board:
                 board_id=self.id,
                 user_id=user_id,
             )
+        identity_map.invalidate("board_user_role", (self.id, user_id))
 
     def delete_user_role(self, user: User, deleted: User):
         """
@@ -460,71 +502,69 @@ class Board:
                 db, self.id, deleted.id
             )
             db.commit()
+        identity_map.invalidate("board_user_role", (self.id, deleted.id))
 
-    def user_can_view(self, user: User) -> bool:
-        with current_app.database as db:
-            result = queries.board_user_can_view(
-                db,
-                board_id=self.id,
-                user_id=user.id,
-            )
+    def capabilities(self, user: User) -> Capability:
+        """
+        What user may do on this board: everything for its creator,
+        otherwise the capabilities of their accepted role.
+        Resolved with one query and kept for the rest of the request.
+        """
+        if user.id == self.creator_id:
+            return Capability.ALL
 
-        if not result:
-            return False
+        key = (self.id, user.id)
+        row = identity_map.get("board_user_role", key)
+        if row is None:
+            with current_app.database as db:
+                row = queries.select_board_user_capabilities.one(
+                    db,
+                    board_id=self.id,
+                    user_id=user.id,
+                ) or (Capability.NONE,)
+            identity_map.add("board_user_role", key, row)
 
-        return bool(result.pop(0)[0])
+        return Capability(row[0])
 
-    def user_can_create(self, user: User) -> bool:
-        with current_app.database as db:
-            result = queries.board_user_can_create(
-                db,
-                board_id=self.id,
-                user_id=user.id,
-            )
+    def user_can(self, user: User, capability: Capability) -> bool:
+        return capability in self.capabilities(user)
 
-        if not result:
-            return False
+    def user_can_view(self, user: User) -> bool:
+        return self.user_can(user, Capability.VIEW)
 
-        return bool(result.pop(0)[0])
+    def user_can_create(self, user: User) -> bool:
+        return self.user_can(user, Capability.CREATE)
 
     def user_can_edit(self, user: User) -> bool:
-        with current_app.database as db:
-            result = queries.board_user_can_edit(
-                db,
-                board_id=self.id,
-                user_id=user.id,
-            )
-
-        if not result:
-            return False
-
-        return bool(result.pop(0)[0])
+        return self.user_can(user, Capability.EDIT)
 
     def user_can_delete(self, user: User) -> bool:
-        with current_app.database as db:
-            result = queries.board_user_can_delete(
-                db,
-                board_id=self.id,
-                user_id=user.id,
-            )
+        return self.user_can(user, Capability.DELETE)
 
-        if not result:
-            return False
+    def user_can_invite(self, user: User) -> bool:
+        return self.user_can(user, Capability.INVITE)
 
-        return bool(result.pop(0)[0])
+    def revision(self) -> Tuple[int, Optional[int]]:
+        """
+        The board's revision and when it last changed; any change to
+        the board, its roles or its tasks bumps the revision.
+        Read fresh every time, never from the identity map.
+        """
+        with current_app.database as db:
+            row = queries.select_board_revision.one(db, board_id=self.id)
+        return row[0], row[1]
 
-    def user_can_invite(self, user: User) -> bool:
+    @staticmethod
+    def user_boards_revision(user: User) -> Tuple[str, Optional[int]]:
+        """
+        The id and revision of every board the user has accepted,
+        and when the last of them changed
+        """
         with current_app.database as db:
-            result = queries.board_user_can_invite(
-                db,
-                board_id=self.id,
-                user_id=user.id,
+            revisions, last_modified = queries.select_user_boards_revision.one(
+                db, user_id=user.id,
             )
-
-        if not result:
-            return False
-
-        return bool(result.pop(0)[0])
+        return revisions, last_modified
 
     def set_board_status(self, user: User, status: str) -> 'Board':
         """
@@ -539,6 +579,7 @@ class Board:
 
             )
             db.commit()
+        identity_map.invalidate("board", self.id)
         return self.select_by_id(self.id)
 
     def rename_board(self, user: User, new_name: str) -> 'Board':
@@ -551,6 +592,7 @@ class Board:
                 db, new_name, self.id
             )
             db.commit()
+        identity_map.invalidate("board", self.id)
         return self.select_by_id(self.id)
 
     def set_board_symbol(self, user: User, symbol: str) -> 'Board':
@@ -563,4 +605,5 @@ class Board:
                 db, symbol=symbol, board_id=self.id
             )
             db.commit()
+        identity_map.invalidate("board", self.id)
         return self.select_by_id(self.id)
@@ -103,44 +103,38 @@ set status = (select id
 where id = :board_id;
 
 
--- name: board_user_can_view
-select count(1)
-from board_user_role bur
-where bur.board_id = :board_id
-  and bur.user_id = :user_id
-  and bur.is_accepted = 1;
-
--- name: board_user_can_create
-select count(1)
-from board_user_role bur
-where bur.board_id = :board_id
-  and bur.user_id = :user_id
-  and bur.role_id in (0, 1)
-  and bur.is_accepted = 1;
-
--- name: board_user_can_edit
-select count(1)
+-- name: select_board_user_capabilities
+-- fn(board_id: int, user_id: int)
+select r.capabilities
 from board_user_role bur
+         join role r on r.id = bur.role_id
 where bur.board_id = :board_id
   and bur.user_id = :user_id
-  and bur.role_id in (0, 1)
   and bur.is_accepted = 1;
 
--- name: board_user_can_delete
-select count(1)
-from board_user_role bur
-where bur.board_id = :board_id
-  and bur.user_id = :user_id
-  and bur.role_id in (0, 1)
-  and bur.is_accepted = 1;
+-- name: select_board_revision
+-- fn(board_id: int)
+-- validators for conditional GETs of the board's pages
+select revision,
+       max(coalesce(modified, created), coalesce(revised, created)) as last_modified
+from board
+where id = :board_id;
 
--- name: board_user_can_invite
-select count(1)
-from board_user_role bur
-where bur.board_id = :board_id
-  and bur.user_id = :user_id
-  and bur.role_id in (0)
-  and bur.is_accepted = 1;
+-- name: select_user_boards_revision
+-- fn(user_id: int)
+-- validators for conditional GETs of pages listing every board the
+-- user has accepted: each board's id and revision, in id order, so
+-- any change to the set of boards or to one of them changes it
+select coalesce(group_concat(id || ':' || revision, ','), ''),
+       max(last_modified)
+from (select b.id,
+             b.revision,
+             max(coalesce(b.modified, b.created), coalesce(b.revised, b.created)) as last_modified
+      from board_user_role bur
+               join board b on b.id = bur.board_id
+      where bur.user_id = :user_id
+        and bur.is_accepted = 1
+      order by bur.board_id);
 
 -- name: select_board_user
 -- fn(board_id: int, user_id: int)
@@ -241,13 +235,9 @@ select bur.id                                                       role_id,
        cu.username                                                  creator,
        r.name                                                    as role,
        coalesce(b.modified, b.created)                              last_updated,
-       (select count(1) from task where board_id = bur.board_id) as task_count,
-       (select count(1)
-        from board_user_role
-        where is_accepted = 1
-          and board_id = b.id
-          and user_id != :user_id
-          and id is not null)                                       shares
+       b.task_count                                              as task_count,
+       -- the viewer's own accepted role is always one of them
+       b.accepted_count - 1                                         shares
 from board b
          left outer join board_user_role bur
                          on b.id = bur.board_id and (b.creator_id = :user_id or bur.user_id = :user_id)
@@ -259,24 +249,111 @@ where bur.user_id = :user_id
 order by status, last_updated;
 
 
--- name: board_tasks_summary
--- fn(board_id: int)
+-- name: user_boards_next_page
+-- fn(user_id: int, last_updated: int, id: int, limit: int)
+-- least recently updated first, after the cursor, walking
+-- board_user_role_last_updated_idx. Unlike user_boards_summary the
+-- pages are not grouped by status: that would need the status name
+-- copied onto every role and a three-part cursor.
+select bur.id                                              as role_id,
+       b.symbol                                            as symbol,
+       b.name                                              as name,
+       (select name from board_status where id = b.status) as status,
+       cu.id                                               as creator_id,
+       cu.username                                         as creator,
+       r.name                                              as role,
+       bur.last_updated                                    as last_updated,
+       b.task_count                                        as task_count,
+       -- the viewer's own accepted role is always one of them
+       b.accepted_count - 1                                as shares
+from board_user_role bur
+         join board b on b.id = bur.board_id
+         left join role r on r.id = bur.role_id
+         left join user cu on b.creator_id = cu.id
+where bur.user_id = :user_id
+  and bur.is_accepted = 1
+  and (bur.last_updated, bur.id) > (:last_updated, :id)
+order by bur.last_updated, bur.id
+limit :limit;
+
+
+-- name: user_boards_prev_page
+-- fn(user_id: int, last_updated: int, id: int, limit: int)
+-- the rows before the cursor, most recently updated first
+select bur.id                                              as role_id,
+       b.symbol                                            as symbol,
+       b.name                                              as name,
+       (select name from board_status where id = b.status) as status,
+       cu.id                                               as creator_id,
+       cu.username                                         as creator,
+       r.name                                              as role,
+       bur.last_updated                                    as last_updated,
+       b.task_count                                        as task_count,
+       -- the viewer's own accepted role is always one of them
+       b.accepted_count - 1                                as shares
+from board_user_role bur
+         join board b on b.id = bur.board_id
+         left join role r on r.id = bur.role_id
+         left join user cu on b.creator_id = cu.id
+where bur.user_id = :user_id
+  and bur.is_accepted = 1
+  and (bur.last_updated, bur.id) < (:last_updated, :id)
+order by bur.last_updated desc, bur.id desc
+limit :limit;
+
+
+-- name: board_tasks_next_page
+-- fn(user_id: int, board_id: int, last_updated: int, id: int, limit: int)
+-- newest first, walking task_board_last_updated_idx from the cursor
 select b.symbol                                                 as symbol,
        t.number                                                 as number,
        t.title                                                  as description,
        (select name from task_status where id = t.status_id)    as status,
        (select username from user where id = b.creator_id)      as creator,
        (select username from user where id = t.assignee_id)     as asignee,
-       (select count(1) from task_tag where task_id = t.id)     as tag_count,
-       (select count(1) from task_comment where task_id = t.id) as comment_count,
-       coalesce(t.modified, t.created)                          as last_updated
-from board_user_role bur
-         left join board b on b.id = bur.board_id
-         join task t on b.id = t.board_id
-where bur.user_id = :user_id
-  and bur.board_id = :board_id
-  and ((bur.is_invited = 1 and bur.is_accepted = 1) or b.creator_id = :user_id)
-order by status, last_updated desc;
+       t.tag_count                                              as tag_count,
+       t.comment_count                                          as comment_count,
+       coalesce(t.modified, t.created)                          as last_updated,
+       t.id                                                     as id
+from task t
+         join board b on b.id = t.board_id
+where t.board_id = :board_id
+  and exists(select 1
+             from board_user_role bur
+             where bur.board_id = :board_id
+               and bur.user_id = :user_id
+               and ((bur.is_invited = 1 and bur.is_accepted = 1) or b.creator_id = :user_id))
+  and coalesce(t.modified, t.created) <= :last_updated
+  and (coalesce(t.modified, t.created) < :last_updated or t.id < :id)
+order by coalesce(t.modified, t.created) desc, t.id desc
+limit :limit;
+
+
+-- name: board_tasks_prev_page
+-- fn(user_id: int, board_id: int, last_updated: int, id: int, limit: int)
+-- the rows before the cursor, oldest first
+select b.symbol                                                 as symbol,
+       t.number                                                 as number,
+       t.title                                                  as description,
+       (select name from task_status where id = t.status_id)    as status,
+       (select username from user where id = b.creator_id)      as creator,
+       (select username from user where id = t.assignee_id)     as asignee,
+       t.tag_count                                              as tag_count,
+       t.comment_count                                          as comment_count,
+       coalesce(t.modified, t.created)                          as last_updated,
+       t.id                                                     as id
+from task t
+         join board b on b.id = t.board_id
+where t.board_id = :board_id
+  and exists(select 1
+             from board_user_role bur
+             where bur.board_id = :board_id
+               and bur.user_id = :user_id
+               and ((bur.is_invited = 1 and bur.is_accepted = 1) or b.creator_id = :user_id))
+  and coalesce(t.modified, t.created) >= :last_updated
+  and (coalesce(t.modified, t.created) > :last_updated or t.id > :id)
+order by coalesce(t.modified, t.created), t.id
+limit :limit;
 
 
 -- name: board_user_role_summary
@@ -315,3 +392,33 @@ from board_user_role bur
          left join user gu on bur.user_id = gu.id
          left join role r on bur.role_id = r.id
 where bur.user_id = ?;
+
+-- name: export_board
+-- fn(board_id: int)
+select b.id,
+       cu.username                                         as creator,
+       b.symbol,
+       b.name,
+       (select name from board_status where id = b.status) as status,
+       b.created,
+       b.modified
+from board b
+         join user cu on cu.id = b.creator_id
+where b.id = :board_id;
+
+-- name: export_boards_by_user
+-- fn(user_id: int)
+-- every board the user has accepted a role on
+select b.id,
+       cu.username                                         as creator,
+       b.symbol,
+       b.name,
+       (select name from board_status where id = b.status) as status,
+       b.created,
+       b.modified
+from board_user_role bur
+         join board b on b.id = bur.board_id
+         join user cu on cu.id = b.creator_id
+where bur.user_id = :user_id
+  and bur.is_accepted = 1
+order by b.id;
@@ -55,8 +55,10 @@ def search_post():
         flash("please sign in")
         return redirect("/")
 
+    query = request.form["query"]
+    page = request.form.get("page", 1, type=int)
     try:
-        results = task_search(user, request.form["query"])
+        results = task_search(user, query, page)
         flash(f"found {len(results)} results")
         if not results:
             return redirect("/")
@@ -70,5 +72,8 @@ def search_post():
             "navigation/search_results.html",
             session=session,
             results=results,
+            query=query,
+            page=page,
+            page_size=current_app.config.get("SEARCH_PAGE_SIZE", 25),
         )
     )
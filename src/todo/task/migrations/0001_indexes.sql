@@ -0,0 +1,23 @@
+-- name: create_task_tag_task_idx
+create index if not exists task_tag_task_idx
+    on task_tag (task_id, value);
+
+-- name: create_task_event_task_idx
+create index if not exists task_event_task_idx
+    on task_event (task_id);
+
+-- name: create_task_comment_task_user_idx
+create index if not exists task_comment_task_user_idx
+    on task_comment (task_id, user_id);
+
+-- name: create_task_assignee_idx
+create index if not exists task_assignee_idx
+    on task (assignee_id);
+
+-- name: create_task_creator_idx
+create index if not exists task_creator_idx
+    on task (creator_id);
+
+-- name: create_task_status_idx
+create index if not exists task_status_idx
+    on task (status_id);
@@ -0,0 +1,65 @@
+-- name: add_task_tag_count
+alter table task
+    add column tag_count integer not null default 0;
+
+-- name: add_task_comment_count
+alter table task
+    add column comment_count integer not null default 0;
+
+-- name: add_board_task_count
+alter table board
+    add column task_count integer not null default 0;
+
+-- name: add_user_task_count
+alter table user
+    add column task_count integer not null default 0;
+
+-- name: create_task_tag_count_insert_trigger
+create trigger task_tag_count_on_insert
+    after insert
+    on task_tag
+begin
+    update task set tag_count = tag_count + 1 where id = new.task_id;
+end;
+
+-- name: create_task_tag_count_delete_trigger
+create trigger task_tag_count_on_delete
+    after delete
+    on task_tag
+begin
+    update task set tag_count = tag_count - 1 where id = old.task_id;
+end;
+
+-- name: create_task_comment_count_insert_trigger
+create trigger task_comment_count_on_insert
+    after insert
+    on task_comment
+begin
+    update task set comment_count = comment_count + 1 where id = new.task_id;
+end;
+
+-- name: create_task_comment_count_delete_trigger
+create trigger task_comment_count_on_delete
+    after delete
+    on task_comment
+begin
+    update task set comment_count = comment_count - 1 where id = old.task_id;
+end;
+
+-- name: create_task_count_insert_trigger
+create trigger task_count_on_insert
+    after insert
+    on task
+begin
+    update board set task_count = task_count + 1 where id = new.board_id;
+    update user set task_count = task_count + 1 where id = new.creator_id;
+end;
+
+-- name: create_task_count_delete_trigger
+create trigger task_count_on_delete
+    after delete
+    on task
+begin
+    update board set task_count = task_count - 1 where id = old.board_id;
+    update user set task_count = task_count - 1 where id = old.creator_id;
+end;
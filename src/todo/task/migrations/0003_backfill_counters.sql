@@ -0,0 +1,17 @@
+-- name: backfill_task_counters
+update task
+set tag_count     = (select count(1) from task_tag where task_id = task.id),
+    comment_count = (select count(1) from task_comment where task_id = task.id);
+
+-- name: backfill_board_counters
+update board
+set task_count     = (select count(1) from task where board_id = board.id),
+    accepted_count = (select count(1)
+                      from board_user_role
+                      where board_id = board.id
+                        and is_accepted = 1);
+
+-- name: backfill_user_counters
+update user
+set task_count  = (select count(1) from task where creator_id = user.id),
+    board_count = (select count(1) from board where creator_id = user.id);
@@ -0,0 +1,79 @@
+-- name: create_task_comment_search_idx
+create virtual table task_comment_search using fts5
+(
+    contents,
+    content='task_comment',
+    content_rowid='id'
+);
+
+-- name: create_task_comment_search_insert_trigger
+create trigger task_comment_search_on_insert
+    after insert
+    on task_comment
+begin
+    insert into task_comment_search (rowid, contents)
+    values (new.id, new.contents);
+end;
+
+-- name: create_task_comment_search_update_trigger
+create trigger task_comment_search_on_update
+    after update of contents
+    on task_comment
+begin
+    insert into task_comment_search (task_comment_search, rowid, contents)
+    values ('delete', old.id, old.contents);
+    insert into task_comment_search (rowid, contents)
+    values (new.id, new.contents);
+end;
+
+-- name: create_task_comment_search_delete_trigger
+create trigger task_comment_search_on_delete
+    after delete
+    on task_comment
+begin
+    insert into task_comment_search (task_comment_search, rowid, contents)
+    values ('delete', old.id, old.contents);
+end;
+
+-- name: create_task_tag_search_idx
+create virtual table task_tag_search using fts5
+(
+    value,
+    content='task_tag',
+    content_rowid='id'
+);
+
+-- name: create_task_tag_search_insert_trigger
+create trigger task_tag_search_on_insert
+    after insert
+    on task_tag
+begin
+    insert into task_tag_search (rowid, value)
+    values (new.id, new.value);
+end;
+
+-- name: create_task_tag_search_update_trigger
+create trigger task_tag_search_on_update
+    after update of value
+    on task_tag
+begin
+    insert into task_tag_search (task_tag_search, rowid, value)
+    values ('delete', old.id, old.value);
+    insert into task_tag_search (rowid, value)
+    values (new.id, new.value);
+end;
+
+-- name: create_task_tag_search_delete_trigger
+create trigger task_tag_search_on_delete
+    after delete
+    on task_tag
+begin
+    insert into task_tag_search (task_tag_search, rowid, value)
+    values ('delete', old.id, old.value);
+end;
+
+-- name: initialize_task_comment_search_idx
+insert into task_comment_search(task_comment_search) values ('rebuild');
+
+-- name: initialize_task_tag_search_idx
+insert into task_tag_search(task_tag_search) values ('rebuild');
@@ -0,0 +1,7 @@
+-- name: create_task_last_updated_idx
+create index if not exists task_last_updated_idx
+    on task (coalesce(modified, created), id);
+
+-- name: create_task_board_last_updated_idx
+create index if not exists task_board_last_updated_idx
+    on task (board_id, coalesce(modified, created), id);
@@ -0,0 +1,136 @@
+-- name: create_table_search_sync
+-- single row; suspended counts the bulk imports in progress.
+-- While it is non-zero the search triggers do nothing and the
+-- indexes are rebuilt when the import finishes.
+create table if not exists search_sync
+(
+    id        integer not null primary key check (id = 1),
+    suspended integer not null default 0
+);
+
+-- name: seed_search_sync
+insert or ignore into search_sync (id, suspended)
+values (1, 0);
+
+-- name: drop_task_search_on_insert_trigger
+drop trigger if exists task_search_on_insert;
+
+-- name: create_task_search_on_insert_trigger
+create trigger task_search_on_insert
+    after insert
+    on task
+    when (select suspended from search_sync where id = 1) = 0
+begin
+    insert into task_search (rowid, title, body)
+    values (new.id, new.title, new.body);
+end;
+
+-- name: drop_task_search_on_update_trigger
+drop trigger if exists task_search_on_update;
+
+-- name: create_task_search_on_update_trigger
+create trigger task_search_on_update
+    after update
+    on task
+    when (select suspended from search_sync where id = 1) = 0
+begin
+    insert into task_search (task_search, rowid, title, body)
+    values ('delete', old.id, old.title, old.body);
+    insert into task_search (rowid, title, body)
+    values (new.id, new.title, new.body);
+end;
+
+-- name: drop_task_search_on_delete_trigger
+drop trigger if exists task_search_on_delete;
+
+-- name: create_task_search_on_delete_trigger
+create trigger task_search_on_delete
+    after delete
+    on task
+    when (select suspended from search_sync where id = 1) = 0
+begin
+    insert into task_search (task_search, rowid, title, body)
+    values ('delete', old.id, old.title, old.body);
+end;
+
+-- name: drop_task_comment_search_on_insert_trigger
+drop trigger if exists task_comment_search_on_insert;
+
+-- name: create_task_comment_search_on_insert_trigger
+create trigger task_comment_search_on_insert
+    after insert
+    on task_comment
+    when (select suspended from search_sync where id = 1) = 0
+begin
+    insert into task_comment_search (rowid, contents)
+    values (new.id, new.contents);
+end;
+
+-- name: drop_task_comment_search_on_update_trigger
+drop trigger if exists task_comment_search_on_update;
+
+-- name: create_task_comment_search_on_update_trigger
+create trigger task_comment_search_on_update
+    after update of contents
+    on task_comment
+    when (select suspended from search_sync where id = 1) = 0
+begin
+    insert into task_comment_search (task_comment_search, rowid, contents)
+    values ('delete', old.id, old.contents);
+    insert into task_comment_search (rowid, contents)
+    values (new.id, new.contents);
+end;
+
+-- name: drop_task_comment_search_on_delete_trigger
+drop trigger if exists task_comment_search_on_delete;
+
+-- name: create_task_comment_search_on_delete_trigger
+create trigger task_comment_search_on_delete
+    after delete
+    on task_comment
+    when (select suspended from search_sync where id = 1) = 0
+begin
+    insert into task_comment_search (task_comment_search, rowid, contents)
+    values ('delete', old.id, old.contents);
+end;
+
+-- name: drop_task_tag_search_on_insert_trigger
+drop trigger if exists task_tag_search_on_insert;
+
+-- name: create_task_tag_search_on_insert_trigger
+create trigger task_tag_search_on_insert
+    after insert
+    on task_tag
+    when (select suspended from search_sync where id = 1) = 0
+begin
+    insert into task_tag_search (rowid, value)
+    values (new.id, new.value);
+end;
+
+-- name: drop_task_tag_search_on_update_trigger
+drop trigger if exists task_tag_search_on_update;
+
+-- name: create_task_tag_search_on_update_trigger
+create trigger task_tag_search_on_update
+    after update of value
+    on task_tag
+    when (select suspended from search_sync where id = 1) = 0
+begin
+    insert into task_tag_search (task_tag_search, rowid, value)
+    values ('delete', old.id, old.value);
+    insert into task_tag_search (rowid, value)
+    values (new.id, new.value);
+end;
+
+-- name: drop_task_tag_search_on_delete_trigger
+drop trigger if exists task_tag_search_on_delete;
+
+-- name: create_task_tag_search_on_delete_trigger
+create trigger task_tag_search_on_delete
+    after delete
+    on task_tag
+    when (select suspended from search_sync where id = 1) = 0
+begin
+    insert into task_tag_search (task_tag_search, rowid, value)
+    values ('delete', old.id, old.value);
+end;
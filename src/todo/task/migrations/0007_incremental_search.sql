@@ -0,0 +1,144 @@
+-- name: create_table_search_rebuild
+-- one row per index being rebuilt in chunks: rows with an id
+-- above `through` are not in the index yet, so the triggers
+-- leave them to the rebuild
+create table if not exists search_rebuild
+(
+    name    text    not null primary key,
+    through integer not null default 0
+);
+
+-- name: drop_task_search_on_insert_trigger
+drop trigger if exists task_search_on_insert;
+
+-- name: create_task_search_on_insert_trigger
+create trigger task_search_on_insert
+    after insert
+    on task
+    when (select suspended from search_sync where id = 1) = 0
+        and not exists (select 1 from search_rebuild where name = 'task_search' and through < new.id)
+begin
+    insert into task_search (rowid, title, body)
+    values (new.id, new.title, new.body);
+end;
+
+-- name: drop_task_search_on_update_trigger
+drop trigger if exists task_search_on_update;
+
+-- name: create_task_search_on_update_trigger
+create trigger task_search_on_update
+    after update of title, body
+    on task
+    when (select suspended from search_sync where id = 1) = 0
+        and not exists (select 1 from search_rebuild where name = 'task_search' and through < old.id)
+        and (old.title is not new.title or old.body is not new.body)
+begin
+    insert into task_search (task_search, rowid, title, body)
+    values ('delete', old.id, old.title, old.body);
+    insert into task_search (rowid, title, body)
+    values (new.id, new.title, new.body);
+end;
+
+-- name: drop_task_search_on_delete_trigger
+drop trigger if exists task_search_on_delete;
+
+-- name: create_task_search_on_delete_trigger
+create trigger task_search_on_delete
+    after delete
+    on task
+    when (select suspended from search_sync where id = 1) = 0
+        and not exists (select 1 from search_rebuild where name = 'task_search' and through < old.id)
+begin
+    insert into task_search (task_search, rowid, title, body)
+    values ('delete', old.id, old.title, old.body);
+end;
+
+-- name: drop_task_comment_search_on_insert_trigger
+drop trigger if exists task_comment_search_on_insert;
+
+-- name: create_task_comment_search_on_insert_trigger
+create trigger task_comment_search_on_insert
+    after insert
+    on task_comment
+    when (select suspended from search_sync where id = 1) = 0
+        and not exists (select 1 from search_rebuild where name = 'task_comment_search' and through < new.id)
+begin
+    insert into task_comment_search (rowid, contents)
+    values (new.id, new.contents);
+end;
+
+-- name: drop_task_comment_search_on_update_trigger
+drop trigger if exists task_comment_search_on_update;
+
+-- name: create_task_comment_search_on_update_trigger
+create trigger task_comment_search_on_update
+    after update of contents
+    on task_comment
+    when (select suspended from search_sync where id = 1) = 0
+        and not exists (select 1 from search_rebuild where name = 'task_comment_search' and through < old.id)
+        and (old.contents is not new.contents)
+begin
+    insert into task_comment_search (task_comment_search, rowid, contents)
+    values ('delete', old.id, old.contents);
+    insert into task_comment_search (rowid, contents)
+    values (new.id, new.contents);
+end;
+
+-- name: drop_task_comment_search_on_delete_trigger
+drop trigger if exists task_comment_search_on_delete;
+
+-- name: create_task_comment_search_on_delete_trigger
+create trigger task_comment_search_on_delete
+    after delete
+    on task_comment
+    when (select suspended from search_sync where id = 1) = 0
+        and not exists (select 1 from search_rebuild where name = 'task_comment_search' and through < old.id)
+begin
+    insert into task_comment_search (task_comment_search, rowid, contents)
+    values ('delete', old.id, old.contents);
+end;
+
+-- name: drop_task_tag_search_on_insert_trigger
+drop trigger if exists task_tag_search_on_insert;
+
+-- name: create_task_tag_search_on_insert_trigger
+create trigger task_tag_search_on_insert
+    after insert
+    on task_tag
+    when (select suspended from search_sync where id = 1) = 0
+        and not exists (select 1 from search_rebuild where name = 'task_tag_search' and through < new.id)
+begin
+    insert into task_tag_search (rowid, value)
+    values (new.id, new.value);
+end;
+
+-- name: drop_task_tag_search_on_update_trigger
+drop trigger if exists task_tag_search_on_update;
+
+-- name: create_task_tag_search_on_update_trigger
+create trigger task_tag_search_on_update
+    after update of value
+    on task_tag
+    when (select suspended from search_sync where id = 1) = 0
+        and not exists (select 1 from search_rebuild where name = 'task_tag_search' and through < old.id)
+        and (old.value is not new.value)
+begin
+    insert into task_tag_search (task_tag_search, rowid, value)
+    values ('delete', old.id, old.value);
+    insert into task_tag_search (rowid, value)
+    values (new.id, new.value);
+end;
+
+-- name: drop_task_tag_search_on_delete_trigger
+drop trigger if exists task_tag_search_on_delete;
+
+-- name: create_task_tag_search_on_delete_trigger
+create trigger task_tag_search_on_delete
+    after delete
+    on task_tag
+    when (select suspended from search_sync where id = 1) = 0
+        and not exists (select 1 from search_rebuild where name = 'task_tag_search' and through < old.id)
+begin
+    insert into task_tag_search (task_tag_search, rowid, value)
+    values ('delete', old.id, old.value);
+end;
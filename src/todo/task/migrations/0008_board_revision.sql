@@ -0,0 +1,23 @@
+-- name: create_board_revision_task_event_trigger
+-- every change to a task, its comments or tags is recorded as an
+-- event in the same transaction as, or after, the change itself
+create trigger board_revision_on_task_event
+    after insert
+    on task_event
+begin
+    update board
+    set revision = revision + 1,
+        revised  = cast(strftime('%s', 'now') as integer)
+    where id = (select board_id from task where id = new.task_id);
+end;
+
+-- name: create_board_revision_task_delete_trigger
+create trigger board_revision_on_task_delete
+    after delete
+    on task
+begin
+    update board
+    set revision = revision + 1,
+        revised  = cast(strftime('%s', 'now') as integer)
+    where id = old.board_id;
+end;
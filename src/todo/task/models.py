@@ -3,40 +3,101 @@ from pytz import utc
 import os
 import pathlib
 import time
-from dataclasses import dataclass, field
-from typing import List, Optional
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Iterator, List, Optional
 
-import anosql
 from flask import current_app
+from markupsafe import Markup, escape
 
+from src import identity_map
+from src.queries import load_queries
+from src.pagination import FIRST_DESCENDING, Page, paginate
 from src.todo.auth.models import User
 
 sql_path = os.path.join(
     pathlib.Path(__file__).parent.resolve(), "queries.sql"
 )
 
-queries = anosql.from_path(sql_path, "sqlite3")
+queries = load_queries(sql_path)
 
+# statuses every new task starts with; the first is its initial status
+TASK_STATUSES = ("todo", "in-progress", "completed")
 
-def task_search(user: User, query: str) -> List[tuple]:
+
+def _highlight(text: str) -> Markup:
+    return Markup(
+        str(escape(text or "")).replace("\x02", "<mark>").replace("\x03", "</mark>")
+    )
+
+
+@dataclass
+class SearchResult:
+    task_id: int
+    board_creator: str
+    board_symbol: str
+    number: int
+    title: Markup
+    excerpt: Markup
+    source: str
+    rank: float
+
+    @classmethod
+    def _from_tuple(cls, row: tuple) -> 'SearchResult':
+        return cls(
+            task_id=row[0],
+            board_creator=row[1],
+            board_symbol=row[2],
+            number=row[3],
+            title=_highlight(row[4]),
+            excerpt=_highlight(row[5]),
+            source=row[6],
+            rank=row[7],
+        )
+
+
+def task_search(user: User, query: str, page: int = 1) -> List[SearchResult]:
+    """
+    Full-text search over the tasks, comments and tags on boards
+    the user has accepted a role on. Each task appears once, ranked
+    by its best bm25 match and paginated by SEARCH_PAGE_SIZE.
+    """
     if not query:
         return list()
 
+    page_size = int(current_app.config.get("SEARCH_PAGE_SIZE", 25))
     with current_app.database as db:
-        results = queries.query_task_search(db, query)
-        allowed = set(
-            i[0] for i in queries.filter_search_result_by_user(db, user.id)
+        results = queries.query_task_search(
+            db,
+            user_id=user.id,
+            query=query,
+            limit=page_size,
+            offset=(max(page, 1) - 1) * page_size,
         )
 
-    if not results or not allowed:
-        return list()
+    return [SearchResult._from_tuple(r) for r in results]
 
-    return [
-        r for r in results if r[0] in allowed
-    ]
 
+class _TaskChildren:
+    """
+    Rows of a child table, streamed from a cursor ordered by task_id
+    and handed out one task at a time as the tasks stream past.
+    """
 
-@dataclass
+    def __init__(self, items: Iterator):
+        self.items = items
+        self.pending = next(items, None)
+
+    def take(self, task_id: int) -> list:
+        taken = list()
+        while self.pending is not None and self.pending.task_id <= task_id:
+            if self.pending.task_id == task_id:
+                taken.append(self.pending)
+            self.pending = next(self.items, None)
+        return taken
+
+
+@dataclass(slots=True)
 class TaskEvent:
     id: int
     task_id: int
@@ -49,28 +110,18 @@ class TaskEvent:
 
     @classmethod
     def _from_tuple(cls, row: tuple) -> 'TaskEvent':
-        return cls(
-            id=row[0],
-            task_id=row[1],
-            user_id=row[2],
-            created=row[3],
-            description=row[4],
-            change_field=row[5],
-            change_old=row[6],
-            change_new=row[7],
-        )
+        # columns are selected in field order
+        return cls(*row)
 
     @classmethod
     def select_by_task_id(cls, task_id: int) -> List['TaskEvent']:
-        with current_app.database as db:
-            result = queries.select_task_events_by_task_id(db, task_id)
+        return list(cls.iter_by_task_id(task_id))
 
-        if not result:
-            return list()
-
-        return [
-            cls._from_tuple(row) for row in result
-        ]
+    @classmethod
+    def iter_by_task_id(cls, task_id: int) -> Iterator['TaskEvent']:
+        with current_app.database as db:
+            for row in queries.select_task_events_by_task_id.iter(db, task_id):
+                yield cls._from_tuple(row)
 
     @classmethod
     def new_task_event(
@@ -99,7 +150,7 @@ class TaskEvent:
             db.commit()
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskTag:
     id: int
     task_id: int
@@ -107,11 +158,8 @@ class TaskTag:
 
     @classmethod
     def _from_tuple(cls, row: tuple):
-        return cls(
-            id=row[0],
-            task_id=row[1],
-            value=row[2],
-        )
+        # columns are selected in field order
+        return cls(*row)
 
     @classmethod
     def set_task_tag(cls, task_id, value: str) -> 'TaskTag':
@@ -123,10 +171,9 @@ class TaskTag:
     @classmethod
     def select_task_tag(cls, task_id: int, value: str) -> Optional['TaskTag']:
         with current_app.database as db:
-            result = queries.select_task_tag(db, task_id, value)
-        if not result:
+            tag = queries.select_task_tag.one(db, task_id, value)
+        if not tag:
             return
-        tag = result.pop(0)
         return cls._from_tuple(tag)
 
     @classmethod
@@ -165,12 +212,12 @@ class TaskComment:
     modified: Optional[int]
 
     @classmethod
-    def _from_tuple(cls, row: tuple):
+    def _from_tuple(cls, row: tuple, user: User = None):
         return cls(
             id=row[0],
             task_id=row[1],
             number=row[2],
-            user=User.select_by_id(row[3]),
+            user=user or User.select_by_id(row[3]),
             contents=row[4],
             created=row[5],
             modified=row[6],
@@ -195,14 +242,13 @@ class TaskComment:
             comment_number: int,
     ) -> Optional['TaskComment']:
         with current_app.database as db:
-            result = queries. \
-                select_task_comment_by_task_id_and_comment_number(
+            comment = queries. \
+                select_task_comment_by_task_id_and_comment_number.one(
                 db, task_id, comment_number)
 
-        if not result:
+        if not comment:
             return
 
-        comment = result.pop(0)
         return cls._from_tuple(comment)
 
     @classmethod
@@ -217,7 +263,7 @@ class TaskComment:
         """
         with current_app.database as db:
             queries.increment_comment_number_sequence(db, task_id)
-            number = queries.select_comment_number_sequence(db, task_id)[0][0]
+            number = queries.select_comment_number_sequence.one(db, task_id)[0]
             queries.create_task_comment(
                 db, task_id, number, user_id, contents, int(datetime.now(tz=utc).timestamp())
             )
@@ -256,7 +302,7 @@ class TaskComment:
             results = queries.board_task_summary(db, board_id)
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskStatus:
     id: Optional[int]
     task_id: int
@@ -264,19 +310,15 @@ class TaskStatus:
 
     @classmethod
     def _from_tuple(cls, row: tuple) -> 'TaskStatus':
-        return cls(
-            id=row[0],
-            task_id=row[1],
-            name=row[2],
-        )
+        # columns are selected in field order
+        return cls(*row)
 
     @classmethod
     def select_by_id(cls, status_id: int) -> Optional['TaskStatus']:
         with current_app.database as db:
-            result = queries.select_task_status_by_id(db, status_id)
-        if not result:
+            status = queries.select_task_status_by_id.one(db, status_id)
+        if not status:
             return
-        status = result.pop(0)
         return cls._from_tuple(status)
 
     @classmethod
@@ -292,10 +334,9 @@ class TaskStatus:
     @classmethod
     def select_by_task_and_name(cls, task_id: int, name: str) -> Optional['TaskStatus']:
         with current_app.database as db:
-            result = queries.select_task_status(db, task_id, name)
-        if not result:
+            status = queries.select_task_status.one(db, task_id, name)
+        if not status:
             return
-        status = result.pop(0)
         return cls._from_tuple(status)
 
     @classmethod
@@ -316,7 +357,7 @@ class TaskStatus:
             db.commit()
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskSummary:
     symbol: str
     number: int
@@ -327,20 +368,12 @@ class TaskSummary:
     tag_count: int
     comment_count: int
     last_updated: int
+    id: int
 
     @classmethod
     def _from_tuple(cls, row: tuple):
-        return cls(
-            symbol=row[0],
-            number=row[1],
-            description=row[2],
-            status=row[3],
-            creator=row[4],
-            assignee=row[5] or "None",
-            tag_count=row[6],
-            comment_count=row[7],
-            last_updated=row[8],
-        )
+        # columns are selected in field order
+        return cls(*row[:5], row[5] or "None", *row[6:])
 
 
 @dataclass
@@ -354,13 +387,7 @@ class Task:
     body: str
     created: int
     modified: Optional[int]
-
-    status: Optional[TaskStatus] = None
-    possible_statuses: List[TaskStatus] = field(default_factory=list)
-
-    tags: List[TaskTag] = field(default_factory=list)
-    comments: List[TaskComment] = field(default_factory=list)
-    events: List[TaskEvent] = field(default_factory=list)
+    status_id: Optional[int] = None
 
     @classmethod
     def _from_tuple(cls, row: tuple):
@@ -370,67 +397,159 @@ class Task:
             board_id=row[2],
             creator_id=row[3],
             assignee_id=row[4],
+            status_id=row[5],
             title=row[6],
             body=row[7],
             created=row[8],
             modified=row[9],
-            tags=TaskTag.select_task_tags(row[0]),
-            comments=TaskComment.select_by_task_id(row[0]),
-            events=TaskEvent.select_by_task_id(row[0]),
-            status=TaskStatus.select_by_id(row[5]),
-            possible_statuses=[
-                s for s in TaskStatus.select_by_task_id(row[0]) if s.id != row[5]
-            ]
         )
 
+    @cached_property
+    def tags(self) -> List[TaskTag]:
+        return TaskTag.select_task_tags(self.id)
+
+    @cached_property
+    def comments(self) -> List[TaskComment]:
+        return TaskComment.select_by_task_id(self.id)
+
+    @cached_property
+    def events(self) -> List[TaskEvent]:
+        return TaskEvent.select_by_task_id(self.id)
+
+    @cached_property
+    def statuses(self) -> List[TaskStatus]:
+        return TaskStatus.select_by_task_id(self.id)
+
+    @cached_property
+    def status(self) -> Optional[TaskStatus]:
+        return next((s for s in self.statuses if s.id == self.status_id), None)
+
+    @cached_property
+    def possible_statuses(self) -> List[TaskStatus]:
+        return [s for s in self.statuses if s.id != self.status_id]
+
     @classmethod
     def select_by_task_id(cls, task_id: int) -> Optional['Task']:
-        with current_app.database as db:
-            result = queries.select_task_by_task_id(db, task_id)
+        task = identity_map.get("task", task_id)
+        if task is None:
+            with current_app.database as db:
+                task = queries.select_task_by_task_id.one(db, task_id)
 
-        if not result:
-            return
+            if not task:
+                return
+
+            identity_map.add("task", task[0], task, ("board_number", task[2], task[1]))
 
-        task = result.pop(0)
         return cls._from_tuple(task)
 
     @classmethod
     def select_by_board_id(cls, board_id: int) -> List['Task']:
-        with current_app.database as db:
-            result = queries.select_tasks_by_board_id(db, board_id)
-
-        if not result:
-            return list()
+        return list(cls.iter_by_board_id(board_id))
 
-        return [
-            cls._from_tuple(row) for row in result
-        ]
+    @classmethod
+    def iter_by_board_id(cls, board_id: int) -> Iterator['Task']:
+        """
+        Stream every task on the board with its tags, comments,
+        events and statuses. One query per table for each batch
+        of STREAM_BATCH_SIZE tasks; the child rows are merged in
+        as the tasks stream past, since every query is ordered by
+        task id. The connection goes back to the pool between
+        batches, so a slow consumer holds none.
+        """
+        batch = int(current_app.config.get("STREAM_BATCH_SIZE", 500))
+        after = 0
+        while True:
+            with current_app.database as db:
+                rows = queries.select_tasks_by_board_id.many(
+                    db, board_id=board_id, after=after, limit=batch
+                )
+                if not rows:
+                    return
+
+                bounds = dict(board_id=board_id, after=after, through=rows[-1][0])
+                authors = dict()
+                for user in queries.select_task_comment_users_by_board_id.many(db, **bounds):
+                    identity_map.add("user", user[0], user, ("username", user[1]))
+                    authors[user[0]] = User._from_tuple(user)
+
+                tags = _TaskChildren(iter([
+                    TaskTag._from_tuple(r)
+                    for r in queries.select_task_tags_by_board_id.many(db, **bounds)
+                ]))
+                comments = _TaskChildren(iter([
+                    TaskComment._from_tuple(r, user=authors.get(r[3]))
+                    for r in queries.select_task_comments_by_board_id.many(db, **bounds)
+                ]))
+                events = _TaskChildren(iter([
+                    TaskEvent._from_tuple(r)
+                    for r in queries.select_task_events_by_board_id.many(db, **bounds)
+                ]))
+                statuses = _TaskChildren(iter([
+                    TaskStatus._from_tuple(r)
+                    for r in queries.select_task_statuses_by_board_id.many(db, **bounds)
+                ]))
+
+            for row in rows:
+                task = cls._from_tuple(row)
+                task.tags = tags.take(task.id)
+                task.comments = comments.take(task.id)
+                task.events = events.take(task.id)
+                task.statuses = statuses.take(task.id)
+                yield task
+
+            if len(rows) < batch:
+                return
+            after = rows[-1][0]
 
     @classmethod
     def select_by_board_and_number(cls, board_id: int, task_number: int):
         """
         Select using the board_id and board task_seq
         """
-        with current_app.database as db:
-            result = queries.select_task_by_board_number(
-                db, board_id, task_number
+        task = identity_map.get("task", ("board_number", board_id, task_number))
+        if task is None:
+            with current_app.database as db:
+                task = queries.select_task_by_board_number.one(
+                    db, board_id, task_number
+                )
+
+            if not task:
+                return None
+
+            identity_map.add(
+                "task", task[0], task,
+                ("board_number", task[2], task[1]),
+                ("board_number", board_id, task_number),
             )
 
-        if not result:
-            return None
-
-        board = result.pop(0)
-        return cls._from_tuple(board)
+        return cls._from_tuple(task)
 
     @classmethod
-    def user_tasks(cls, user: User) -> List[TaskSummary]:
-        with current_app.database as db:
-            result = queries.user_tasks_summary(db, user.id)
-        if not result:
-            return list()
-        return [
-            TaskSummary._from_tuple(row) for row in result
-        ]
+    def user_tasks(cls, user: User, cursor: Optional[str] = None) -> Page:
+        """
+        One page of the tasks on every board the user can see,
+        most recently updated first
+        """
+        def fetch(query):
+            def page(key: tuple, limit: int) -> List[TaskSummary]:
+                with current_app.database as db:
+                    result = query(
+                        db,
+                        user_id=user.id,
+                        last_updated=key[0],
+                        id=key[1],
+                        limit=limit,
+                    )
+                return [TaskSummary._from_tuple(row) for row in result]
+            return page
+
+        return paginate(
+            fetch(queries.user_tasks_next_page),
+            fetch(queries.user_tasks_prev_page),
+            key=lambda summary: (summary.last_updated, summary.id),
+            first=FIRST_DESCENDING,
+            cursor=cursor,
+        )
 
     @classmethod
     def new_task(
@@ -445,11 +564,14 @@ class Task:
         """
         Create and persist a new Task
         Return newly created object
+
+        The task, its statuses and its first events are
+        written in a single transaction.
         """
-        with current_app.database as db:
-            queries.increment_task_number_sequence(db, board_id)
-            task_number = queries.select_task_number_sequence(db, board_id)[0][0]
-            queries.create_new_task(
+        created = int(time.time())
+        with current_app.database.transaction() as db:
+            task_number = queries.increment_task_number_sequence.one(db, board_id)[0]
+            task_id = queries.create_new_task.one(
                 db,
                 task_number,
                 board_id,
@@ -457,26 +579,30 @@ class Task:
                 assignee_id,
                 title,
                 body,
-                int(time.time()),
-            )
-            db.commit()
-
-        task = Task.select_by_board_and_number(board_id, task_number)
-        TaskEvent.new_task_event(task.id, user.id, description="created task")
-        TaskStatus.create_task_status(task.id, "todo")
-        TaskStatus.create_task_status(task.id, "in-progress")
-        TaskStatus.create_task_status(task.id, "completed")
-        task = task.set_status(user, "todo")
-        return task
+                created,
+            )[0]
+            queries.create_task_status.executemany(db, (
+                dict(task_id=task_id, name=name) for name in TASK_STATUSES
+            ))
+            task = queries.set_task_status_by_name.one(db, task_id=task_id, name=TASK_STATUSES[0])
+            queries.create_task_event.executemany(db, (
+                (task_id, user.id, created, "created task", None, None, None),
+                (task_id, user.id, created, "update", "status", task[5], None),
+            ))
+
+        identity_map.invalidate("board", board_id)
+        identity_map.add("task", task[0], task, ("board_number", task[2], task[1]))
+        return cls._from_tuple(task)
 
     def delete(self, user: User):
-        with current_app.database as db:
+        with current_app.database.transaction() as db:
             queries.delete_task(db, self.id)
             queries.delete_task_comments(db, self.id)
             queries.delete_task_statuses(db, self.id)
             queries.delete_task_tags(db, self.id)
             queries.delete_task_events(db, self.id)
-            db.commit()
+
+        identity_map.invalidate("task", self.id)
 
     def set_status(self, user: User, name: str) -> 'Task':
         status = TaskStatus.select_by_task_and_name(self.id, name)
@@ -484,13 +610,12 @@ class Task:
             print("no status")
             return
 
-        with current_app.database as db:
+        with current_app.database.transaction() as db:
             queries.set_task_status(db, status_id=status.id, task_id=self.id)
-            db.commit()
+            TaskEvent.new_task_event(self.id, user.id, "update", "status", status.id)
 
-        task = self.select_by_task_id(self.id)
-        TaskEvent.new_task_event(self.id, user.id, "update", "status", task.status.id)
-        return task
+        identity_map.invalidate("task", self.id)
+        return self.select_by_task_id(self.id)
 
     def get_statuses(self) -> List[TaskStatus]:
         return TaskStatus.select_by_task_id(self.id)
@@ -517,6 +642,7 @@ class Task:
             )
             db.commit()
 
+        identity_map.invalidate("task", self.id)
         task = self.select_by_task_id(self.id)
         TaskEvent.new_task_event(
             self.id,
@@ -538,6 +664,7 @@ class Task:
             queries.set_task_title(db, title, modified, self.id)
             db.commit()
 
+        identity_map.invalidate("task", self.id)
         TaskEvent.new_task_event(
             self.id,
             user.id,
@@ -558,6 +685,7 @@ class Task:
             queries.set_task_body(db, contents, modified, self.id)
             db.commit()
 
+        identity_map.invalidate("task", self.id)
         TaskEvent.new_task_event(
             self.id,
             user.id,
@@ -572,15 +700,16 @@ class Task:
         """
         Create new comment associated with task
         """
-        TaskComment.new_task_comment(self.id, user.id, contents)
-        TaskEvent.new_task_event(
-            self.id,
-            user.id,
-            "new",
-            "comment",
-            "",
-            contents,
-        )
+        with current_app.database.transaction():
+            TaskComment.new_task_comment(self.id, user.id, contents)
+            TaskEvent.new_task_event(
+                self.id,
+                user.id,
+                "new",
+                "comment",
+                "",
+                contents,
+            )
         return self.select_by_task_id(self.id)
 
     def edit_comment(self, user: User, comment_number: int, contents: str) -> 'Task':
@@ -2,13 +2,8 @@
 -- fn(board_id: int)
 update board
 set task_seq = task_seq + 1
-where id = ?;
-
--- name: select_task_number_sequence
--- fn(board_id: int)
-select task_seq as number
-from board
-where id = ?;
+where id = ?
+returning task_seq as number;
 
 -- name: increment_comment_number_sequence
 -- fn(task_id: int)
@@ -22,22 +17,70 @@ select comment_seq as number
 from task
 where id = ?;
 
+-- name: reserve_task_numbers
+-- fn(board_id: int, count: int)
+-- returns the last of count consecutive task numbers
+update board
+set task_seq = task_seq + :count
+where id = :board_id
+returning task_seq as number;
+
 -- name: create_new_task
 -- fn(number: int, board_id: int, creator_id: int, assignee_id: int, title: str, body: str, created: int)
 insert into task (number, board_id, creator_id, assignee_id, title, body, created)
-values (?, ?, ?, ?, ?, ?, ?);
+values (?, ?, ?, ?, ?, ?, ?)
+returning id;
 
 -- name: query_task_search
-select rowid, title, body, rank
-from task_search
-where task_search match ?
-order by rank;
-
--- name: filter_search_result_by_user
-select t.id
-from task t
-         left join board_user_role bur on t.board_id = bur.board_id
-where bur.user_id = ?;
+-- fn(user_id: int, query: str, limit: int, offset: int)
+-- matches from task title/body, comments and tags are merged
+-- into one row per task, keeping the best ranked match.
+-- \x02 and \x03 delimit matched terms; they are turned into
+-- <mark> tags after the surrounding text has been escaped
+with matches as (select task_search.rowid                                       as task_id,
+                        highlight(task_search, 0, char(2), char(3))             as title,
+                        snippet(task_search, 1, char(2), char(3), '...', 24)    as excerpt,
+                        'task'                                                  as source,
+                        task_search.rank                                        as rank
+                 from task_search
+                 where task_search match :query
+                 union all
+                 select c.task_id,
+                        null,
+                        snippet(task_comment_search, 0, char(2), char(3), '...', 24),
+                        'comment',
+                        task_comment_search.rank
+                 from task_comment_search
+                          join task_comment c on c.id = task_comment_search.rowid
+                 where task_comment_search match :query
+                 union all
+                 select tg.task_id,
+                        null,
+                        highlight(task_tag_search, 0, char(2), char(3)),
+                        'tag',
+                        task_tag_search.rank
+                 from task_tag_search
+                          join task_tag tg on tg.id = task_tag_search.rowid
+                 where task_tag_search match :query)
+select t.id                       as task_id,
+       cu.username                as board_creator,
+       b.symbol                   as board_symbol,
+       t.number                   as number,
+       coalesce(m.title, t.title) as title,
+       m.excerpt                  as excerpt,
+       m.source                   as source,
+       -- the other bare columns come from the row holding the min()
+       min(m.rank)                as best_rank
+from matches m
+         join task t on t.id = m.task_id
+         join board_user_role bur on bur.board_id = t.board_id
+         join board b on b.id = t.board_id
+         join user cu on cu.id = b.creator_id
+where bur.user_id = :user_id
+  and bur.is_accepted = 1
+group by t.id
+order by best_rank, t.id
+limit :limit offset :offset;
 
 -- name: delete_task
 -- fn(task_id: int)
@@ -92,7 +135,7 @@ from task
 where task.id = ?;
 
 -- name: select_tasks_by_board_id
--- fn(board_id: int)
+-- fn(board_id: int, after: int, limit: int)
 select id,
        number,
        board_id,
@@ -104,7 +147,10 @@ select id,
        created,
        modified
 from task
-where task.board_id = ?;
+where task.board_id = :board_id
+  and task.id > :after
+order by task.id
+limit :limit;
 
 -- name: select_task_by_board_number
 -- fn(board_id: int, task_number: int)
@@ -161,6 +207,13 @@ update task
 set status_id = :status_id
 where id = :task_id;
 
+-- name: set_task_status_by_name
+-- fn(task_id: int, name: str)
+update task
+set status_id = (select id from task_status where task_id = :task_id and name = :name)
+where id = :task_id
+returning id, number, board_id, creator_id, assignee_id, status_id, title, body, created, modified;
+
 
 -- name: select_task_statuses
 select id, task_id, name
@@ -178,6 +231,12 @@ select id, task_id, name
 from task_status
 where id = ?;
 
+-- name: set_comment_number_sequence
+-- fn(task_id: int, number: int)
+update task
+set comment_seq = :number
+where id = :task_id;
+
 -- name: create_task_comment
 -- fn(task_id: int, contents: str)
 insert into task_comment
@@ -247,22 +306,62 @@ update task
 set modified = ?
 where id = ?;
 
--- name: user_tasks_summary
--- fn(user_id: int)
+-- name: user_tasks_next_page
+-- fn(user_id: int, last_updated: int, id: int, limit: int)
+-- newest first. Each board contributes at most :limit rows read
+-- in task_board_last_updated_idx order from the cursor, so a page
+-- costs the same however deep it is.
+select b.symbol                                                 as symbol,
+       t.number                                                 as number,
+       t.title                                                  as description,
+       (select name from task_status where id = t.status_id)    as status,
+       (select username from user where id = b.creator_id)      as creator,
+       (select username from user where id = t.assignee_id)     as asignee,
+       t.tag_count                                              as tag_count,
+       t.comment_count                                          as comment_count,
+       coalesce(t.modified, t.created)                          as last_updated,
+       t.id                                                     as id
+from board_user_role bur
+         join board b on b.id = bur.board_id
+         join task t on t.id in (select id
+                                 from task
+                                 where board_id = bur.board_id
+                                   and coalesce(modified, created) <= :last_updated
+                                   and (coalesce(modified, created) < :last_updated or id < :id)
+                                 order by coalesce(modified, created) desc, id desc
+                                 limit :limit)
+where bur.user_id = :user_id
+  and bur.is_accepted = 1
+order by last_updated desc, t.id desc
+limit :limit;
+
+
+-- name: user_tasks_prev_page
+-- fn(user_id: int, last_updated: int, id: int, limit: int)
+-- the rows before the cursor, oldest first
 select b.symbol                                                 as symbol,
        t.number                                                 as number,
        t.title                                                  as description,
        (select name from task_status where id = t.status_id)    as status,
        (select username from user where id = b.creator_id)      as creator,
        (select username from user where id = t.assignee_id)     as asignee,
-       (select count(1) from task_tag where task_id = t.id)     as tag_count,
-       (select count(1) from task_comment where task_id = t.id) as comment_count,
-       coalesce(t.modified, t.created)                          as last_updated
+       t.tag_count                                              as tag_count,
+       t.comment_count                                          as comment_count,
+       coalesce(t.modified, t.created)                          as last_updated,
+       t.id                                                     as id
 from board_user_role bur
-         left join board b on b.id = bur.board_id
-         join task t on b.id = t.board_id
-where bur.user_id = ? and bur.is_accepted = 1
-order by last_updated desc;
+         join board b on b.id = bur.board_id
+         join task t on t.id in (select id
+                                 from task
+                                 where board_id = bur.board_id
+                                   and coalesce(modified, created) >= :last_updated
+                                   and (coalesce(modified, created) > :last_updated or id > :id)
+                                 order by coalesce(modified, created), id
+                                 limit :limit)
+where bur.user_id = :user_id
+  and bur.is_accepted = 1
+order by last_updated, t.id
+limit :limit;
 
 
 -- select b.symbol                                                 as symbol,
@@ -279,3 +378,108 @@ order by last_updated desc;
 --          join task t on b.id = t.board_id
 -- where bur.user_id = ? and bur.is_accepted = 1
 -- order by last_updated desc;
+
+-- name: select_task_tags_by_board_id
+-- fn(board_id: int, after: int, through: int)
+select id, task_id, value
+from task_tag
+where task_id in (select id from task where board_id = :board_id and id > :after and id <= :through)
+order by task_id, id;
+
+-- name: select_task_comments_by_board_id
+-- fn(board_id: int, after: int, through: int)
+select id, task_id, number, user_id, contents, created, modified
+from task_comment
+where task_id in (select id from task where board_id = :board_id and id > :after and id <= :through)
+order by task_id, number desc;
+
+-- name: select_task_comment_users_by_board_id
+-- fn(board_id: int, after: int, through: int)
+select id,
+       username,
+       password,
+       is_admin,
+       is_active,
+       created,
+       modified,
+       version
+from user
+where id in (select user_id
+             from task_comment
+             where task_id in (select id from task where board_id = :board_id and id > :after and id <= :through));
+
+-- name: select_task_events_by_board_id
+-- fn(board_id: int, after: int, through: int)
+select id,
+       task_id,
+       user_id,
+       created,
+       description,
+       change_field,
+       change_old,
+       change_new
+from task_event
+where task_id in (select id from task where board_id = :board_id and id > :after and id <= :through)
+order by task_id, id;
+
+-- name: select_task_statuses_by_board_id
+-- fn(board_id: int, after: int, through: int)
+select id, task_id, name
+from task_status
+where task_id in (select id from task where board_id = :board_id and id > :after and id <= :through)
+order by task_id, name;
+
+-- name: select_task_ids_by_number_range
+-- fn(board_id: int, first: int, last: int)
+select id, status_id
+from task
+where board_id = :board_id
+  and number between :first and :last
+order by number;
+
+-- name: export_tasks_by_board
+-- fn(board_id: int)
+-- tags as a JSON array
+select t.number,
+       t.title,
+       t.body,
+       (select name from task_status where id = t.status_id)                 as status,
+       cu.username                                                           as creator,
+       au.username                                                           as assignee,
+       (select json_group_array(value) from task_tag where task_id = t.id)   as tags,
+       t.created,
+       t.modified
+from task t
+         join user cu on cu.id = t.creator_id
+         left join user au on au.id = t.assignee_id
+where t.board_id = :board_id
+order by t.number;
+
+-- name: export_comments_by_board
+-- fn(board_id: int)
+select t.number as task,
+       c.number,
+       u.username as user,
+       c.contents,
+       c.created,
+       c.modified
+from task t
+         join task_comment c on c.task_id = t.id
+         left join user u on u.id = c.user_id
+where t.board_id = :board_id
+order by t.number, c.number;
+
+-- name: export_events_by_board
+-- fn(board_id: int)
+select t.number as task,
+       u.username as user,
+       e.description,
+       e.change_field,
+       e.change_old,
+       e.change_new,
+       e.created
+from task t
+         join task_event e on e.task_id = t.id
+         left join user u on u.id = e.user_id
+where t.board_id = :board_id
+order by t.number, e.id;
@@ -4,8 +4,11 @@ Task module
 
 """
 
+import io
 from datetime import datetime
-from flask import Blueprint, render_template, Response, redirect, session, flash, request, url_for, abort
+from flask import Blueprint, render_template, stream_template, Response, redirect, session, flash, request, url_for, abort, jsonify
+from src.conditional import board_validator, user_boards_validator
+from src.importer import FORMATS, format_for, import_tasks
 from src.todo.auth.models import User
 from src.todo.board.models import Board
 from src.todo.task.models import Task
@@ -34,15 +37,20 @@ def tasks():
         flash("please log in")
         return redirect("/")
 
-    user_tasks = Task.user_tasks(user)
+    validator = user_boards_validator(user)
+    if validator.is_fresh():
+        return validator.not_modified()
 
-    return Response(
-        response=render_template(
+    page = Task.user_tasks(user, request.args.get("cursor"))
+
+    return validator.apply(Response(
+        response=stream_template(
             "task/task_list.html",
-            tasks=user_tasks,
+            tasks=page.items,
+            page=page,
             view_name="Tasks"
         ),
-    )
+    ))
 
 
 @task_bp.get("/<username>/<symbol>")
@@ -57,19 +65,25 @@ def tasks_by_board(username: str, symbol: str):
 
     creator = User.select_by_username(username)
     board = Board.select_by_creator_symbol(creator.id, symbol)
-    board_tasks = board.board_tasks(user, board.id)
 
     if not board.user_can_view(user):
         flash("not authorized")
         return redirect("/")
 
-    return Response(
-        response=render_template(
+    validator = board_validator(user, board)
+    if validator.is_fresh():
+        return validator.not_modified()
+
+    page = board.board_tasks(user, board.id, request.args.get("cursor"))
+
+    return validator.apply(Response(
+        response=stream_template(
             "task/task_list.html",
-            tasks=board_tasks,
+            tasks=page.items,
+            page=page,
             view_name=f"{board.symbol} Tasks"
         ),
-    )
+    ))
 
 
 @task_bp.get("/<username>/<symbol>/<number>")
@@ -85,10 +99,14 @@ def tasks_detail_get(username: str, symbol: str, number: int):
     creator = User.select_by_username(username)
     board = Board.select_by_creator_symbol(creator.id, symbol)
 
-    if user != board.creator and not board.user_can_view(user):
+    if not board.user_can_view(user):
         flash("not authorized")
         return redirect("/")
 
+    validator = board_validator(user, board)
+    if validator.is_fresh():
+        return validator.not_modified()
+
     task = board.get_task(number)
 
     assignee_username = None
@@ -100,7 +118,7 @@ def tasks_detail_get(username: str, symbol: str, number: int):
         name for name in board.board_users()
     ]
 
-    return Response(
+    return validator.apply(Response(
         response=render_template(
             "task/task_detail.html",
             creator=creator,
@@ -109,7 +127,7 @@ def tasks_detail_get(username: str, symbol: str, number: int):
             assignee=assignee_username,
             possible_assignees=possible_assignees,
         )
-    )
+    ))
 
 
 @task_bp.post("/<username>/<symbol>/<number>")
@@ -128,7 +146,7 @@ def task_detail_post(username: str, symbol: str, number: int):
         return redirect("/")
 
     board = Board.select_by_creator_symbol(creator.id, symbol)
-    if user != board.creator and not board.user_can_edit(user):
+    if not board.user_can_edit(user):
         flash("not authorized")
         return redirect("/")
 
@@ -187,7 +205,7 @@ def task_create_get():
         flash("please sign in")
         return redirect("/")
 
-    user_boards = Board.user_boards(user)
+    user_boards = Board.all_user_boards(user)
 
     return Response(
         response=render_template(
@@ -217,7 +235,7 @@ def task_create_post():
     if not board:
         abort(404, "board not found")
 
-    if user != board.creator and not board.user_can_edit(user):
+    if not board.user_can_edit(user):
         flash("not authorized")
         return redirect("/")
 
@@ -228,6 +246,50 @@ def task_create_post():
     return redirect("/tasks")
 
 
+@task_bp.post("/<username>/<symbol>/import")
+def tasks_import(username: str, symbol: str):
+    """
+    Bulk import tasks into the board from CSV or JSON Lines,
+    sent as a "file" upload or as the request body, of at most
+    MAX_CONTENT_LENGTH bytes
+    """
+    user = User.from_flask_session(session)
+    if not user:
+        flash("please sign in")
+        return redirect("/")
+
+    creator = User.select_by_username(username)
+    if not creator:
+        abort(404, "board not found")
+
+    board = Board.select_by_creator_symbol(creator.id, symbol)
+    if not board:
+        abort(404, "board not found")
+
+    if not board.user_can_create(user):
+        flash("not authorized")
+        return redirect("/")
+
+    upload = request.files.get("file")
+    if upload:
+        stream, fmt = upload.stream, format_for(upload.filename, upload.mimetype)
+    else:
+        stream, fmt = request.stream, format_for(mimetype=request.mimetype)
+
+    fmt = request.args.get("format", fmt)
+    if fmt not in FORMATS:
+        abort(400, f"format must be one of {', '.join(FORMATS)}")
+
+    result = import_tasks(
+        board, user, io.TextIOWrapper(stream, encoding="utf-8", newline=""), fmt
+    )
+    return jsonify(
+        imported=result.imported,
+        skipped=result.skipped,
+        errors=result.errors,
+    )
+
+
 @task_bp.post("/<username>/<symbol>/<number>/comment/new")
 def task_new_comment(username: str, symbol: str, number: int):
     user = User.from_flask_session(session)
@@ -238,7 +300,7 @@ def task_new_comment(username: str, symbol: str, number: int):
     creator = User.select_by_username(username)
     board = Board.select_by_creator_symbol(creator.id, symbol)
 
-    if user != board.creator and not board.user_can_edit(user):
+    if not board.user_can_edit(user):
         flash("not authorized")
         return redirect("/")
 
@@ -263,7 +325,7 @@ def task_delete_comment(username: str, symbol: str, number: int, comment: int):
 
     creator = User.select_by_username(username)
     board = Board.select_by_creator_symbol(creator.id, symbol)
-    if user != board.creator and not board.user_can_edit(user):
+    if not board.user_can_edit(user):
         flash("not authorized")
         return redirect("/")
 
@@ -46,6 +46,21 @@ def captured_templates(app):
         template_rendered.disconnect(record, app)
 
 
+@pytest.fixture
+def executed_queries(app):
+    """
+    SQL statements run against the (single) in-memory connection
+    """
+    recorded = []
+    with app.database as db:
+        db.set_trace_callback(recorded.append)
+    try:
+        yield recorded
+    finally:
+        with app.database as db:
+            db.set_trace_callback(None)
+
+
 @pytest.fixture()
 def runner(app: Flask) -> FlaskCliRunner:
     return app.test_cli_runner()
@@ -1,6 +1,13 @@
+from hashlib import scrypt
+
 import pytest
+from flask import Flask
 
-from src.todo.auth.models import User
+from src.config import MIGRATIONS
+from src.database import Database
+from src.migrator import Migration, Migrator
+from src.todo.auth.models import User, queries
+from src.todo.auth.passwords import ScryptParams, decode_hash, encode_hash
 from flask_wtf.csrf import generate_csrf
 
 
@@ -102,3 +109,197 @@ def test_create_admin_user(app):
 
 # def test_reject_unauthorized_user():
 #     return
+
+
+def test_settings_streams_admin_user_list(app, client):
+    with app.app_context():
+        User.create_admin("admin", b"admin")
+    client.post("/login", data={"username": "admin", "password": "admin"})
+
+    response = client.get("/settings")
+    assert response.status_code == 200
+    assert response.is_streamed
+    body = response.get_data(as_text=True)
+    assert "testuser" in body
+    assert "admin" in body
+
+
+def test_settings_stream_holds_no_connection(app, client):
+    app.config["STREAM_BATCH_SIZE"] = 2
+    with app.app_context():
+        User.create_admin("admin", b"admin")
+        for i in range(5):
+            User.create_user(f"user{i}", b"password")
+    client.post("/login", data={"username": "admin", "password": "admin"})
+
+    response = client.get("/settings")
+    chunks = list()
+    for chunk in response.response:
+        # the client is being written to: no connection is checked out
+        assert app.database.stats().in_use == 0
+        chunks.append(chunk.decode() if isinstance(chunk, bytes) else chunk)
+    response.close()
+
+    body = "".join(chunks)
+    assert all(f"user{i}" in body for i in range(5))
+
+
+def test_password_hashes_are_salted_per_user(app):
+    with app.app_context():
+        first = User.create_user("first", b"same password")
+        second = User.create_user("second", b"same password")
+
+    first_params, first_salt, first_digest = decode_hash(first.password)
+    second_params, second_salt, second_digest = decode_hash(second.password)
+    assert first.password.startswith("scrypt$1024$1$1$")
+    assert first_params == second_params == ScryptParams(1024, 1, 1)
+    assert len(first_salt) == 16
+    assert first_salt != second_salt
+    assert first_digest != second_digest
+
+
+def test_legacy_password_hashes_are_migrated():
+    app = Flask(__name__)
+    app.config.update(DATABASE_PATH=":memory:")
+    database = Database(app)
+    migrator = Migrator()
+    split = MIGRATIONS.index(Migration("todo", "auth", "0002_kdf_params.sql")) + 1
+    digest = scrypt(b"legacy", salt=b"test", n=16384, r=1, p=1)
+
+    with database as db:
+        migrator.init_migrations(db)
+        migrator.apply_migrations(db, MIGRATIONS[:split])
+        db.execute(
+            "insert into user (username, password, created) values (?, ?, ?)",
+            ("legacy", digest, 0),
+        )
+        migrator.apply_migrations(db, MIGRATIONS[split:])
+        password, = db.execute("select password from user").fetchone()
+    database.close()
+
+    assert password == f"scrypt$16384$1$1$${digest.hex()}"
+
+
+def test_outdated_password_hash_is_replaced_on_login(app, client):
+    legacy = encode_hash(
+        ScryptParams(16384, 1, 1), b"",
+        scrypt(b"usertest", salt=b"test", n=16384, r=1, p=1),
+    )
+    with app.app_context():
+        with app.database as db:
+            db.execute("update user set password = ? where username = 'testuser'", (legacy,))
+            db.commit()
+        assert User.select_by_username("testuser").password_needs_rehash
+
+    response = client.post("/login", data={"username": "testuser", "password": "usertest"})
+    assert response.status_code == 302
+    assert "login failed" not in response.get_data(as_text=True)
+
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        assert user.password != legacy
+        assert not user.password_needs_rehash
+        assert user.verify_password(b"usertest")
+        assert not user.verify_password(b"wrong")
+
+        app.config["KDF_N"] = 2048
+        assert user.password_needs_rehash
+        assert user.verify_password(b"usertest")
+        assert User.select_by_username("testuser").password.startswith("scrypt$2048$1$1$")
+
+
+def test_authenticated_requests_validate_session_from_cache(app, client, executed_queries):
+    executed_queries.clear()
+    assert client.get("/boards/").status_code == 200
+    assert not any("password" in sql for sql in executed_queries)
+    assert sum("select version" in sql for sql in executed_queries) == 1
+
+    executed_queries.clear()
+    assert client.get("/boards/").status_code == 200
+    assert not any("from user" in sql and "select version" in sql for sql in executed_queries)
+    assert not any("password" in sql for sql in executed_queries)
+
+
+def test_user_version_bumps_on_access_changes(app):
+    with app.app_context():
+        user = User.create_user("versioned", b"password")
+        assert user.version == 0
+
+        with app.database as db:
+            db.execute("update user set is_admin = 1 where id = ?", (user.id,))
+            db.execute("update user set username = 'renamed' where id = ?", (user.id,))
+            db.execute("update user set is_active = 1 where id = ?", (user.id,))
+            db.commit()
+
+    with app.app_context():
+        assert User.select_by_id(user.id).version == 1
+
+
+def test_deactivated_user_session_ends(app, client):
+    assert client.get("/boards/").status_code == 200
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        with app.database as db:
+            db.execute("update user set is_active = 0 where id = ?", (user.id,))
+            db.commit()
+
+    assert client.get("/boards/").status_code == 200
+    app.user_versions.invalidate(user.id)
+
+    assert client.get("/boards/").status_code == 302
+    with client.session_transaction() as s:
+        assert "user" not in s
+
+
+def test_password_rehash_keeps_other_sessions(app, client):
+    assert client.get("/boards/").status_code == 200
+
+    app.config["KDF_N"] = 2048
+    other = app.test_client()
+    response = other.post("/login", data={"username": "testuser", "password": "usertest"})
+    assert response.status_code == 302
+
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        assert user.password.startswith("scrypt$2048$")
+        assert user.version == 0
+    app.user_versions.invalidate(user.id)
+
+    assert client.get("/boards/").status_code == 200
+    assert other.get("/boards/").status_code == 200
+
+
+def test_password_change_ends_sessions(app, client):
+    assert client.get("/boards/").status_code == 200
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        with app.database as db:
+            queries.update_user_password(db, user_id=user.id, password=User.hash_password(b"changed"))
+            db.commit()
+    app.user_versions.invalidate(user.id)
+
+    assert client.get("/boards/").status_code == 302
+
+
+def test_password_changed_outside_the_app_ends_sessions(app, client):
+    assert client.get("/boards/").status_code == 200
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        with app.database as db:
+            db.execute(
+                "update user set password = ? where id = ?",
+                (User.hash_password(b"reset"), user.id),
+            )
+            db.commit()
+    app.user_versions.invalidate(user.id)
+
+    assert client.get("/boards/").status_code == 302
+
+
+def test_navigation_links_shown_when_logged_in(app, client):
+    response = client.get("/boards/")
+    assert b'href="/settings' in response.data
+
+    client.get("/logout")
+    response = client.get("/")
+    assert b'href="/settings' not in response.data
@@ -1,5 +1,5 @@
 import pytest
-from src.todo.auth.models import User
+from src.todo.auth.models import Capability, User
 from src.todo.board.models import Board, BoardStatus
 from src.todo.task.models import Task
 
@@ -17,6 +17,32 @@ def test_new_board(app):
         assert board.modified is None
 
 
+def test_multi_step_mutations_commit_once(app, executed_queries):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+
+        executed_queries.clear()
+        board = Board.new_board("TST", "test board", user)
+        assert executed_queries.count("COMMIT") == 1
+        assert board.current_status.name == "todo"
+        assert board.user_can_view(user)
+
+        task = board.new_task(creator=user, title="task", body="")
+
+        executed_queries.clear()
+        task = task.set_status(user, "completed")
+        assert executed_queries.count("COMMIT") == 1
+        assert task.status.name == "completed"
+
+        executed_queries.clear()
+        task = task.new_comment(user, "comment")
+        assert executed_queries.count("COMMIT") == 1
+
+        executed_queries.clear()
+        board.delete()
+        assert executed_queries.count("COMMIT") == 1
+
+
 def test_select_board_by_id(app):
     with app.app_context():
         user = User.create_user("test", b"test")
@@ -210,3 +236,88 @@ def test_board_user_invite_permission(app):
         assert board.user_can_invite(manager) is True
 
         assert board.user_can_invite(creator) is True
+
+
+def test_board_capabilities_resolve_once_per_request(app, executed_queries):
+    with app.app_context():
+        creator = User.create_user("auth", b"user")
+        collaborator = User.create_user("collab", b"user")
+        board = Board.new_board("B", "Board", creator)
+        board.set_user_role(creator, collaborator, "collaborator")
+        board.accept_user_role(collaborator.id)
+
+    with app.app_context():
+        executed_queries.clear()
+        assert board.capabilities(collaborator) == Capability.ALL & ~Capability.INVITE
+        assert board.user_can_view(collaborator)
+        assert board.user_can_edit(collaborator)
+        assert not board.user_can_invite(collaborator)
+        assert board.capabilities(creator) == Capability.ALL
+        assert sum("board_user_role" in sql for sql in executed_queries) == 1
+
+        board.decline_user_role(collaborator.id)
+        assert board.capabilities(collaborator) == Capability.NONE
+
+
+def test_role_capabilities_are_data_driven(app):
+    with app.app_context():
+        creator = User.create_user("auth", b"user")
+        viewer = User.create_user("viewer", b"user")
+        board = Board.new_board("B", "Board", creator)
+        board.set_user_role(creator, viewer, "viewer")
+        board.accept_user_role(viewer.id)
+        assert board.capabilities(viewer) == Capability.VIEW
+
+    with app.app_context():
+        with app.database as db:
+            db.execute(
+                "update role set capabilities = ? where name = 'viewer'",
+                (Capability.VIEW | Capability.CREATE,),
+            )
+            db.commit()
+        assert board.user_can_create(viewer)
+        assert not board.user_can_edit(viewer)
+
+
+def test_board_hydration_query_count(app, executed_queries):
+    def board_selects(board_id: int) -> int:
+        executed_queries.clear()
+        with app.app_context():
+            board = Board.select_by_id(board_id)
+            assert board.current_status.name == "todo"
+            assert board.creator.username == "creator"
+            for task in board.tasks:
+                assert task.status.name == "todo"
+                assert task.comments[0].user
+                assert task.events
+                assert task.tags is not None
+        return board, len([
+            q for q in executed_queries if q.lstrip().lower().startswith("select")
+        ])
+
+    with app.app_context():
+        creator = User.create_user("creator", b"user")
+        small = Board.new_board("S", "small", creator)
+        large = Board.new_board("L", "large", creator)
+
+        small.new_task(creator, "task", "body").new_comment(creator, "comment")
+        for i in range(20):
+            commenter = User.create_user(f"commenter{i}", b"user")
+            task = large.new_task(creator, f"task {i}", "body")
+            task = task.new_comment(commenter, "comment")
+            task.add_tag(commenter, f"tag{i}")
+
+    small_board, small_count = board_selects(small.id)
+    large_board, large_count = board_selects(large.id)
+
+    assert len(small_board.tasks) == 1
+    assert len(large_board.tasks) == 20
+    assert small_count == large_count
+    assert large_count <= 9
+
+    task = large_board.tasks[3]
+    assert task.status.name == "todo"
+    assert len(task.possible_statuses) == 2
+    assert task.comments[0].user.username == "commenter3"
+    assert [t.value for t in task.tags] == ["tag3"]
+    assert len(task.events) == 4
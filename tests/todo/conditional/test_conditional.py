@@ -0,0 +1,170 @@
+import pytest
+
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+
+BOARD_PAGES = ("/boards/testuser/TB", "/tasks/testuser/TB", "/tasks/testuser/TB/1")
+
+
+@pytest.fixture
+def board(app, client) -> Board:
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        board = Board.new_board("TB", "Test Board", user)
+        board.new_task(user, "Task", "Body", user)
+    return board
+
+
+def get(client, url: str, headers: dict = None):
+    # list pages are streamed; consume them so their contexts are popped
+    response = client.get(url, headers=headers)
+    response.get_data()
+    response.close()
+    return response
+
+
+@pytest.mark.parametrize("url, max_queries", [
+    # session, user and board lookups (both may come from the identity
+    # map) and the revision probe; nothing else is hydrated or rendered
+    *((url, 4) for url in BOARD_PAGES),
+    # session and the probe over every accepted board
+    ("/tasks/", 2),
+])
+def test_unchanged_page_is_not_modified(client, board, url, max_queries, executed_queries, captured_templates):
+    first = get(client, url)
+    assert first.status_code == 200
+
+    executed_queries.clear()
+    captured_templates.clear()
+    response = get(client, url, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == first.headers["ETag"]
+    assert captured_templates == []
+    assert len(executed_queries) <= max_queries
+    assert sum("revision" in sql for sql in executed_queries) == 1
+    assert not any("from task" in sql for sql in executed_queries)
+
+
+def test_if_modified_since_alone_is_not_enough(app, client, board):
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        other = User.create_user("other", b"password")
+        board = Board.select_by_id(board.id)
+        board.set_user_role(user, other, "viewer")
+        board.accept_user_role(other.id)
+    viewer = app.test_client()
+    viewer.post("/login", data={"username": "other", "password": "password"})
+
+    first = get(viewer, "/boards/testuser/TB")
+    assert first.status_code == 200
+
+    with app.app_context():
+        revised = board.revision()[1]
+        board.set_user_role(user, other, "collaborator")
+        with app.database as db:
+            # a change within the same second keeps the date
+            db.execute("update board set revised = ? where id = ?", (revised, board.id))
+            db.commit()
+
+    response = get(viewer, "/boards/testuser/TB", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first.headers["ETag"]
+
+
+@pytest.mark.parametrize("url", BOARD_PAGES + ("/tasks/",))
+def test_task_changes_are_revalidated(app, client, board, url):
+    first = get(client, url)
+
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        Board.select_by_id(board.id).get_task(1).new_comment(user, "changed")
+
+    response = get(client, url, headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first.headers["ETag"]
+
+
+def test_board_revision_bumps(app, board):
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        other = User.create_user("other", b"password")
+        board = Board.select_by_id(board.id)
+        revision = board.revision()[0]
+
+        board.rename_board(user, "Renamed")
+        assert board.revision()[0] == revision + 1
+
+        board.set_user_role(user, other, "viewer")
+        assert board.revision()[0] == revision + 2
+
+        task = board.get_task(1)
+        task.set_title(user, "Retitled")
+        assert board.revision()[0] > revision + 2
+
+        revision = board.revision()[0]
+        task.delete(user)
+        assert board.revision()[0] > revision
+
+
+def test_unrelated_boards_keep_task_list_fresh(app, client, board):
+    first = get(client, "/tasks/")
+
+    with app.app_context():
+        other = User.create_user("other", b"password")
+        Board.new_board("OB", "Other Board", other).new_task(other, "Task", "")
+
+    response = get(client, "/tasks/", headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 304
+
+
+def test_pending_flashes_are_rendered(client, board):
+    first = get(client, "/boards/testuser/TB")
+    with client.session_transaction() as s:
+        s["_flashes"] = [("message", "pending")]
+
+    response = get(client, "/boards/testuser/TB", headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert b"pending" in response.data
+
+
+def test_validators_are_per_viewer(app, client, board):
+    etag = get(client, "/boards/testuser/TB").headers["ETag"]
+
+    with app.app_context():
+        User.create_user("other", b"password")
+    other = app.test_client()
+    other.post("/login", data={"username": "other", "password": "password"})
+
+    response = get(other, "/boards/testuser/TB", headers={"If-None-Match": etag})
+    assert response.status_code == 302
+
+
+def test_task_list_follows_swapped_boards(app, client):
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        other = User.create_user("other", b"password")
+        left = Board.new_board("LEFT", "Left", other)
+        joined = Board.new_board("JOIN", "Joined", other)
+        Board.new_board("TB", "Test Board", user)
+
+        left.set_user_role(other, user, "viewer")
+        left.accept_user_role(user.id)
+
+        revision = left.revision()[0]
+
+    first = get(client, "/tasks/")
+
+    with app.app_context():
+        left.delete_user_role(other, user)
+        joined.set_user_role(other, user, "viewer")
+        joined.accept_user_role(user.id)
+        with app.database as db:
+            # the same count, revision total and highest id as before
+            db.execute("update board set revision = ? where id = ?", (revision, joined.id))
+            db.commit()
+
+    response = get(client, "/tasks/", headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != first.headers["ETag"]
@@ -0,0 +1,68 @@
+from src.counters import check_counters, check_counters_command
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+
+
+def _counters(app, table: str, row_id: int, *columns: str) -> tuple:
+    with app.database as db:
+        return db.execute(
+            f"select {', '.join(columns)} from {table} where id = ?", (row_id,)
+        ).fetchone()
+
+
+def test_triggers_maintain_counters(app):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        other = User.create_user("other", b"other")
+        board = Board.new_board("TST", "test board", user)
+        task = board.new_task(user, "Task", "")
+        board.new_task(user, "Second", "")
+
+        task.add_tag(user, "one")
+        task.add_tag(user, "two")
+        task.remove_tag(user, "one")
+        task.new_comment(user, "first")
+        task.new_comment(user, "second")
+        task.delete_comment(user, 1)
+
+        assert _counters(app, "task", task.id, "tag_count", "comment_count") == (1, 1)
+        assert _counters(app, "board", board.id, "task_count", "accepted_count") == (2, 1)
+        assert _counters(app, "user", user.id, "task_count", "board_count") == (2, 1)
+
+        board.set_user_role(user, other, "viewer")
+        assert _counters(app, "board", board.id, "accepted_count") == (1,)
+        board.accept_user_role(other.id)
+        assert _counters(app, "board", board.id, "accepted_count") == (2,)
+        board.delete_user_role(user, other)
+        assert _counters(app, "board", board.id, "accepted_count") == (1,)
+
+        task.delete(user)
+        assert _counters(app, "board", board.id, "task_count") == (1,)
+        assert _counters(app, "user", user.id, "task_count") == (1,)
+
+        board.delete()
+        assert _counters(app, "user", user.id, "task_count", "board_count") == (0, 0)
+
+        with app.database as db:
+            assert check_counters(db) == []
+
+
+def test_check_counters_command_repairs_drift(app, runner):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        board = Board.new_board("TST", "test board", user)
+        board.new_task(user, "Task", "")
+
+    with app.database as db:
+        db.execute("update board set task_count = 5 where id = ?", (board.id,))
+
+    result = runner.invoke(check_counters_command)
+    assert result.exit_code == 1
+    assert f"board.task_count id={board.id}: stored 5, actual 1" in result.output
+
+    result = runner.invoke(check_counters_command, ["--repair"])
+    assert result.exit_code == 0
+    assert "repaired 1 counter(s)" in result.output
+
+    with app.database as db:
+        assert check_counters(db) == []
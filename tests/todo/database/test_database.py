@@ -0,0 +1,284 @@
+import sqlite3
+import threading
+
+import pytest
+from flask import Flask
+
+from src.database import Database, PoolTimeout, is_write
+
+
+@pytest.fixture
+def file_database(tmp_path) -> Database:
+    app = Flask(__name__)
+    app.config.update(
+        DATABASE_PATH=str(tmp_path / "pool.db"),
+        DATABASE_MUTEX_TIMEOUT=1,
+        DATABASE_POOL_SIZE=2,
+        DATABASE_POOL_TIMEOUT=0.1,
+    )
+    database = Database(app)
+    with database as db:
+        db.execute("create table item (id integer primary key, value text)")
+    yield database
+    database.close()
+
+
+def test_memory_database_uses_single_connection(app):
+    assert app.database.pool_size == 1
+    with app.database as first:
+        pass
+    with app.database as second:
+        pass
+    assert first is second
+
+
+def test_nested_checkout_shares_connection(file_database):
+    with file_database as outer:
+        with file_database as inner:
+            assert outer is inner
+        assert file_database.stats().in_use == 1
+    assert file_database.stats().in_use == 0
+
+
+def test_threads_get_separate_connections(file_database):
+    barrier = threading.Barrier(2)
+    seen = []
+
+    def worker():
+        with file_database as db:
+            seen.append(db)
+            barrier.wait(timeout=5)
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(seen) == 2
+    assert seen[0] is not seen[1]
+    assert file_database.stats().checkouts == 3
+
+
+def test_checkout_timeout(file_database):
+    held = threading.Event()
+    release = threading.Event()
+    result = []
+
+    def holder():
+        with file_database:
+            held.set()
+            release.wait(timeout=5)
+
+    def waiter():
+        try:
+            with file_database:
+                result.append("checked out")
+        except PoolTimeout:
+            result.append("timeout")
+
+    with file_database:
+        thread = threading.Thread(target=holder)
+        thread.start()
+        held.wait(timeout=5)
+
+        blocked = threading.Thread(target=waiter)
+        blocked.start()
+        blocked.join()
+
+        release.set()
+        thread.join()
+
+    stats = file_database.stats()
+    assert result == ["timeout"]
+    assert stats.checkout_timeouts == 1
+    assert stats.checkout_wait_max >= 0.1
+
+
+def test_uncommitted_writes_commit_on_exit(file_database):
+    with file_database as db:
+        db.execute("insert into item (value) values ('a')")
+        assert db.holds_writer
+
+    assert not db.holds_writer
+    with file_database as db:
+        assert db.execute("select value from item").fetchall() == [("a",)]
+
+
+def test_failed_block_rolls_back(file_database):
+    with pytest.raises(RuntimeError):
+        with file_database as db:
+            db.execute("insert into item (value) values ('a')")
+            raise RuntimeError()
+
+    with file_database as db:
+        assert db.execute("select count(1) from item").fetchone()[0] == 0
+
+
+def test_transaction_defers_commits_to_outermost_scope(file_database):
+    with file_database.transaction() as db:
+        db.execute("insert into item (value) values ('a')")
+        db.commit()
+        with file_database.transaction():
+            db.execute("insert into item (value) values ('b')")
+            db.commit()
+        assert db.in_transaction
+        assert db.holds_writer
+
+    assert not db.in_transaction
+    assert not db.holds_writer
+    with file_database as db:
+        assert db.execute("select value from item").fetchall() == [("a",), ("b",)]
+
+
+@pytest.mark.parametrize("sql, writes", [
+    ("select 1", False),
+    ("  -- leading comment\n  select 1", False),
+    ("with t as (select 1) select * from t", False),
+    ("with t as (select 1) insert into item (value) select * from t", True),
+    ("with t as (select 1) update item set value = 'x'", True),
+    ("pragma table_info(item)", False),
+    ("pragma journal_mode = wal", True),
+    ("pragma wal_checkpoint(truncate)", True),
+    ("begin", False),
+    ("begin immediate", True),
+    ("/* comment */ insert into item (value) values ('a')", True),
+    ("vacuum", True),
+    ("analyze", True),
+])
+def test_statements_are_classified(sql, writes):
+    assert is_write(sql) is writes
+
+
+def test_transaction_takes_writer_as_it_begins(file_database):
+    with file_database.transaction() as db:
+        assert db.holds_writer
+        db.execute("select count(1) from item").fetchone()
+        db.execute("with t as (select 'a') insert into item (value) select * from t")
+
+    assert not db.holds_writer
+    with file_database as db:
+        assert db.execute("select value from item").fetchall() == [("a",)]
+
+
+def test_read_then_write_transaction_is_not_overtaken(file_database):
+    with file_database as db:
+        db.execute("pragma journal_mode = wal")
+
+    def writer():
+        with file_database as db:
+            db.execute("insert into item (value) values ('other')")
+
+    with file_database.transaction() as db:
+        db.execute("select count(1) from item").fetchone()
+        thread = threading.Thread(target=writer)
+        thread.start()
+        thread.join(timeout=0.2)
+        assert thread.is_alive()
+        # a deferred transaction would fail here with SQLITE_BUSY_SNAPSHOT
+        db.execute("insert into item (value) values ('mine')")
+
+    thread.join()
+    with file_database as db:
+        assert db.execute("select value from item order by id").fetchall() == [("mine",), ("other",)]
+
+
+def test_transaction_rolls_back_every_step(file_database):
+    with pytest.raises(RuntimeError):
+        with file_database.transaction() as db:
+            db.execute("insert into item (value) values ('a')")
+            db.commit()
+            raise RuntimeError()
+
+    assert not db.holds_writer
+    with file_database as db:
+        assert db.execute("select count(1) from item").fetchone()[0] == 0
+
+
+def test_nested_transaction_rolls_back_to_savepoint(file_database):
+    with file_database.transaction() as db:
+        db.execute("insert into item (value) values ('kept')")
+        with pytest.raises(RuntimeError):
+            with file_database.transaction():
+                db.execute("insert into item (value) values ('undone')")
+                raise RuntimeError()
+        assert db.transaction_depth == 1
+
+    with file_database as db:
+        assert db.execute("select value from item").fetchall() == [("kept",)]
+
+
+def test_snapshot_is_read_only_and_does_not_block_writers(file_database):
+    with file_database as db:
+        db.execute("pragma journal_mode = wal")
+        db.execute("insert into item (value) values ('before')")
+
+    with file_database.snapshot() as snapshot:
+        with file_database as db:
+            db.execute("insert into item (value) values ('after')")
+            db.commit()
+
+        assert snapshot.execute("select value from item").fetchall() == [("before",)]
+        with pytest.raises(sqlite3.OperationalError):
+            snapshot.execute("insert into item (value) values ('x')")
+
+    with file_database.snapshot() as snapshot:
+        assert snapshot.execute("select count(1) from item").fetchone() == (2,)
+
+
+def test_writes_are_serialized(file_database):
+    started = threading.Event()
+    order = []
+
+    def writer():
+        with file_database as db:
+            started.wait(timeout=5)
+            db.execute("insert into item (value) values ('second')")
+            order.append("second")
+
+    with file_database as db:
+        db.execute("insert into item (value) values ('first')")
+        thread = threading.Thread(target=writer)
+        thread.start()
+        started.set()
+        thread.join(timeout=0.2)
+        order.append("first")
+
+    thread.join()
+    assert order == ["first", "second"]
+
+
+def test_pragma_profile_applied_to_every_connection(tmp_path):
+    app = Flask(__name__)
+    app.config.update(
+        DATABASE_PATH=str(tmp_path / "profile.db"),
+        DATABASE_POOL_SIZE=2,
+        DATABASE_JOURNAL_MODE="WAL",
+        DATABASE_SYNCHRONOUS="NORMAL",
+        DATABASE_BUSY_TIMEOUT=1234,
+        DATABASE_FOREIGN_KEYS="ON",
+        DATABASE_TEMP_STORE="MEMORY",
+    )
+    database = Database(app)
+    connections = [database.checkout(), database.checkout()]
+    try:
+        for db in connections:
+            assert db.execute("pragma journal_mode").fetchone()[0] == "wal"
+            assert db.execute("pragma synchronous").fetchone()[0] == 1
+            assert db.execute("pragma busy_timeout").fetchone()[0] == 1234
+            assert db.execute("pragma foreign_keys").fetchone()[0] == 1
+            assert db.execute("pragma temp_store").fetchone()[0] == 2
+    finally:
+        for db in connections:
+            database.checkin(db)
+        database.close()
+
+
+def test_pragma_profile_rejects_invalid_values():
+    app = Flask(__name__)
+    app.config.update(
+        DATABASE_PATH=":memory:",
+        DATABASE_JOURNAL_MODE="WAL; drop table user",
+    )
+    with pytest.raises(ValueError):
+        Database(app)
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+
+from src.exporter import export_command, export_records, serialize
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+
+
+def _seed(app):
+    with app.app_context():
+        user = User.select_by_username("testuser") or User.create_user("testuser", b"usertest")
+        other = User.create_user("other", b"other")
+        board = Board.new_board("TST", "test board", user)
+        task = board.new_task(user, "Paint the fence", "white", assignee=other)
+        task.add_tag(user, "outside")
+        task.new_comment(user, "needs two coats")
+        board.new_task(user, "Mow the lawn", "")
+        Board.new_board("OTH", "other board", other)
+    return user, board
+
+
+def test_export_records(app):
+    user, board = _seed(app)
+
+    records = list(export_records(app.database, board_id=board.id))
+    assert [r["type"] for r in records] == ["board", "task", "task", "comment"] + ["event"] * 6
+
+    board_record, fence, lawn, comment = records[:4]
+    assert board_record["board"] == "testuser/TST"
+    assert board_record["status"] == "todo"
+    assert (fence["number"], fence["title"], fence["status"]) == (1, "Paint the fence", "todo")
+    assert (fence["assignee"], fence["tags"]) == ("other", ["outside"])
+    assert (lawn["assignee"], lawn["tags"]) == (None, [])
+    assert (comment["task"], comment["number"], comment["user"], comment["contents"]) == \
+           (1, 1, "testuser", "needs two coats")
+    assert [(r["task"], r["description"]) for r in records[4:6]] == [(1, "created task"), (1, "update")]
+
+    boards = [r["board"] for r in export_records(app.database, user_id=user.id) if r["type"] == "board"]
+    assert boards == ["testuser/TST"]
+
+
+def test_serialize_chunks_lines(app):
+    _, board = _seed(app)
+
+    chunks = list(serialize(export_records(app.database, board_id=board.id), "jsonl", chunk_size=1))
+    assert len(chunks) == 10
+    assert all(chunk.endswith("\n") for chunk in chunks)
+
+    [text] = serialize(export_records(app.database, board_id=board.id), "csv")
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert rows[1]["title"] == "Paint the fence"
+    assert rows[1]["tags"] == "outside"
+    assert rows[3]["contents"] == "needs two coats"
+
+
+def test_export_endpoints(app, client):
+    _seed(app)
+
+    response = client.get("/boards/testuser/TST/export")
+    assert response.is_streamed
+    assert response.mimetype == "application/x-ndjson"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="testuser-TST.jsonl"'
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert records[1]["title"] == "Paint the fence"
+
+    response = client.get("/boards/export?format=csv")
+    assert response.mimetype == "text/csv"
+    assert {row["board"] for row in csv.DictReader(io.StringIO(response.get_data(as_text=True)))} == \
+           {"testuser/TST"}
+
+    assert client.get("/boards/testuser/TST/export?format=xml").status_code == 400
+    assert client.get("/boards/other/OTH/export").status_code == 302
+
+
+def test_export_command(app, runner):
+    _seed(app)
+
+    result = runner.invoke(export_command, ["--board", "testuser/TST"])
+    assert result.exit_code == 0
+    assert len(result.output.splitlines()) == 10
+
+    result = runner.invoke(export_command, ["--user", "other", "--format", "csv"])
+    assert result.exit_code == 0
+    assert "other/OTH" in result.output
+
+    result = runner.invoke(export_command, [])
+    assert result.exit_code == 2
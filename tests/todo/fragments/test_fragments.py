@@ -0,0 +1,92 @@
+import sys
+
+from flask import Flask
+from markupsafe import Markup
+
+from src.fragments import FragmentCache
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+
+
+def fragment_cache(budget: int) -> FragmentCache:
+    app = Flask(__name__)
+    app.config["FRAGMENT_CACHE_BYTES"] = budget
+    return FragmentCache(app)
+
+
+def test_least_recently_used_fragments_are_evicted():
+    text = "x" * 100
+    cache = fragment_cache(2 * sys.getsizeof(Markup(text)) + 10)
+
+    cache.get("a", lambda: text)
+    cache.get("b", lambda: text)
+    cache.get("a", lambda: "unused")
+    cache.get("c", lambda: text)
+
+    assert cache.get("a", lambda: "a again") == text
+    assert cache.get("b", lambda: "b again") == "b again"
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (2, 4, 2)
+    assert stats.entries == 2
+    assert stats.size <= stats.budget
+
+
+def test_fragments_over_budget_are_not_kept():
+    cache = fragment_cache(64)
+    cache.get("a", lambda: "x" * 100)
+    assert cache.stats().entries == 0
+
+    disabled = fragment_cache(0)
+    assert disabled.get("a", lambda: "<b>") == "<b>"
+    assert disabled.stats().misses == 0
+
+
+def test_task_rows_are_rendered_once(app, client):
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        board = Board.new_board("TB", "Test Board", user)
+        for i in range(3):
+            board.new_task(user, f"Task {i}", "Body", user)
+
+    first = client.get("/tasks/testuser/TB").data
+    assert app.fragments.stats().misses == 3
+
+    assert client.get("/tasks/testuser/TB").data == first
+    assert client.get("/tasks/").data.count(b">Task ") == 3
+    stats = app.fragments.stats()
+    assert (stats.hits, stats.misses) == (6, 3)
+
+    with app.app_context():
+        task = Board.select_by_id(board.id).get_task(2)
+        task.set_title(user, "Retitled")
+
+    assert b"Retitled" in client.get("/tasks/testuser/TB").data
+    assert app.fragments.stats().misses == 4
+
+
+def test_board_rows_follow_changes_within_a_second(app, client):
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        board = Board.new_board("TB", "Test Board", user)
+
+    assert b"Test Board" in client.get("/boards/").data
+
+    with app.app_context():
+        Board.select_by_id(board.id).rename_board(user, "Renamed")
+
+    data = client.get("/boards/").data
+    assert b"Renamed" in data
+    assert b"Test Board" not in data
+
+
+def test_fragment_metrics_are_admin_only(app, client):
+    assert client.get("/settings/fragments").status_code == 403
+
+    with app.app_context():
+        User.create_admin("admin", b"admin")
+    client.post("/login", data={"username": "admin", "password": "admin"})
+
+    stats = client.get("/settings/fragments").get_json()
+    assert stats["budget"] == app.config["FRAGMENT_CACHE_BYTES"]
+    assert {"hits", "misses", "evictions", "entries", "size"} <= stats.keys()
@@ -0,0 +1,77 @@
+from src.identity_map import IdentityMap
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+from src.todo.task.models import Task
+
+
+def test_identity_map_aliases_and_invalidation():
+    identity_map = IdentityMap()
+    identity_map.add("user", 1, (1, "bob"), ("username", "bob"))
+
+    assert identity_map.get("user", 1) == (1, "bob")
+    assert identity_map.get("user", ("username", "bob")) == (1, "bob")
+
+    identity_map.invalidate("user", 1)
+    assert identity_map.get("user", 1) is None
+    assert identity_map.get("user", ("username", "bob")) is None
+
+
+def test_identity_map_invalidate_table():
+    identity_map = IdentityMap()
+    identity_map.add("task", 1, (1,))
+    identity_map.add("task", 2, (2,))
+    identity_map.add("board", 1, (1,))
+
+    identity_map.invalidate("task")
+    assert identity_map.get("task", 1) is None
+    assert identity_map.get("task", 2) is None
+    assert identity_map.get("board", 1) == (1,)
+
+
+def test_user_loaded_once_per_request(app, client, executed_queries):
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        board = Board.new_board("TB", "Test Board", user)
+        board.new_task(user, "Task", "Body", user)
+        task = board.get_task(1)
+        task.new_comment(user, "first")
+        task.new_comment(user, "second")
+
+    executed_queries.clear()
+    response = client.get("/tasks/testuser/TB/1")
+    assert response.status_code == 200
+
+    user_queries = [
+        q for q in executed_queries
+        if "from user" in q and "where user." in q
+    ]
+    assert len(user_queries) == 1
+
+    # the revision probe for conditional GETs reads only validators
+    board_queries = [
+        q for q in executed_queries
+        if "from board\n" in q and "revision" not in q
+    ]
+    assert len(board_queries) == 1
+
+
+def test_writes_invalidate_cached_rows(app):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        board = Board.new_board("TST", "test board", user)
+        task = board.new_task(user, "Task", "")
+
+        assert Board.select_by_creator_symbol(user.id, "TST").name == "test board"
+        board.rename_board(user, "renamed")
+        assert Board.select_by_creator_symbol(user.id, "TST").name == "renamed"
+
+        board.set_board_symbol(user, "NEW")
+        assert Board.select_by_creator_symbol(user.id, "TST") is None
+        assert Board.select_by_creator_symbol(user.id, "NEW").id == board.id
+
+        assert Task.select_by_task_id(task.id).title == "Task"
+        task.set_title(user, "Renamed")
+        assert Task.select_by_board_and_number(board.id, task.number).title == "Renamed"
+
+        task.delete(user)
+        assert Task.select_by_task_id(task.id) is None
@@ -0,0 +1,148 @@
+import io
+import json
+
+from src.counters import check_counters
+from src.importer import import_tasks, tasks_cli
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+from src.todo.task.models import task_search
+
+JSONL = "\n".join(json.dumps(record) for record in (
+    {"title": "Paint the fence", "body": "white", "tags": ["outside", "paint"]},
+    {"title": "Mow the lawn", "status": "in-progress", "assignee": "other",
+     "comments": ["front first", "then the back"]},
+    {"title": ""},
+    {"title": "Fix the gate", "status": "blocked"},
+    {"title": "Call the plumber", "assignee": "nobody"},
+    "not an object",
+)) + "\n{broken\n"
+
+CSV = (
+    "title,body,status,tags,comments\n"
+    'Sweep the porch,,completed,"outside\nchores",\n'
+    'Clean the gutters,"ladder, gloves",,,"check the\nforecast"\n'
+)
+
+
+def test_import_tasks(app):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        other = User.create_user("other", b"other")
+        board = Board.new_board("TST", "test board", user)
+        board.new_task(user, "Existing", "")
+
+        result = import_tasks(board, user, io.StringIO(JSONL), "jsonl")
+        assert (result.imported, result.skipped) == (3, 4)
+        assert result.errors == [
+            "line 3: title is required",
+            "line 5: unknown assignee: nobody",
+            "line 6: expected a JSON object",
+            "line 7: invalid JSON: Expecting property name enclosed in double quotes",
+        ]
+
+        fence, lawn, gate = (board.get_task(number) for number in (2, 3, 4))
+        assert [fence.title, lawn.title, gate.title] == ["Paint the fence", "Mow the lawn", "Fix the gate"]
+        assert sorted(tag.value for tag in fence.tags) == ["outside", "paint"]
+        assert fence.status.name == "todo"
+        assert lawn.status.name == "in-progress"
+        assert lawn.assignee_id == other.id
+        assert [(c.number, c.contents) for c in lawn.comments] == \
+               [(2, "then the back"), (1, "front first")]
+        assert gate.status.name == "blocked"
+        assert sorted(s.name for s in gate.statuses) == ["blocked", "completed", "in-progress", "todo"]
+
+        assert board.new_task(user, "After", "").number == 5
+        assert lawn.new_comment(user, "mowed").comments[0].number == 3
+
+        assert [r.task_id for r in task_search(user, "fence")] == [fence.id]
+        assert [r.task_id for r in task_search(user, "back")] == [lawn.id]
+        assert [r.task_id for r in task_search(user, "paint")] == [fence.id]
+        assert [r.task_id for r in task_search(user, "after")] != []
+
+    with app.database as db:
+        assert db.execute("select suspended from search_sync").fetchone() == (0,)
+        assert check_counters(db) == []
+
+
+def test_import_endpoint(app, client):
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        board = Board.new_board("TST", "test board", user)
+
+    response = client.post(
+        "/tasks/testuser/TST/import",
+        data={"file": (io.BytesIO(CSV.encode()), "tasks.csv")},
+    )
+    assert response.json == {"imported": 2, "skipped": 0, "errors": []}
+
+    response = client.post(
+        "/tasks/testuser/TST/import",
+        data=JSONL.splitlines()[0],
+        content_type="application/x-ndjson",
+    )
+    assert response.json["imported"] == 1
+
+    response = client.post("/tasks/testuser/TST/import", data="title\nx\n")
+    assert response.status_code == 400
+
+    with app.app_context():
+        porch, gutters, fence = (board.get_task(number) for number in (1, 2, 3))
+        assert porch.status.name == "completed"
+        assert sorted(tag.value for tag in porch.tags) == ["chores", "outside"]
+        assert gutters.body == "ladder, gloves"
+        assert [c.contents for c in gutters.comments] == ["forecast", "check the"]
+        assert fence.title == "Paint the fence"
+
+
+def test_import_command(app, runner, tmp_path):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        User.create_user("other", b"other")
+        Board.new_board("TST", "test board", user)
+
+    source = tmp_path / "tasks.jsonl"
+    source.write_text(JSONL)
+
+    result = runner.invoke(tasks_cli, ["import", "--board", "test/TST", str(source)])
+    assert result.exit_code == 1
+    assert "imported 3 tasks into test/TST" in result.output
+    assert "skipped 4 records" in result.output
+
+    result = runner.invoke(tasks_cli, ["import", "--board", "test/NOPE", str(source)])
+    assert result.exit_code == 2
+
+
+def test_import_endpoint_keeps_search_indexing_on(app, client, executed_queries):
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        Board.new_board("TST", "test board", user)
+
+    executed_queries.clear()
+    response = client.post(
+        "/tasks/testuser/TST/import",
+        data={"file": (io.BytesIO(CSV.encode()), "tasks.csv")},
+    )
+    assert response.json["imported"] == 2
+
+    assert not any("search_sync" in sql for sql in executed_queries)
+    assert not any("'rebuild'" in sql for sql in executed_queries)
+    with app.app_context():
+        assert len(task_search(user, "gutters")) == 1
+        assert len(task_search(user, "forecast")) == 1
+        assert len(task_search(user, "chores")) == 1
+
+
+def test_import_endpoint_limits_upload_size(app, client):
+    with app.app_context():
+        user = User.select_by_username("testuser")
+        Board.new_board("TST", "test board", user)
+
+    body = "title\n" + "x" * app.config["MAX_CONTENT_LENGTH"]
+    response = client.post(
+        "/tasks/testuser/TST/import",
+        data={"file": (io.BytesIO(body.encode()), "tasks.csv")},
+    )
+    assert response.status_code == 413
+
+    with app.app_context():
+        assert Board.select_by_creator_symbol(user.id, "TST").task_seq == 0
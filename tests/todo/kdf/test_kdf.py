@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+from flask import Flask
+
+from src.kdf import KdfBusy, KdfPool
+from src.todo.auth.models import User
+
+
+@pytest.fixture
+def kdf_pool() -> KdfPool:
+    app = Flask(__name__)
+    app.config.update(KDF_WORKERS=1, KDF_QUEUE_DEPTH=1)
+    pool = KdfPool(app)
+    yield pool
+    pool.shutdown()
+
+
+def occupy(pool: KdfPool, jobs: int, release: threading.Event) -> list:
+    """
+    Start jobs that hold the pool until release is set
+    """
+    threads = [
+        threading.Thread(target=pool.run, args=(release.wait, 5), daemon=True)
+        for _ in range(jobs)
+    ]
+    for thread in threads:
+        thread.start()
+    while pool.stats().in_flight < jobs:
+        threading.Event().wait(0.01)
+    return threads
+
+
+def test_pool_rejects_beyond_workers_and_queue(kdf_pool):
+    release = threading.Event()
+    threads = occupy(kdf_pool, 2, release)
+    with pytest.raises(KdfBusy):
+        kdf_pool.run(len, b"")
+    assert kdf_pool.stats().rejected == 1
+
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert kdf_pool.run(len, b"abc") == 3
+    stats = kdf_pool.stats()
+    assert stats.completed == 3
+    assert stats.in_flight == 0
+    assert stats.queue_wait_max > 0
+    assert stats.hash_max > 0
+
+
+def test_login_fails_fast_when_pool_is_saturated(app, client):
+    release = threading.Event()
+    threads = occupy(app.kdf, app.kdf.workers + app.kdf.queue_depth, release)
+
+    response = client.post("/login", data={"username": "testuser", "password": "usertest"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    response = client.post("/login", data={"username": "testuser", "password": "usertest"})
+    assert response.status_code == 302
+
+
+def test_kdf_metrics_are_admin_only(app, client):
+    assert client.get("/settings/kdf").status_code == 403
+
+    with app.app_context():
+        User.create_admin("admin", b"admin")
+    client.post("/login", data={"username": "admin", "password": "admin"})
+
+    stats = client.get("/settings/kdf").get_json()
+    assert stats["workers"] == app.config["KDF_WORKERS"]
+    assert stats["completed"] >= 3
+    assert stats["rejected"] == 0
@@ -10,3 +10,23 @@ def test_migrations_applied(app):
         assert result[1][0] == "todo/auth/migrations/0001_permissions_seed.sql"
         assert result[2][0] == "todo/board/migrations/0000_initial_tables.sql"
         assert result[3][0] == "todo/task/migrations/0000_initial_tables.sql"
+        assert result[4][0] == "todo/board/migrations/0001_indexes.sql"
+        assert result[5][0] == "todo/task/migrations/0001_indexes.sql"
+        assert result[6][0] == "todo/board/migrations/0002_counters.sql"
+        assert result[7][0] == "todo/task/migrations/0002_counters.sql"
+        assert result[8][0] == "todo/task/migrations/0003_backfill_counters.sql"
+        assert result[9][0] == "todo/task/migrations/0004_search_comments_tags.sql"
+        assert result[10][0] == "todo/task/migrations/0005_last_updated_indexes.sql"
+        assert result[11][0] == "todo/task/migrations/0006_search_sync.sql"
+        assert result[12][0] == "todo/task/migrations/0007_incremental_search.sql"
+        assert result[13][0] == "todo/auth/migrations/0002_kdf_params.sql"
+        assert result[14][0] == "todo/auth/migrations/0003_password_format.sql"
+        assert result[15][0] == "todo/auth/migrations/0004_role_capabilities.sql"
+        assert result[16][0] == "todo/auth/migrations/0005_sessions.sql"
+        assert result[17][0] == "todo/auth/migrations/0006_user_version.sql"
+        assert result[18][0] == "todo/board/migrations/0003_revision.sql"
+        assert result[19][0] == "todo/task/migrations/0008_board_revision.sql"
+        assert result[20][0] == "todo/auth/migrations/0007_rehash_keeps_version.sql"
+        assert result[21][0] == "todo/board/migrations/0004_role_last_updated.sql"
+        assert result[22][0] == "todo/auth/migrations/0008_password_bumps_version.sql"
+        assert len(result) == 23
@@ -0,0 +1,70 @@
+import re
+
+import pytest
+
+from src.todo.auth.models import queries as auth_queries
+from src.todo.board.models import queries as board_queries
+from src.todo.task.models import queries as task_queries
+
+# queries that are meant to read the whole table
+# (or a CTE already bounded by an FTS match)
+FULL_SCAN_ALLOWED = {
+    ("query_task_search", "m"),
+}
+
+# list pages are read in index order; these merge one index walk
+# per board the user has accepted, so the sort is bounded by
+# boards * page size rows however many tasks there are
+TEMP_SORT_ALLOWED = {
+    "user_tasks_next_page",
+    "user_tasks_prev_page",
+}
+
+SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+def named_queries():
+    for module in (auth_queries, board_queries, task_queries):
+        for query in module:
+            yield query.name, query.sql
+
+
+def bind_parameters(sql: str):
+    named = re.findall(r"(?<![:\w]):(\w+)", sql)
+    if named:
+        return {name: 1 for name in named}
+    return (1,) * sql.count("?")
+
+
+@pytest.mark.parametrize(
+    "name,sql", list(named_queries()), ids=[n for n, _ in named_queries()]
+)
+def test_query_does_not_scan_tables(app, name, sql):
+    with app.database as db:
+        plan = db.execute(
+            f"explain query plan {sql}", bind_parameters(sql)
+        ).fetchall()
+
+    for row in plan:
+        detail = row[3]
+        match = SCAN.match(detail)
+        if not match or "VIRTUAL TABLE" in detail:
+            continue
+        assert (name, match.group(1)) in FULL_SCAN_ALLOWED, \
+            f"{name}: {detail}"
+
+
+@pytest.mark.parametrize(
+    "name,sql",
+    [(n, s) for n, s in named_queries() if n.endswith("_page")],
+    ids=[n for n, _ in named_queries() if n.endswith("_page")],
+)
+def test_list_pages_are_index_ordered(app, name, sql):
+    with app.database as db:
+        plan = db.execute(
+            f"explain query plan {sql}", bind_parameters(sql)
+        ).fetchall()
+
+    for row in plan:
+        if "TEMP B-TREE" in row[3]:
+            assert name in TEMP_SORT_ALLOWED, f"{name}: {row[3]}"
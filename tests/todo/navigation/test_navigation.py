@@ -5,3 +5,16 @@ from flask import Response
 def test_get_index(client):
     r: Response = client.get("/")
     assert r.status_code == 200
+
+
+def test_search_links_highlighted_results(client):
+    client.post("/boards/create", data={"name": "hello board", "symbol": "HB"})
+    client.post(
+        "/tasks/create",
+        data={"board": "testuser/HB", "title": "findme", "description": "hello task"},
+    )
+
+    r: Response = client.post("/search", data={"query": "findme"})
+    assert r.status_code == 200
+    assert b'href="/tasks/testuser/HB/1"' in r.data
+    assert b"<mark>findme</mark>" in r.data
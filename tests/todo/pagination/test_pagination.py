@@ -0,0 +1,112 @@
+import pytest
+
+from src.pagination import decode_cursor, encode_cursor
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+from src.todo.board.models import queries as board_queries
+from src.todo.task.models import Task
+from src.todo.task.models import queries as task_queries
+
+
+def _walk(fetch):
+    """follow next cursors to the end, then prev cursors back to the start"""
+    pages = [fetch(None)]
+    while pages[-1].next_cursor:
+        pages.append(fetch(pages[-1].next_cursor))
+    back = [pages[-1]]
+    while back[-1].prev_cursor:
+        back.append(fetch(back[-1].prev_cursor))
+    return pages, back
+
+
+def test_cursor_round_trip(app):
+    with app.app_context():
+        cursor = encode_cursor("next", (1672531200, 7))
+        assert decode_cursor(cursor) == ("next", (1672531200, 7))
+        assert decode_cursor(cursor[:-2] + "xx") is None
+        assert decode_cursor("garbage") is None
+        assert decode_cursor(None) is None
+
+
+@pytest.mark.parametrize("listing", ["user_tasks", "board_tasks"])
+def test_task_pages(app, freezer, listing):
+    app.config["PAGE_SIZE"] = 3
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        first = Board.new_board("ONE", "board one", user)
+        second = Board.new_board("TWO", "board two", user)
+        for i in range(5):
+            # several tasks share a timestamp, so the id breaks ties
+            freezer.move_to(f"2023-01-0{i + 1}")
+            first.new_task(user, f"one {i}", "")
+            first.new_task(user, f"one {i}b", "")
+            second.new_task(user, f"two {i}", "")
+
+        other = User.create_user("other", b"other")
+        Board.new_board("OTH", "other", other).new_task(other, "hidden", "")
+
+        if listing == "user_tasks":
+            expected = 15
+            pages, back = _walk(lambda c: Task.user_tasks(user, c))
+        else:
+            expected = 10
+            pages, back = _walk(lambda c: first.board_tasks(user, first.id, c))
+
+    rows = [summary for page in pages for summary in page]
+    keys = [(summary.last_updated, summary.id) for summary in rows]
+    assert len(rows) == expected
+    assert keys == sorted(keys, reverse=True)
+    assert "hidden" not in [summary.description for summary in rows]
+    assert all(len(page) == 3 for page in pages[:-1])
+    assert pages[0].prev_cursor is None
+
+    assert [p.items for p in reversed(back)] == [p.items for p in pages]
+
+
+def test_board_pages(app):
+    app.config["PAGE_SIZE"] = 2
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        for i in range(5):
+            Board.new_board(f"B{i}", f"board {i}", user)
+
+        pages, back = _walk(lambda c: Board.user_boards(user, c))
+
+    assert [[board.symbol for board in page] for page in pages] == \
+           [["B0", "B1"], ["B2", "B3"], ["B4"]]
+    assert [p.items for p in reversed(back)] == [p.items for p in pages]
+
+
+def test_task_list_links_next_page(app, client):
+    app.config["PAGE_SIZE"] = 1
+    client.post("/boards/create", data={"name": "hello board", "symbol": "HB"})
+    for title in ("first", "second"):
+        client.post(
+            "/tasks/create",
+            data={"board": "testuser/HB", "title": title, "description": ""},
+        )
+
+    response = client.get("/tasks/testuser/HB")
+    assert b"second" in response.data
+    assert b"first" not in response.data
+    assert b"Previous" not in response.data
+    assert b"/tasks/testuser/HB?cursor=" in response.data
+
+
+@pytest.mark.parametrize("module,name", [
+    (task_queries, "user_tasks_next_page"),
+    (task_queries, "user_tasks_prev_page"),
+    (board_queries, "board_tasks_next_page"),
+    (board_queries, "board_tasks_prev_page"),
+])
+def test_task_pages_seek_to_the_cursor(app, module, name):
+    with app.database as db:
+        plan = db.execute(
+            f"explain query plan {getattr(module, name).sql}",
+            dict(user_id=1, board_id=1, last_updated=1, id=1, limit=1),
+        ).fetchall()
+
+    details = [row[3] for row in plan]
+    assert any(
+        "task_board_last_updated_idx (board_id=? AND <expr>" in d for d in details
+    ), details
@@ -0,0 +1,71 @@
+import pytest
+
+from src.database import statement_cache_size
+from src.queries import parse_queries
+
+SQL = """
+-- header comments before the first query are ignored
+
+-- name: create_item
+-- fn(value: str)
+insert into item (value)
+values (?);
+
+-- name: select_items
+-- every item, oldest first
+select id, value
+from item
+-- comments inside a query are not part of its SQL
+order by id;
+
+-- name: select_item
+select id, value
+from item
+where id = :item_id;
+"""
+
+
+@pytest.fixture()
+def queries():
+    return parse_queries(SQL)
+
+
+def test_parse_queries(queries):
+    assert queries.available_queries == ["create_item", "select_items", "select_item"]
+    assert queries.select_items.doc.splitlines()[0] == "every item, oldest first"
+    assert queries.select_items.sql == "select id, value\nfrom item\norder by id;"
+    assert queries.create_item.writes
+    assert not queries.select_items.writes
+
+
+def test_parse_queries_rejects_duplicate_names():
+    with pytest.raises(ValueError):
+        parse_queries("-- name: a\nselect 1;\n-- name: a\nselect 2;")
+
+
+def test_query_modes(app, queries):
+    with app.database as db:
+        db.execute("create table item (id integer primary key, value text)")
+        queries.create_item(db, "one")
+        assert db.holds_writer
+        queries.create_item.execute(db, "two")
+
+        assert queries.select_item.one(db, item_id=2) == (2, "two")
+        assert queries.select_item.one(db, item_id=3) is None
+        assert queries.select_items.many(db) == [(1, "one"), (2, "two")]
+        assert queries.select_items(db) == [(1, "one"), (2, "two")]
+
+        rows = queries.select_items.iter(db)
+        assert next(rows) == (1, "one")
+        assert list(rows) == [(2, "two")]
+
+        db.execute("drop table item")
+
+
+def test_statement_cache_holds_every_loaded_query():
+    from src.todo.auth.models import queries as auth_queries
+    from src.todo.board.models import queries as board_queries
+    from src.todo.task.models import queries as task_queries
+
+    loaded = len(auth_queries) + len(board_queries) + len(task_queries)
+    assert statement_cache_size() >= loaded
@@ -0,0 +1,220 @@
+import random
+import sqlite3
+
+import pytest
+
+from src.search import SEARCH_INDEXES, merge_search_indexes, rebuild_search_index_in_chunks, rebuild_search_indexes, search_cli
+from src.todo.auth.models import User
+from src.todo.board.models import Board
+from src.todo.task.models import task_search
+
+WORDS = (
+    "alpha bravo charlie delta echo foxtrot golf hotel india juliet "
+    "kilo lima mike november oscar papa quebec romeo sierra tango"
+).split()
+
+
+def test_search_merges_comments_and_tags(app):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        board = Board.new_board("TST", "test board", user)
+        first = board.new_task(user, "Paint the fence", "white paint")
+        second = board.new_task(user, "Mow the lawn", "front and back")
+        first.new_comment(user, "the zebra ate the brush")
+        second.add_tag(user, "urgent")
+        second.new_comment(user, "fence is next door")
+
+        [result] = task_search(user, "zebra")
+        assert (result.task_id, result.source) == (first.id, "comment")
+        assert result.title == "Paint the fence"
+        assert "<mark>zebra</mark>" in result.excerpt
+
+        [result] = task_search(user, "urgent")
+        assert (result.task_id, result.source) == (second.id, "tag")
+
+        results = task_search(user, "fence")
+        assert sorted(r.task_id for r in results) == [first.id, second.id]
+
+        second.remove_tag(user, "urgent")
+        second.delete_comment(user, 1)
+        assert task_search(user, "urgent") == []
+        assert [r.task_id for r in task_search(user, "fence")] == [first.id]
+
+
+def test_rebuild_command(app, runner):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        board = Board.new_board("TST", "test board", user)
+        task = board.new_task(user, "Task", "")
+        task.new_comment(user, "rebuild me")
+
+    with app.database as db:
+        db.execute(
+            "insert into task_comment_search(task_comment_search) values ('delete-all')"
+        )
+
+    with app.app_context():
+        assert task_search(user, "rebuild") == []
+
+    result = runner.invoke(search_cli, ["rebuild"])
+    assert result.exit_code == 0
+    assert "rebuilt 3 search indexes" in result.output
+
+    with app.app_context():
+        assert [r.source for r in task_search(user, "rebuild")] == ["comment"]
+
+    with app.database as db:
+        db.execute("update search_sync set suspended = 1")
+
+    result = runner.invoke(search_cli, ["rebuild", "--resume"])
+    assert result.exit_code == 0
+    with app.database as db:
+        assert db.execute("select suspended from search_sync").fetchone() == (0,)
+
+
+def _integrity_check(db: sqlite3.Connection):
+    for index, _, _ in SEARCH_INDEXES:
+        # rank 1 also compares the index against its content table
+        db.execute(f"insert into {index}({index}, rank) values ('integrity-check', 1)")
+
+
+def test_index_only_follows_indexed_columns(app):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        board = Board.new_board("TST", "test board", user)
+        task = board.new_task(user, "Paint the fence", "")
+
+    with app.database as db:
+        before = db.total_changes
+        db.execute(
+            "update task set status_id = status_id, comment_seq = comment_seq + 1, "
+            "modified = 1, title = title where id = ?", (task.id,)
+        )
+        assert db.total_changes - before == 1
+
+        before = db.total_changes
+        db.execute("update task set title = 'Paint the gate' where id = ?", (task.id,))
+        assert db.total_changes - before > 1
+        _integrity_check(db)
+
+    with app.app_context():
+        assert [r.task_id for r in task_search(user, "gate")] == [task.id]
+        assert task_search(user, "fence") == []
+
+
+def test_chunked_rebuild_keeps_index_consistent(app):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        board = Board.new_board("TST", "test board", user)
+        tasks = [board.new_task(user, f"Task {word}", "") for word in WORDS[:6]]
+
+    chunks = rebuild_search_index_in_chunks(app.database, "task_search", 2)
+    next(chunks)
+
+    with app.app_context():
+        tasks[0].set_title(user, "Task zulu")
+        tasks[4].set_title(user, "Task yankee")
+        tasks[5].delete(user)
+        board.new_task(user, "Task xray", "")
+        # rows past the rebuild are not searchable until it reaches them
+        assert task_search(user, "yankee") == []
+
+    assert len(list(chunks)) == 2
+    with app.database as db:
+        _integrity_check(db)
+        assert db.execute("select count(1) from search_rebuild").fetchone() == (0,)
+
+    with app.app_context():
+        for word, task_id in (("zulu", tasks[0].id), ("yankee", tasks[4].id), ("bravo", tasks[1].id)):
+            assert [r.task_id for r in task_search(user, word)] == [task_id]
+        assert task_search(user, "foxtrot") == []
+        assert len(task_search(user, "xray")) == 1
+
+
+def test_merge_ends_on_a_fragmented_index(app):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        board = Board.new_board("TST", "test board", user)
+    with app.database as db:
+        db.execute("insert into task_search(task_search, rank) values ('automerge', 0)")
+        # a segment per transaction
+        for i in range(100):
+            db.execute(
+                "insert into task (number, board_id, creator_id, title, body, created) "
+                "values (?, ?, ?, ?, ?, 0)",
+                # distinct terms, so the merged segments span many pages
+                (i + 1, board.id, user.id, f"Task {i}", " ".join(f"t{i}w{j}" for j in range(40))),
+            )
+            db.commit()
+
+    assert merge_search_indexes(app.database, 1, max_steps=1) == 1
+    assert merge_search_indexes(app.database, 1) > 0
+    assert merge_search_indexes(app.database, 1) == 0
+
+    with app.database as db:
+        _integrity_check(db)
+
+
+def test_optimize_command(app, runner):
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        board = Board.new_board("TST", "test board", user)
+        for i in range(40):
+            board.new_task(user, f"Task {WORDS[i % len(WORDS)]}", "")
+
+    result = runner.invoke(search_cli, ["optimize", "--merge", "16"])
+    assert result.exit_code == 0
+    assert "merged search indexes" in result.output
+
+    result = runner.invoke(search_cli, ["optimize"])
+    assert result.exit_code == 0
+
+    result = runner.invoke(search_cli, ["rebuild", "--chunk-size", "7"])
+    assert result.exit_code == 0
+    assert "task_search: 6 chunks" in result.output
+
+    with app.database as db:
+        _integrity_check(db)
+
+
+def _index_size(db: sqlite3.Connection, prefix: str) -> int:
+    try:
+        return db.execute(
+            "select sum(pgsize) from dbstat where name like ?", (f"{prefix}%",)
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        pytest.skip("sqlite built without dbstat")
+
+
+def test_comment_index_size(app):
+    random.seed(7)
+    with app.app_context():
+        user = User.create_user("test", b"test")
+        board = Board.new_board("TST", "test board", user)
+        tasks = [board.new_task(user, f"Task {i}", "") for i in range(20)]
+
+    with app.database as db:
+        db.executemany(
+            "insert into task_comment (task_id, number, user_id, contents, created) "
+            "values (?, ?, ?, ?, 0)",
+            (
+                (tasks[i % 20].id, i, user.id, " ".join(random.choices(WORDS, k=40)))
+                for i in range(2000)
+            ),
+        )
+        db.execute(
+            "create virtual table comment_copy using fts5(contents)"
+        )
+        db.execute(
+            "insert into comment_copy (contents) select contents from task_comment"
+        )
+
+        external = _index_size(db, "task_comment_search")
+        contentful = _index_size(db, "comment_copy")
+        # the external-content index does not store a copy of the comments
+        assert external < contentful
+
+        db.execute("drop table comment_copy")
+
+    with app.app_context():
+        assert len(task_search(user, "alpha")) == 20
@@ -0,0 +1,93 @@
+import time
+
+from src.sessions import SqliteSessionInterface, sessions_cli
+from src.todo.auth.models import User
+
+
+def session_rows(database) -> list:
+    with database as db:
+        return db.execute("select id, data, expires from session").fetchall()
+
+
+def session_writes(executed_queries) -> list:
+    return [
+        sql for sql in executed_queries
+        if sql.lstrip().lower().startswith(("insert into session", "update session", "delete from session"))
+    ]
+
+
+def test_login_stores_session_server_side(app, client):
+    cookie = client.get_cookie(app.config["SESSION_COOKIE_NAME"])
+    rows = session_rows(app.database)
+
+    assert len(rows) == 1
+    key, data, expires = rows[0]
+    assert cookie.value not in key
+    assert "testuser" in data
+    assert "testuser" not in cookie.value
+    assert expires > time.time()
+
+
+def test_unchanged_session_is_not_written(app, client, executed_queries):
+    executed_queries.clear()
+    response = client.get("/boards/")
+    assert response.status_code == 200
+    assert session_writes(executed_queries) == []
+    assert "Set-Cookie" not in response.headers
+
+
+def test_session_near_expiry_is_extended(app, client, executed_queries):
+    with app.database as db:
+        db.execute("update session set expires = ?", (int(time.time()) + 60,))
+        db.commit()
+
+    executed_queries.clear()
+    client.get("/boards/")
+    assert len(session_writes(executed_queries)) == 1
+    assert session_rows(app.database)[0][2] > time.time() + 60
+
+
+def test_logout_deletes_session(app, client):
+    response = client.get("/logout")
+    assert "Set-Cookie" in response.headers
+    assert session_rows(app.database) == []
+
+
+def test_unknown_session_id_is_not_adopted(app, client):
+    name = app.config["SESSION_COOKIE_NAME"]
+    client.set_cookie(name, "forged")
+    client.post("/login", data={"username": "testuser", "password": "usertest"})
+
+    assert client.get_cookie(name).value != "forged"
+    assert len(session_rows(app.database)) == 2
+
+
+def test_expired_sessions_are_ignored_and_purged(app, client, runner):
+    with app.database as db:
+        db.execute("update session set expires = ?", (int(time.time()),))
+        db.commit()
+
+    result = runner.invoke(sessions_cli, ["purge"])
+    assert result.exit_code == 0
+    assert "deleted 1 expired sessions" in result.output
+    assert session_rows(app.database) == []
+
+    response = client.get("/boards/")
+    assert response.status_code == 302
+
+
+def test_sessions_in_separate_database(app, tmp_path):
+    app.config["SESSION_DATABASE_PATH"] = str(tmp_path / "sessions.db")
+    interface = SqliteSessionInterface(app)
+    assert app.session_interface is interface
+    assert interface.database is not app.database
+
+    client = app.test_client()
+    with app.app_context():
+        User.create_user("sessionuser", b"password")
+    client.post("/login", data={"username": "sessionuser", "password": "password"})
+
+    assert session_rows(app.database) == []
+    assert len(session_rows(interface.database)) == 1
+    assert client.get("/boards/").status_code == 200
+    interface.database.close()
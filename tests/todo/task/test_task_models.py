@@ -1,10 +1,11 @@
+import sqlite3
 import time
 
 import pytest
 
 from src.todo.auth.models import User
 from src.todo.board.models import Board
-from src.todo.task.models import Task, TaskStatus, TaskTag, TaskComment, TaskEvent, task_search
+from src.todo.task.models import Task, TaskStatus, TaskSummary, TaskTag, TaskComment, TaskEvent, task_search
 
 
 @pytest.fixture()
@@ -84,6 +85,26 @@ def test_create_new_board_task(app, user, board):
         assert task.modified is None
 
 
+def test_new_task_is_one_transaction(app, user, board, executed_queries):
+    with app.app_context():
+        executed_queries.clear()
+        task = board.new_task(creator=user, title="new task", body="")
+
+        assert executed_queries.count("COMMIT") == 1
+        assert task.status.name == "todo"
+        assert sorted(s.name for s in task.statuses) == ["completed", "in-progress", "todo"]
+        assert [(e.description, e.change_field) for e in task.events] == \
+               [("created task", None), ("update", "status")]
+
+        with pytest.raises(sqlite3.IntegrityError):
+            board.new_task(creator=user, title=None, body="")
+
+    with app.database as db:
+        assert db.execute("select task_seq from board where id = ?", (board.id,)).fetchone() == (1,)
+        assert db.execute("select count(*) from task_status").fetchone() == (3,)
+        assert db.execute("select count(*) from task_event").fetchone() == (2,)
+
+
 def test_set_task_status(app, user, board):
     with app.app_context():
         task = board.new_task(
@@ -299,6 +320,109 @@ def test_task_fulltext_search(app, user, board, text_fixture_1, text_fixture_2):
         assert len(task_search(user, "knowledge")) == 2
         assert len(task_search(user, "repentance")) == 1
         result = task_search(user, "NEAR(hopes pains)")[0]
-        assert result[0] == 3
-        assert result[1] == text_fixture_2[0]
-        assert result[2] == text_fixture_2[1]
+        assert result.task_id == 3
+        assert result.title == text_fixture_2[0]
+        assert "<mark>hopes</mark> and <mark>pains</mark>" in result.excerpt
+        assert text_fixture_2[1] != result.excerpt
+
+
+def test_task_search_respects_roles_and_pages(app, user, board):
+    with app.app_context():
+        app.config["SEARCH_PAGE_SIZE"] = 2
+        for i in range(3):
+            board.new_task(creator=user, title=f"<b>needle</b> {i}", body="haystack")
+
+        pages = [task_search(user, "needle", page) for page in (1, 2, 3)]
+        assert [len(p) for p in pages] == [2, 1, 0]
+        assert pages[0][0].title.startswith("&lt;b&gt;<mark>needle</mark>&lt;/b&gt;")
+        assert pages[0][0].board_symbol == board.symbol
+
+        other = User.create_user("other", b"other")
+        assert task_search(other, "needle") == []
+
+        board.set_user_role(user, other, "viewer")
+        assert task_search(other, "needle") == []
+
+        board.accept_user_role(other.id)
+        assert len(task_search(other, "needle", 1)) == 2
+
+
+def test_task_relationships_load_lazily(app, user, board, executed_queries):
+    with app.app_context():
+        board.new_task(creator=user, title="Task", body="")
+
+    with app.app_context():
+        executed_queries.clear()
+        task = Task.select_by_board_and_number(board.id, 1)
+        assert len(executed_queries) == 1
+
+        assert task.status.name == "todo"
+        assert [s.name for s in task.possible_statuses] == ["completed", "in-progress"]
+        assert len(executed_queries) == 2
+
+        assert task.tags == list()
+        assert task.tags == list()
+        assert len(executed_queries) == 3
+
+
+def test_iter_by_board_id_streams_tasks(app, user, board, executed_queries):
+    with app.app_context():
+        for i in range(3):
+            task = board.new_task(creator=user, title=f"Task {i}", body="")
+            if i != 1:
+                task.add_tag(user, f"tag{i}")
+                task.new_comment(user, f"comment {i}")
+
+    with app.app_context():
+        executed_queries.clear()
+        tasks = Task.iter_by_board_id(board.id)
+        assert executed_queries == []
+
+        first = next(tasks)
+        assert first.title == "Task 0"
+        rest = list(tasks)
+
+        assert [t.title for t in rest] == ["Task 1", "Task 2"]
+        assert [[tag.value for tag in t.tags] for t in [first] + rest] == \
+               [["tag0"], [], ["tag2"]]
+        assert [[c.contents for c in t.comments] for t in [first] + rest] == \
+               [["comment 0"], [], ["comment 2"]]
+        assert all(len(t.events) >= 1 for t in [first] + rest)
+
+        assert list(Task.iter_by_board_id(-1)) == []
+
+
+def test_iter_by_board_id_returns_connection_between_batches(app, user, board):
+    app.config["STREAM_BATCH_SIZE"] = 2
+    with app.app_context():
+        for i in range(5):
+            task = board.new_task(creator=user, title=f"Task {i}", body="")
+            task.add_tag(user, f"tag{i}")
+
+    with app.app_context():
+        tasks = list()
+        for task in Task.iter_by_board_id(board.id):
+            assert app.database.stats().in_use == 0
+            tasks.append(task)
+
+        assert [t.title for t in tasks] == [f"Task {i}" for i in range(5)]
+        assert [[tag.value for tag in t.tags] for t in tasks] == [[f"tag{i}"] for i in range(5)]
+
+
+def test_row_classes_are_slotted(app, user, board):
+    with app.app_context():
+        task = board.new_task(creator=user, title="Task", body="")
+        task.add_tag(user, "tag")
+        summary = Board.board_tasks(user, board.id)[0]
+        rows = (summary, task.tags[0], task.events[0], task.status)
+
+    assert summary.assignee == "None"
+    assert summary == TaskSummary._from_tuple(
+        (summary.symbol, summary.number, summary.description, summary.status,
+         summary.creator, None, summary.tag_count, summary.comment_count,
+         summary.last_updated, summary.id)
+    )
+    for row in rows:
+        assert not hasattr(row, "__dict__")
+        with pytest.raises(AttributeError):
+            row.unexpected = True